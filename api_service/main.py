@@ -1,8 +1,19 @@
 import os
-import requests
-from fastapi import FastAPI, HTTPException, UploadFile, Form
+import time
+import asyncio
+import itertools
+import httpx
+from fastapi import FastAPI, HTTPException, UploadFile, Form, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 import logging
 
+from observability.middleware import install as install_observability, propagate_request_id, record_upstream_time
+from api_service.sharding import ShardError, fan_out, iter_csv_shards, merge_csv, merge_json
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,7 +27,8 @@ app = FastAPI(
         "- Realizar predições usando modelos treinados.\n"
         "- Verificar o status dos serviços conectados.\n\n"
         "#### Observações:\n"
-        "- Apenas arquivos no formato CSV são suportados para upload.\n"
+        "- Apenas arquivos no formato CSV são suportados para upload, em texto ou comprimidos com gzip ou zstd "
+        "(`application/gzip`, `application/zstd` ou `Content-Encoding` na parte do arquivo).\n"
         "- Utilize a configuração adequada para os parâmetros dos modelos durante o treinamento."
     ),
     version="1.0.0",
@@ -29,9 +41,167 @@ app = FastAPI(
         "url": "https://opensource.org/licenses/MIT",
     }
 )
+install_observability(app, service="api")
 
 TRAINER_URL = os.environ.get("TRAINER_URL", "http://trainer:8001")
 PREDICT_URL = os.environ.get("PREDICT_URL", "http://predict:8002")
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "30"))
+# Réplicas do Predict Service, separadas por vírgula, entre as quais os CSVs grandes são divididos.
+PREDICT_URLS = [url.strip() for url in os.environ.get("PREDICT_URLS", PREDICT_URL).split(",") if url.strip()]
+# Uploads a partir deste tamanho são divididos em blocos de PREDICT_SHARD_ROWS linhas.
+PREDICT_SHARD_MIN_BYTES = int(os.environ.get("PREDICT_SHARD_MIN_BYTES", str(8 * 1024 * 1024)))
+PREDICT_SHARD_ROWS = int(os.environ.get("PREDICT_SHARD_ROWS", "50000"))
+PREDICT_SHARD_CONCURRENCY = int(os.environ.get("PREDICT_SHARD_CONCURRENCY", str(2 * len(PREDICT_URLS))))
+# Prazo de cada tentativa de um bloco; esgotado, o bloco é reenviado a outra réplica.
+PREDICT_SHARD_TIMEOUT = float(os.environ.get("PREDICT_SHARD_TIMEOUT", str(HTTP_TIMEOUT)))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HEALTH_TIMEOUT = float(os.environ.get("HEALTH_TIMEOUT", "2"))
+HEALTH_CACHE_TTL = float(os.environ.get("HEALTH_CACHE_TTL", "5"))
+
+# Repassa o X-Request-ID aos serviços e mede o tempo de cada chamada.
+HTTP_EVENT_HOOKS = {"request": [propagate_request_id], "response": [record_upstream_time]}
+
+# Cliente HTTP assíncrono compartilhado, com pool de conexões keep-alive para os serviços.
+http_client: Optional[httpx.AsyncClient] = None
+_health_cache = {"expires_at": 0.0, "value": None}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS
+            ),
+            event_hooks=HTTP_EVENT_HOOKS
+        )
+    return http_client
+
+
+@app.on_event("startup")
+async def startup():
+    get_http_client()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+def _form_data(**fields) -> dict:
+    # Campos não informados (None) não são enviados ao serviço.
+    return {name: str(value) for name, value in fields.items() if value is not None}
+
+
+# Uploads de CSV aceitos: em texto ou comprimidos com gzip ou zstd, indicados pelo tipo do arquivo
+# ou pelo Content-Encoding da parte. Os bytes seguem sem alteração para os serviços, que
+# descomprimem durante a leitura (dataset_manager.compression).
+CSV_UPLOAD_CONTENT_TYPES = ("text/csv", "application/gzip", "application/x-gzip", "application/zstd")
+CSV_CONTENT_ENCODINGS = ("gzip", "x-gzip", "zstd")
+
+
+def _content_encoding(upload: UploadFile) -> Optional[str]:
+    encoding = upload.headers.get("content-encoding", "").strip().lower()
+    return None if encoding in ("", "identity") else encoding
+
+
+def _is_csv_upload(upload: UploadFile) -> bool:
+    encoding = _content_encoding(upload)
+    return upload.content_type in CSV_UPLOAD_CONTENT_TYPES and (encoding is None or encoding in CSV_CONTENT_ENCODINGS)
+
+
+def _upload_part(upload: UploadFile) -> tuple:
+    encoding = _content_encoding(upload)
+    return upload.filename, upload.file, upload.content_type, {"Content-Encoding": encoding} if encoding else {}
+
+
+def _forward_client_error(response: httpx.Response):
+    # Erros de negócio dos serviços (dados inválidos, job inexistente, fila cheia...) e a recusa por
+    # sobrecarga ou prazo esgotado são repassados ao cliente, com o Retry-After quando houver.
+    if response.status_code in (400, 404, 406, 409, 429, 503, 504):
+        try:
+            detail = response.json().get("detail")
+        except ValueError:
+            detail = response.text
+        retry_after = response.headers.get("Retry-After")
+        headers = {"Retry-After": retry_after} if retry_after else None
+        raise HTTPException(status_code=response.status_code, detail=detail, headers=headers)
+
+
+# O Predict Service abandona o trabalho quando este gateway já desistiu de esperar a resposta.
+PREDICT_DEADLINE_HEADERS = {"X-Request-Timeout": str(HTTP_TIMEOUT)}
+
+
+# Formatos de resposta do Predict Service (predict_service.formats) repassados sem decodificar.
+PREDICTION_MEDIA_TYPES = (
+    "application/json",
+    "application/x-npy",
+    "application/x-npz",
+    "application/vnd.apache.arrow.stream",
+    "text/csv",
+)
+
+
+def _shard_media_type(accept: Optional[str]) -> Optional[str]:
+    # Só JSON e CSV são juntados no gateway; os formatos binários seguem para uma réplica só.
+    first = (accept or "application/json").split(",")[0].split(";")[0].strip().lower()
+    if first in ("application/json", "application/*", "*/*"):
+        return "application/json"
+    if first in ("text/csv", "text/*"):
+        return "text/csv"
+    return None
+
+
+def _upload_size(upload: UploadFile) -> int:
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
+
+
+async def _predict_sharded(upload: UploadFile, data: dict, media_type: str) -> Optional[Response]:
+    """
+    Divide o CSV em blocos de linhas, envia os blocos às réplicas em paralelo e junta as
+    predições na ordem original das linhas. Retorna None se o arquivo couber em um bloco.
+    """
+    # O upload é lido aos poucos do arquivo temporário: o gateway só guarda os blocos em envio.
+    await upload.seek(0)
+    shards = iter_csv_shards(upload.file, PREDICT_SHARD_ROWS)
+    first = await run_in_threadpool(next, shards)
+    second = await run_in_threadpool(next, shards, None)
+    if second is None:
+        await upload.seek(0)
+        return None
+
+    shards = itertools.chain([first, second], shards)
+    del first, second
+
+    headers = {"X-Request-Timeout": str(PREDICT_SHARD_TIMEOUT), "Accept": media_type}
+    responses = await fan_out(
+        get_http_client(), PREDICT_URLS, "/predict", shards, upload.filename, data, headers,
+        concurrency=PREDICT_SHARD_CONCURRENCY, attempt_timeout=PREDICT_SHARD_TIMEOUT
+    )
+    for response in responses:
+        _forward_client_error(response)
+        response.raise_for_status()
+    logger.info(f"Predição dividida em {len(responses)} blocos entre {len(PREDICT_URLS)} réplicas.")
+
+    bodies = [response.content for response in responses]
+    if media_type == "text/csv":
+        return Response(content=merge_csv(bodies), media_type=media_type)
+    return JSONResponse(content=merge_json(bodies))
+
+
+class PredictRecordsRequest(BaseModel):
+    records: List[Dict[str, Any]] = Field(..., description="Registros a serem preditos, um objeto JSON por linha.")
+    columns_to_drop: Optional[List[str]] = Field(None, description="Colunas a serem descartadas antes da predição.")
+    model: Optional[str] = Field(None, description="Nome do modelo no registro. Padrão: modelo `default`.")
+    version: Optional[str] = Field(None, description="Versão do modelo. Padrão: a versão promovida.")
 
 @app.post(
     "/train",
@@ -44,42 +214,309 @@ PREDICT_URL = os.environ.get("PREDICT_URL", "http://predict:8002")
     tags=["Treinamento"]
 )
 async def train(
-    dataset_file: UploadFile,
+    dataset_file: UploadFile = None,
     model_type: str = Form("RandomForestClassifier", description="Tipo do modelo a ser treinado (e.g., RandomForestClassifier, LogisticRegression)."),
     model_params: str = Form("{}", description="Parâmetros do modelo em formato JSON."),
     target_column: str = Form(..., description="Nome da coluna alvo no dataset."),
-    columns_to_drop: str = Form(None, description="Nomes das colunas a serem ignoradas no dataset (se aplicável).")
+    columns_to_drop: str = Form(None, description="Nomes das colunas a serem ignoradas no dataset (se aplicável)."),
+    owner: str = Form("default", description="Time ou cliente dono do job de treinamento."),
+    model_name: str = Form(None, description="Nome do modelo no registro (opcional; padrão: `default`)."),
+    promote: bool = Form(None, description="Promover a nova versão a `LATEST` ao final do treinamento (opcional)."),
+    dataset_hash: str = Form(None, description="Hash de um dataset já enviado, usado no lugar do arquivo (opcional)."),
+    streaming: bool = Form(None, description="Treinamento incremental em blocos, para datasets maiores que a memória (opcional)."),
+    chunk_size: int = Form(None, description="Linhas por bloco no treinamento incremental (opcional)."),
+    distributed_workers: int = Form(None, description="Processos entre os quais as árvores da floresta são divididas (opcional).")
 ):
     """
-    Treinar um modelo usando um dataset fornecido.
+    Enfileirar o treinamento de um modelo usando um dataset fornecido.
 
     **Parâmetros:**
-    - **dataset_file** (*UploadFile*): Arquivo CSV contendo os dados para treinamento.
+    - **dataset_file** (*UploadFile*): Arquivo CSV contendo os dados para treinamento (opcional se `dataset_hash` for enviado).
     - **model_type** (*str*): Tipo do modelo de Machine Learning. Valor padrão: `RandomForestClassifier`.
     - **model_params** (*str*): Parâmetros adicionais para o modelo em formato JSON. Exemplo: `{"n_estimators": 100, "max_depth": 5}`.
     - **target_column** (*str*): Nome da coluna alvo no dataset para o treinamento.
     - **columns_to_drop** (*str*): Lista de colunas a serem ignoradas no dataset, separadas por vírgula (opcional).
+    - **owner** (*str*): Time ou cliente dono do job (opcional).
+    - **model_name** (*str*): Nome do modelo no registro (opcional).
+    - **promote** (*bool*): Promover a nova versão ao final do treinamento (opcional).
+    - **dataset_hash** (*str*): Hash retornado por um treinamento anterior, para reutilizar o dataset sem reenviá-lo (opcional).
+    - **streaming** (*bool*): Treinar em blocos com `partial_fit` (modelos como `SGDClassifier` e `GaussianNB`) (opcional).
+    - **chunk_size** (*int*): Linhas por bloco no modo `streaming` (opcional).
+    - **distributed_workers** (*int*): Divide as árvores de uma floresta entre esse número de processos (opcional).
 
     **Retornos:**
-    - **200**: Sucesso. Retorna detalhes do treinamento e métricas do modelo.
+    - **202**: Job enfileirado. Retorna o ID do job, que pode ser acompanhado em `/jobs/{job_id}`.
     - **400**: Erro no formato do arquivo ou nos dados fornecidos.
+    - **404**: `dataset_hash` não encontrado no cache do Trainer.
+    - **429**: Fila de treinamento cheia.
     - **500**: Erro ao chamar o serviço Trainer.
     """
-    if dataset_file.content_type != "text/csv":
+    if dataset_file is None and dataset_hash is None:
+        raise HTTPException(status_code=400, detail="Envie um arquivo CSV ou o dataset_hash de um envio anterior.")
+    if dataset_file is not None and not _is_csv_upload(dataset_file):
         raise HTTPException(status_code=400, detail="Apenas arquivos CSV são suportados.")
 
-    files = {"dataset_file": (dataset_file.filename, dataset_file.file)}
-    data = {
-        "model_type": model_type,
-        "model_params": model_params,
-        "target_column": target_column,
-        "columns_to_drop": columns_to_drop
-    }
+    # O FastAPI já gravou o upload em um arquivo temporário antes do handler rodar; daqui ele
+    # é reenviado em blocos de 64 KiB, sem ser carregado inteiro em memória.
+    files = None
+    if dataset_file is not None:
+        files = {"dataset_file": _upload_part(dataset_file)}
+    data = _form_data(
+        dataset_hash=dataset_hash,
+        model_type=model_type,
+        model_params=model_params,
+        target_column=target_column,
+        columns_to_drop=columns_to_drop,
+        owner=owner,
+        model_name=model_name,
+        promote=promote,
+        streaming=streaming,
+        chunk_size=chunk_size,
+        distributed_workers=distributed_workers
+    )
     try:
-        response = requests.post(f"{TRAINER_URL}/train", files=files, data=data, timeout=30)
+        response = await get_http_client().post(f"{TRAINER_URL}/train", files=files, data=data)
+        _forward_client_error(response)
+        response.raise_for_status()
+        return JSONResponse(status_code=response.status_code, content=response.json())
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error(f"Erro ao chamar Trainer Service: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao chamar Trainer Service: {e}")
+
+
+@app.post(
+    "/tune",
+    summary="Buscar Hiperparâmetros",
+    description=(
+        "Enfileirar uma busca de hiperparâmetros com validação cruzada e halving sucessivo. "
+        "O leaderboard fica disponível no resultado do job, e o melhor modelo é salvo no registro."
+    ),
+    tags=["Treinamento"]
+)
+async def tune(
+    param_grid: str = Form(..., description="Espaço de busca em JSON."),
+    dataset_file: UploadFile = None,
+    model_type: str = Form("RandomForestClassifier", description="Tipo do modelo a ser ajustado."),
+    model_params: str = Form(None, description="Parâmetros fixos do modelo em formato JSON (opcional)."),
+    search: str = Form(None, description="Estratégia de busca: `grid` ou `random` (opcional)."),
+    cv: int = Form(None, description="Quantidade de folds da validação cruzada (opcional)."),
+    factor: int = Form(None, description="Fator de halving (opcional)."),
+    n_candidates: int = Form(None, description="Candidatos sorteados na busca aleatória (opcional)."),
+    target_column: str = Form(None, description="Nome da coluna alvo no dataset (opcional)."),
+    columns_to_drop: str = Form(None, description="Nomes das colunas a serem ignoradas no dataset (opcional)."),
+    owner: str = Form("default", description="Time ou cliente dono do job."),
+    model_name: str = Form(None, description="Nome do modelo no registro (opcional)."),
+    promote: bool = Form(None, description="Promover o melhor modelo ao final da busca (opcional)."),
+    dataset_hash: str = Form(None, description="Hash de um dataset já enviado (opcional).")
+):
+    """
+    Enfileirar uma busca de hiperparâmetros no Trainer Service.
+
+    **Parâmetros:** os mesmos de `/tune` no Trainer Service; `param_grid` é obrigatório.
+
+    **Retornos:**
+    - **202**: Job enfileirado. Acompanhe o leaderboard em `/jobs/{job_id}`.
+    - **400**: Erro no formato do arquivo ou nos dados fornecidos.
+    - **404**: `dataset_hash` não encontrado no cache do Trainer.
+    - **429**: Fila de treinamento cheia.
+    - **500**: Erro ao chamar o serviço Trainer.
+    """
+    if dataset_file is not None and not _is_csv_upload(dataset_file):
+        raise HTTPException(status_code=400, detail="Apenas arquivos CSV são suportados.")
+
+    files = None
+    if dataset_file is not None:
+        files = {"dataset_file": _upload_part(dataset_file)}
+    data = _form_data(
+        param_grid=param_grid,
+        dataset_hash=dataset_hash,
+        model_type=model_type,
+        model_params=model_params,
+        search=search,
+        cv=cv,
+        factor=factor,
+        n_candidates=n_candidates,
+        target_column=target_column,
+        columns_to_drop=columns_to_drop,
+        owner=owner,
+        model_name=model_name,
+        promote=promote
+    )
+    try:
+        response = await get_http_client().post(f"{TRAINER_URL}/tune", files=files, data=data)
+        _forward_client_error(response)
+        response.raise_for_status()
+        return JSONResponse(status_code=response.status_code, content=response.json())
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error(f"Erro ao chamar Trainer Service: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao chamar Trainer Service: {e}")
+
+
+@app.post(
+    "/retrain",
+    summary="Retreinar Modelo com Dados Novos",
+    description=(
+        "Enfileirar o retreino incremental de um modelo já treinado, estendendo o artefato atual "
+        "só com as linhas novas enviadas."
+    ),
+    tags=["Treinamento"]
+)
+async def retrain(
+    dataset_file: UploadFile = None,
+    dataset_hash: str = Form(None, description="Hash de um dataset já enviado (opcional)."),
+    target_column: str = Form(None, description="Nome da coluna alvo no dataset (opcional)."),
+    columns_to_drop: str = Form(None, description="Nomes das colunas a serem ignoradas no dataset (opcional)."),
+    n_estimators: int = Form(None, description="Árvores novas das florestas (opcional)."),
+    owner: str = Form("default", description="Time ou cliente dono do job."),
+    model_name: str = Form(None, description="Nome do modelo no registro (opcional)."),
+    version: str = Form(None, description="Versão a ser estendida (opcional; padrão: a promovida)."),
+    promote: bool = Form(None, description="Promover a nova versão ao final do retreino (opcional).")
+):
+    """
+    Enfileirar o retreino incremental de um modelo no Trainer Service.
+
+    **Parâmetros:** os mesmos de `/retrain` no Trainer Service.
+
+    **Retornos:**
+    - **202**: Job enfileirado. Acompanhe em `/jobs/{job_id}`.
+    - **400**: Erro no formato do arquivo ou nos dados fornecidos.
+    - **404**: Modelo, versão ou `dataset_hash` não encontrados.
+    - **429**: Fila de treinamento cheia.
+    - **500**: Erro ao chamar o serviço Trainer.
+    """
+    if dataset_file is not None and not _is_csv_upload(dataset_file):
+        raise HTTPException(status_code=400, detail="Apenas arquivos CSV são suportados.")
+
+    files = None
+    if dataset_file is not None:
+        files = {"dataset_file": _upload_part(dataset_file)}
+    data = _form_data(
+        dataset_hash=dataset_hash,
+        target_column=target_column,
+        columns_to_drop=columns_to_drop,
+        n_estimators=n_estimators,
+        owner=owner,
+        model_name=model_name,
+        version=version,
+        promote=promote
+    )
+    try:
+        response = await get_http_client().post(f"{TRAINER_URL}/retrain", files=files, data=data)
+        _forward_client_error(response)
+        response.raise_for_status()
+        return JSONResponse(status_code=response.status_code, content=response.json())
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error(f"Erro ao chamar Trainer Service: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao chamar Trainer Service: {e}")
+
+
+@app.get(
+    "/jobs/{job_id}",
+    summary="Status do Job de Treinamento",
+    description="Consultar o status, as métricas e os tempos de um job de treinamento.",
+    tags=["Treinamento"]
+)
+async def get_job(job_id: str):
+    """
+    Consultar um job de treinamento.
+
+    **Parâmetros:**
+    - **job_id** (*str*): ID retornado por `/train`.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna status, métricas e tempos do job.
+    - **404**: Job não encontrado.
+    - **500**: Erro ao chamar o serviço Trainer.
+    """
+    try:
+        response = await get_http_client().get(f"{TRAINER_URL}/jobs/{job_id}")
+        _forward_client_error(response)
         response.raise_for_status()
         return response.json()
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error(f"Erro ao chamar Trainer Service: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao chamar Trainer Service: {e}")
+
+
+@app.delete(
+    "/jobs/{job_id}",
+    summary="Cancelar Job de Treinamento",
+    description="Cancelar um job de treinamento que ainda está na fila.",
+    tags=["Treinamento"]
+)
+async def cancel_job(job_id: str):
+    """
+    Cancelar um job de treinamento pendente.
+
+    **Parâmetros:**
+    - **job_id** (*str*): ID retornado por `/train`.
+
+    **Retornos:**
+    - **200**: Sucesso. O job foi cancelado.
+    - **404**: Job não encontrado.
+    - **409**: O job já está em execução ou finalizado.
+    - **500**: Erro ao chamar o serviço Trainer.
+    """
+    try:
+        response = await get_http_client().delete(f"{TRAINER_URL}/jobs/{job_id}")
+        _forward_client_error(response)
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error(f"Erro ao chamar Trainer Service: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao chamar Trainer Service: {e}")
+
+
+@app.get(
+    "/models",
+    summary="Listar Modelos",
+    description="Listar os modelos do registro, suas versões e a versão promovida de cada um.",
+    tags=["Modelos"]
+)
+async def list_models():
+    """
+    Listar os modelos registrados.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna as versões e a versão `latest` de cada modelo.
+    - **500**: Erro ao chamar o serviço Trainer.
+    """
+    try:
+        response = await get_http_client().get(f"{TRAINER_URL}/models")
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error(f"Erro ao chamar Trainer Service: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao chamar Trainer Service: {e}")
+
+
+@app.post(
+    "/models/{model_name}/promote",
+    summary="Promover Versão de Modelo",
+    description="Apontar a versão `latest` de um modelo para uma versão já treinada.",
+    tags=["Modelos"]
+)
+async def promote_model(model_name: str, version: str = Form(..., description="Versão a ser promovida.")):
+    """
+    Promover uma versão de modelo.
+
+    **Parâmetros:**
+    - **model_name** (*str*): Nome do modelo no registro.
+    - **version** (*str*): Versão a ser promovida.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna o modelo e a versão promovida.
+    - **404**: Versão não encontrada.
+    - **500**: Erro ao chamar o serviço Trainer.
+    """
+    try:
+        response = await get_http_client().post(
+            f"{TRAINER_URL}/models/{model_name}/promote", data=_form_data(version=version)
+        )
+        _forward_client_error(response)
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, ValueError) as e:
         logger.error(f"Erro ao chamar Trainer Service: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao chamar Trainer Service: {e}")
 
@@ -90,13 +527,19 @@ async def train(
     description=(
         "Enviar um dataset para realizar predições usando um modelo treinado. "
         "Este endpoint aceita um arquivo CSV contendo os dados para predição e permite "
-        "especificar colunas que devem ser ignoradas."
+        "especificar colunas que devem ser ignoradas. O header `Accept` escolhe o formato da resposta "
+        "(JSON, `.npy`, `.npz`, Arrow IPC ou CSV), repassada sem alterações. Arquivos grandes pedidos em JSON "
+        "ou CSV são divididos em blocos de linhas, processados em paralelo pelas réplicas do Predict Service."
     ),
     tags=["Predição"]
 )
 async def predict(
     input_file: UploadFile,
-    columns_to_drop: str = Form(None, description="Nomes das colunas a serem ignoradas no dataset para predição (se aplicável).")
+    columns_to_drop: str = Form(None, description="Nomes das colunas a serem ignoradas no dataset para predição (se aplicável)."),
+    model: str = Form(None, description="Nome do modelo no registro (opcional; padrão: `default`)."),
+    version: str = Form(None, description="Versão do modelo (opcional; padrão: a versão promovida)."),
+    include_proba: bool = Form(None, description="Incluir as probabilidades por classe na resposta (opcional)."),
+    accept: str = Header(None, description="Formato da resposta.")
 ):
     """
     Fazer predições usando um modelo treinado.
@@ -104,22 +547,149 @@ async def predict(
     **Parâmetros:**
     - **input_file** (*UploadFile*): Arquivo CSV contendo os dados para predição.
     - **columns_to_drop** (*str*): Lista de colunas a serem ignoradas no dataset, separadas por vírgula (opcional).
+    - **model** (*str*): Nome do modelo no registro (opcional).
+    - **version** (*str*): Versão do modelo (opcional).
+    - **include_proba** (*bool*): Incluir as probabilidades por classe (opcional).
+    - **accept** (*str*): Header `Accept` com o formato desejado da resposta.
 
     **Retornos:**
     - **200**: Sucesso. Retorna as predições geradas pelo modelo.
     - **400**: Erro no formato do arquivo ou nos dados fornecidos.
+    - **404**: Modelo ou versão não encontrados.
+    - **406**: Formato de resposta não suportado.
+    - **500**: Erro ao chamar o serviço Predict.
+    """
+    if not _is_csv_upload(input_file):
+        raise HTTPException(status_code=400, detail="Apenas arquivos CSV são suportados.")
+
+    files = {"input_file": _upload_part(input_file)}
+    data = _form_data(columns_to_drop=columns_to_drop, model=model, version=version, include_proba=include_proba)
+    headers = {**PREDICT_DEADLINE_HEADERS, "Accept": accept} if accept else PREDICT_DEADLINE_HEADERS
+    try:
+        shard_media_type = _shard_media_type(accept)
+        # Arquivos comprimidos não são divididos: seguem inteiros, como vieram, para uma réplica.
+        compressed = input_file.content_type != "text/csv" or _content_encoding(input_file) is not None
+        if shard_media_type and not compressed and _upload_size(input_file) >= PREDICT_SHARD_MIN_BYTES:
+            sharded = await _predict_sharded(input_file, data, shard_media_type)
+            if sharded is not None:
+                return sharded
+
+        response = await get_http_client().post(f"{PREDICT_URL}/predict", files=files, data=data, headers=headers)
+        _forward_client_error(response)
+        response.raise_for_status()
+        media_type = response.headers.get("content-type", "").split(";")[0].strip()
+        if media_type not in PREDICTION_MEDIA_TYPES:
+            raise ValueError(f"Resposta com tipo de conteúdo inesperado: '{media_type}'")
+        # O corpo é repassado como veio: nada de decodificar e reserializar JSON no gateway.
+        return Response(content=response.content, media_type=media_type)
+    except (httpx.HTTPError, ValueError, ShardError) as e:
+        logger.error(f"Erro ao chamar Predict Service: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao chamar Predict Service: {e}")
+
+
+@app.post(
+    "/predict/stream",
+    summary="Fazer Predições em Streaming",
+    description=(
+        "Enviar um dataset grande para predição em blocos. As predições são repassadas "
+        "ao cliente em NDJSON ou CSV à medida que o Predict Service as gera."
+    ),
+    tags=["Predição"]
+)
+async def predict_stream(
+    input_file: UploadFile,
+    columns_to_drop: str = Form(None, description="Nomes das colunas a serem ignoradas no dataset para predição (se aplicável)."),
+    chunk_size: int = Form(None, description="Quantidade de linhas processadas por bloco (opcional)."),
+    output_format: str = Form("ndjson", description="Formato da resposta: `ndjson` ou `csv`."),
+    model: str = Form(None, description="Nome do modelo no registro (opcional; padrão: `default`)."),
+    version: str = Form(None, description="Versão do modelo (opcional; padrão: a versão promovida).")
+):
+    """
+    Fazer predições em streaming usando um modelo treinado.
+
+    **Parâmetros:**
+    - **input_file** (*UploadFile*): Arquivo CSV contendo os dados para predição.
+    - **columns_to_drop** (*str*): Lista de colunas a serem ignoradas no dataset, separadas por vírgula (opcional).
+    - **chunk_size** (*int*): Quantidade de linhas processadas por bloco (opcional).
+    - **output_format** (*str*): `ndjson` ou `csv`.
+    - **model** (*str*): Nome do modelo no registro (opcional).
+    - **version** (*str*): Versão do modelo (opcional).
+
+    **Retornos:**
+    - **200**: Sucesso. Repassa as predições em streaming.
+    - **400**: Erro no formato do arquivo ou nos dados fornecidos.
+    - **404**: Modelo ou versão não encontrados.
     - **500**: Erro ao chamar o serviço Predict.
     """
-    if input_file.content_type != "text/csv":
+    if not _is_csv_upload(input_file):
         raise HTTPException(status_code=400, detail="Apenas arquivos CSV são suportados.")
 
-    files = {"input_file": (input_file.filename, input_file.file)}
-    data = {"columns_to_drop": columns_to_drop}
+    files = {"input_file": _upload_part(input_file)}
+    data = _form_data(
+        columns_to_drop=columns_to_drop,
+        chunk_size=chunk_size,
+        output_format=output_format,
+        model=model,
+        version=version
+    )
+    client = get_http_client()
+    request = client.build_request("POST", f"{PREDICT_URL}/predict/stream", files=files, data=data)
+    try:
+        response = await client.send(request, stream=True)
+    except httpx.HTTPError as e:
+        logger.error(f"Erro ao chamar Predict Service: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao chamar Predict Service: {e}")
+
+    if response.is_error:
+        # O corpo de um erro é curto; lido por inteiro, o status e o Retry-After são repassados.
+        await response.aread()
+        _forward_client_error(response)
     try:
-        response = requests.post(f"{PREDICT_URL}/predict", files=files, data=data, timeout=30)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        await response.aclose()
+        logger.error(f"Erro ao chamar Predict Service: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao chamar Predict Service: {e}")
+
+    return StreamingResponse(
+        response.aiter_raw(),
+        media_type=response.headers.get("content-type"),
+        background=BackgroundTask(response.aclose)
+    )
+
+
+@app.post(
+    "/predict/records",
+    summary="Fazer Predições sobre Registros JSON",
+    description=(
+        "Enviar uma ou poucas linhas em JSON para predição de baixa latência, "
+        "sem upload de arquivo CSV."
+    ),
+    tags=["Predição"]
+)
+async def predict_records(request: PredictRecordsRequest):
+    """
+    Fazer predições sobre registros JSON usando um modelo treinado.
+
+    **Parâmetros:**
+    - **records** (*list[dict]*): Registros a serem preditos.
+    - **columns_to_drop** (*list[str]*): Colunas a serem ignoradas (opcional).
+    - **model** (*str*): Nome do modelo no registro (opcional).
+    - **version** (*str*): Versão do modelo (opcional).
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna as predições geradas pelo modelo.
+    - **404**: Modelo ou versão não encontrados.
+    - **500**: Erro ao chamar o serviço Predict.
+    """
+    try:
+        response = await get_http_client().post(
+            f"{PREDICT_URL}/predict/records", json=request.dict(exclude_none=True), headers=PREDICT_DEADLINE_HEADERS
+        )
+        _forward_client_error(response)
         response.raise_for_status()
         return response.json()
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, ValueError) as e:
         logger.error(f"Erro ao chamar Predict Service: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao chamar Predict Service: {e}")
 
@@ -130,32 +700,39 @@ async def predict(
     description="Verificar o status da API Front e dos serviços conectados.",
     tags=["Status"]
 )
-def root():
+async def root():
     """
     Verificar o status dos serviços Trainer e Predict.
 
+    As verificações são feitas em paralelo, com timeout, e o resultado fica em cache
+    por alguns segundos para que health checks frequentes não sobrecarreguem os serviços.
+
     **Retornos:**
     - **200**: Sucesso. Retorna informações sobre o status dos serviços Trainer e Predict.
     - **500**: Erro ao obter o status dos serviços conectados.
     """
-    trainer_status = predict_status = None
-
-    try:
-        trainer_response = requests.get(f"{TRAINER_URL}/")
-        trainer_response.raise_for_status()
-        trainer_status = trainer_response.json()
-    except requests.exceptions.RequestException as e:
-        trainer_status = {"error": f"Trainer Service indisponível: {e}"}
-
-    try:
-        predict_response = requests.get(f"{PREDICT_URL}/")
-        predict_response.raise_for_status()
-        predict_status = predict_response.json()
-    except requests.exceptions.RequestException as e:
-        predict_status = {"error": f"Predict Service indisponível: {e}"}
+    now = time.monotonic()
+    if _health_cache["value"] is not None and now < _health_cache["expires_at"]:
+        return _health_cache["value"]
 
-    return {
+    trainer_status, predict_status = await asyncio.gather(
+        _probe_service("Trainer", TRAINER_URL),
+        _probe_service("Predict", PREDICT_URL)
+    )
+    status = {
         "message": "API Front ativa!",
         "trainer_status": trainer_status,
         "predict_status": predict_status
     }
+    _health_cache["value"] = status
+    _health_cache["expires_at"] = now + HEALTH_CACHE_TTL
+    return status
+
+
+async def _probe_service(name: str, url: str) -> dict:
+    try:
+        response = await get_http_client().get(f"{url}/", timeout=HEALTH_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        return {"error": f"{name} Service indisponível: {e}"}
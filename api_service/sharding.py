@@ -0,0 +1,170 @@
+import io
+import json
+import asyncio
+import logging
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence
+
+import httpx
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class ShardError(Exception):
+    pass
+
+
+# Bytes lidos do upload por vez ao procurar os limites dos blocos.
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+def _record_ends(data: bytes, in_quotes: bool = False) -> np.ndarray:
+    """
+    Posições dos `\\n` que encerram um registro do CSV. Quebras de linha dentro de campos entre
+    aspas não contam: um `\\n` só encerra o registro se houver um número par de aspas antes dele
+    (contando com as aspas ainda abertas no início do trecho, `in_quotes`).
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buffer == ord("\n"))
+    if data.find(b'"') == -1:
+        return newlines if not in_quotes else newlines[:0]
+    quotes = np.flatnonzero(buffer == ord('"'))
+    return newlines[(np.searchsorted(quotes, newlines) + in_quotes) % 2 == 0]
+
+
+def iter_csv_shards(file: BinaryIO, shard_rows: int, block_size: int = READ_BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Lê o CSV de `file` em trechos de `block_size` bytes e gera blocos de até `shard_rows`
+    linhas, cada um com o cabeçalho original. Só o bloco em montagem fica em memória, e a
+    divisão é feita sobre os bytes, sem interpretar os valores. Gera pelo menos um bloco.
+    """
+    header, header_done = b"", False
+    parts, rows, in_quotes, emitted = [], 0, False, False
+    for block in iter(lambda: file.read(block_size), b""):
+        ends = (_record_ends(block, in_quotes) + 1).tolist()
+        in_quotes = (block.count(b'"') + in_quotes) % 2 == 1
+        start, i = 0, 0
+        if not header_done:
+            if not ends:
+                header += block
+                continue
+            header += block[:ends[0]]
+            header_done, start, i = True, ends[0], 1
+        while len(ends) - i >= shard_rows - rows:
+            cut = ends[i + shard_rows - rows - 1]
+            parts.append(block[start:cut])
+            yield header + b"".join(parts)
+            emitted = True
+            i += shard_rows - rows
+            parts, rows, start = [], 0, cut
+        parts.append(block[start:])
+        rows += len(ends) - i
+
+    rest = b"".join(parts)
+    # Última linha sem quebra de linha no final também é uma linha.
+    if rest.strip() or not emitted:
+        yield header + rest
+
+
+def split_csv(data: bytes, shard_rows: int) -> List[bytes]:
+    """
+    Divide o CSV em memória em blocos de até `shard_rows` linhas (ver iter_csv_shards).
+    """
+    return list(iter_csv_shards(io.BytesIO(data), shard_rows))
+
+
+async def fan_out(
+    client: httpx.AsyncClient,
+    urls: Sequence[str],
+    path: str,
+    shards: Iterable[bytes],
+    filename: str,
+    data: dict,
+    headers: dict,
+    concurrency: int,
+    attempt_timeout: Optional[float]
+) -> List[httpx.Response]:
+    """
+    Envia cada bloco a uma réplica (em rodízio), com no máximo `concurrency` envios simultâneos,
+    e devolve as respostas na ordem dos blocos. Os blocos são lidos de `shards` (fora do event
+    loop) só quando há vaga para enviá-los, então no máximo `concurrency` ficam em memória.
+
+    Um bloco cuja réplica falha (erro de conexão, 5xx ou demora além de `attempt_timeout`)
+    é reenviado à próxima réplica da lista, até todas terem sido tentadas. Respostas 4xx são
+    devolvidas sem nova tentativa: o erro está nos dados, não na réplica, e os blocos seguintes
+    deixam de ser enviados. Se todas as réplicas falharem, devolve a última resposta 5xx ou,
+    sem nenhuma resposta, lança ShardError.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(index: int, shard: bytes) -> httpx.Response:
+        try:
+            last_error, last_response = None, None
+            for attempt in range(len(urls)):
+                url = urls[(index + attempt) % len(urls)]
+                request = client.post(
+                    f"{url}{path}", files={"input_file": (filename, shard, "text/csv")}, data=data, headers=headers
+                )
+                try:
+                    # Os timeouts do httpx valem por leitura; o prazo aqui é da tentativa inteira.
+                    response = await asyncio.wait_for(request, attempt_timeout)
+                except asyncio.TimeoutError:
+                    last_error = f"{url}: sem resposta em {attempt_timeout}s"
+                except httpx.HTTPError as e:
+                    last_error = f"{url}: {type(e).__name__} {e}"
+                else:
+                    if response.status_code < 500:
+                        return response
+                    last_error, last_response = f"{url}: HTTP {response.status_code}", response
+                logger.warning(f"Bloco {index} falhou ({last_error}); tentando outra réplica.")
+            if last_response is not None:
+                # Todas recusaram (ex.: 503 por sobrecarga): a última resposta segue para o cliente.
+                return last_response
+            raise ShardError(f"Bloco {index} falhou em todas as réplicas. Último erro: {last_error}")
+        finally:
+            semaphore.release()
+
+    def failed(task: asyncio.Future) -> bool:
+        return task.done() and (task.exception() is not None or task.result().is_client_error)
+
+    shard_iter = iter(shards)
+    tasks = []
+    try:
+        while not any(failed(task) for task in tasks):
+            await semaphore.acquire()
+            shard = await run_in_threadpool(next, shard_iter, None)
+            if shard is None:
+                semaphore.release()
+                break
+            tasks.append(asyncio.ensure_future(send(len(tasks), shard)))
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def merge_json(bodies: List[bytes]) -> dict:
+    """
+    Junta as respostas JSON dos blocos, na ordem, em uma única resposta.
+    """
+    merged = {}
+    for body in bodies:
+        part = json.loads(body)
+        for key in ("predictions", "probabilities"):
+            if key in part:
+                merged.setdefault(key, []).extend(part[key])
+        if "classes" in part:
+            merged.setdefault("classes", part["classes"])
+    return merged
+
+
+def merge_csv(bodies: List[bytes]) -> bytes:
+    """
+    Concatena as respostas CSV dos blocos, mantendo só o cabeçalho da primeira.
+    """
+    parts = [bodies[0]]
+    for body in bodies[1:]:
+        header_end = body.find(b"\n")
+        parts.append(body[header_end + 1:] if header_end != -1 else b"")
+    return b"".join(parts)
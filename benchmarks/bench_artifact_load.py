@@ -0,0 +1,156 @@
+"""
+Compara o carregamento de artefatos em cópia no heap (joblib.load padrão) e com memory mapping
+(mmap_mode="r"), medindo tempo de carga e memória por worker.
+
+Cada worker é um processo novo (spawn), como um worker do uvicorn: carrega o artefato, faz uma
+predição para tocar as páginas e espera os demais antes de medir, para que o PSS reflita as
+páginas compartilhadas entre todos os processos.
+
+Uso:
+    python -m benchmarks.bench_artifact_load --workers 8 --features 4000 --classes 400
+"""
+import os
+import json
+import warnings
+import time
+import argparse
+import tempfile
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from training_pipeline.trainer import Trainer
+
+
+def _memory_kb() -> dict:
+    """
+    Lê RSS, PSS e memória privada do processo atual em /proc (Linux).
+    """
+    memory = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    memory[key] = int(value.split()[0])
+    except FileNotFoundError:
+        import resource
+        memory["Rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "rss_kb": memory.get("Rss"),
+        "pss_kb": memory.get("Pss"),
+        "private_kb": memory.get("Private_Clean", 0) + memory.get("Private_Dirty", 0) if "Pss" in memory else None,
+    }
+
+
+def _worker(model_dir, mmap_mode, sample, barrier, results):
+    # A linha de base é medida com todos os workers já iniciados, para que as bibliotecas
+    # compartilhadas entrem no PSS divididas pelo mesmo número de processos.
+    barrier.wait()
+    baseline = _memory_kb()
+    start = time.perf_counter()
+    trainer = Trainer(model_dir=model_dir, model_class=None, mmap_mode=mmap_mode)
+    trainer.load_model()
+    load_seconds = time.perf_counter() - start
+    trainer.predict(sample)
+
+    # Todos os workers mantêm o modelo carregado no momento da medição.
+    barrier.wait()
+    memory = _memory_kb()
+    barrier.wait()
+    results.put({
+        "load_seconds": load_seconds,
+        **{key: memory[key] - (baseline[key] or 0) if memory[key] is not None else None for key in memory},
+    })
+
+
+def _train_artifacts(root: str, rows: int, features: int, classes: int, trees: int) -> tuple:
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.random((rows, features)), columns=[f"f{i}" for i in range(features)])
+    labels = rng.integers(0, classes, rows)
+
+    model_dirs = {}
+    warnings.filterwarnings("ignore", category=UserWarning)
+    warnings.filterwarnings("ignore", message=".*failed to converge.*")
+    # A regressão logística usa muitas classes (coeficientes grandes); a floresta usa um alvo
+    # binário, porque o array de valores das folhas cresce com o número de classes.
+    for name, model_class, params, target in (
+        ("LogisticRegression", LogisticRegression, {"max_iter": 5}, labels),
+        ("RandomForestClassifier", RandomForestClassifier, {"n_estimators": trees, "random_state": 0}, labels % 2),
+    ):
+        model_dir = os.path.join(root, name)
+        Trainer(model_dir=model_dir, model_class=model_class, model_params=params).train(
+            data.assign(target=target), target_column="target"
+        )
+        model_dirs[name] = model_dir
+    return model_dirs, data.head(100)
+
+
+def run_benchmark(workers: int, rows: int, features: int, classes: int, trees: int) -> list:
+    ctx = mp.get_context("spawn")
+    report = []
+    with tempfile.TemporaryDirectory() as root:
+        model_dirs, sample = _train_artifacts(root, rows, features, classes, trees)
+        for model_name, model_dir in model_dirs.items():
+            artifact_mb = os.path.getsize(os.path.join(model_dir, "model.pkl")) / 1024 ** 2
+            for mmap_mode in (None, "r"):
+                barrier = ctx.Barrier(workers)
+                results = ctx.Queue()
+                processes = [
+                    ctx.Process(target=_worker, args=(model_dir, mmap_mode, sample, barrier, results))
+                    for _ in range(workers)
+                ]
+                for process in processes:
+                    process.start()
+                samples = [results.get() for _ in processes]
+                for process in processes:
+                    process.join()
+
+                def mean(key):
+                    values = [s[key] for s in samples if s[key] is not None]
+                    return float(np.mean(values)) if values else None
+
+                report.append({
+                    "model": model_name,
+                    "format": "mmap" if mmap_mode else "pickle",
+                    "artifact_mb": round(artifact_mb, 2),
+                    "workers": workers,
+                    "load_seconds": mean("load_seconds"),
+                    "rss_mb_per_worker": _mb(mean("rss_kb")),
+                    "pss_mb_per_worker": _mb(mean("pss_kb")),
+                    "private_mb_per_worker": _mb(mean("private_kb")),
+                })
+    return report
+
+
+def _mb(kb):
+    return None if kb is None else round(kb / 1024, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--features", type=int, default=4000)
+    parser.add_argument("--classes", type=int, default=400)
+    parser.add_argument("--trees", type=int, default=20)
+    parser.add_argument("--output", help="Arquivo JSON onde o relatório é gravado (opcional).")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.workers, args.rows, args.features, args.classes, args.trees)
+    for entry in report:
+        print(
+            f"{entry['model']:<24} {entry['format']:<7} artefato={entry['artifact_mb']:>8} MB "
+            f"carga={entry['load_seconds']:.3f}s rss={entry['rss_mb_per_worker']} MB "
+            f"pss={entry['pss_mb_per_worker']} MB privado={entry['private_mb_per_worker']} MB"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Mede vazão e memória do servidor pre-fork do Predict Service (predict_service.server) de 1 a N
+workers.
+
+Para cada quantidade de workers o servidor é iniciado em um subprocesso com um modelo treinado
+aqui, recebe `--clients` conexões concorrentes enviando o mesmo CSV para /predict durante
+`--duration` segundos e, ao fim da carga, tem a memória somada (pai + workers) lida em /proc.
+O RSS conta as páginas compartilhadas uma vez por processo; o PSS as divide entre eles, então a
+diferença mostra o quanto o modelo e as bibliotecas carregados no pai são compartilhados.
+
+Uso:
+    python -m benchmarks.bench_prefork --max-workers 4 --duration 10
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import threading
+import http.client
+import uuid
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from training_pipeline.trainer import Trainer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _process_memory_kb(pid: int) -> dict:
+    memory = {"Rss": 0, "Pss": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in memory:
+                    memory[key] = int(value.split()[0])
+    except FileNotFoundError:
+        pass
+    return memory
+
+
+def _server_memory_mb(parent_pid: int) -> dict:
+    try:
+        with open(f"/proc/{parent_pid}/task/{parent_pid}/children") as f:
+            pids = [parent_pid] + [int(pid) for pid in f.read().split()]
+    except FileNotFoundError:
+        pids = [parent_pid]
+    samples = [_process_memory_kb(pid) for pid in pids]
+    return {
+        "processes": len(pids),
+        "rss_mb": round(sum(s["Rss"] for s in samples) / 1024, 1),
+        "pss_mb": round(sum(s["Pss"] for s in samples) / 1024, 1),
+    }
+
+
+def _multipart(csv: str) -> tuple:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="input_file"; filename="input.csv"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+        f"{csv}\r\n--{boundary}--\r\n"
+    ).encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _wait_ready(port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Servidor na porta {port} não respondeu em {timeout}s.")
+
+
+def _load(port: int, body: bytes, content_type: str, clients: int, duration: float) -> dict:
+    counts, errors, latencies = [0] * clients, [0] * clients, [[] for _ in range(clients)]
+    stop_at = time.monotonic() + duration
+
+    def client(i):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                connection.request("POST", "/predict", body=body, headers={"Content-Type": content_type})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except OSError:
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                ok = False
+            if ok:
+                counts[i] += 1
+                latencies[i].append(time.perf_counter() - start)
+            else:
+                errors[i] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = np.concatenate([np.asarray(values) for values in latencies]) if sum(counts) else np.array([0.0])
+    return {
+        "requests_per_second": round(sum(counts) / elapsed, 1),
+        "errors": sum(errors),
+        "p50_ms": round(float(np.percentile(all_latencies, 50)) * 1000, 2),
+        "p99_ms": round(float(np.percentile(all_latencies, 99)) * 1000, 2),
+    }
+
+
+def run_benchmark(max_workers: int, clients: int, duration: float, rows: int, trees: int) -> list:
+    rng = np.random.default_rng(0)
+    features = pd.DataFrame(rng.normal(size=(5000, 10)), columns=[f"f{i}" for i in range(10)])
+    report = []
+    with tempfile.TemporaryDirectory() as model_dir:
+        Trainer(model_dir, RandomForestClassifier, {"n_estimators": trees, "random_state": 0}).train(
+            features.assign(target=rng.integers(0, 2, len(features))), target_column="target"
+        )
+        body, content_type = _multipart(features.head(rows).to_csv(index=False))
+
+        for workers in range(1, max_workers + 1):
+            port = _free_port()
+            server = subprocess.Popen(
+                [sys.executable, "-m", "predict_service.server", "--host", "127.0.0.1", "--port", str(port),
+                 "--workers", str(workers), "--log-level", "warning"],
+                cwd=ROOT,
+                env={**os.environ, "PYTHONPATH": ROOT, "MODEL_DIR": model_dir},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                _wait_ready(port)
+                result = _load(port, body, content_type, max(clients, workers), duration)
+                report.append({"workers": workers, **result, **_server_memory_mb(server.pid)})
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+
+    baseline = report[0]
+    for entry in report:
+        entry["throughput_scaling"] = round(entry["requests_per_second"] / max(baseline["requests_per_second"], 1e-9), 2)
+        entry["pss_mb_per_worker"] = round(entry["pss_mb"] / entry["workers"], 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=8, help="Conexões concorrentes (no mínimo uma por worker).")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga por configuração.")
+    parser.add_argument("--rows", type=int, default=200, help="Linhas do CSV de cada requisição.")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--output", help="Arquivo JSON onde o relatório é gravado (opcional).")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.max_workers, args.clients, args.duration, args.rows, args.trees)
+    print(f"CPUs disponíveis: {os.cpu_count()}")
+    for entry in report:
+        print(
+            f"workers={entry['workers']:<3} req/s={entry['requests_per_second']:>8} "
+            f"(x{entry['throughput_scaling']}) p50={entry['p50_ms']}ms p99={entry['p99_ms']}ms "
+            f"erros={entry['errors']} rss_total={entry['rss_mb']} MB pss_total={entry['pss_mb']} MB "
+            f"pss/worker={entry['pss_mb_per_worker']} MB"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+"""
+Teste de carga de ponta a ponta dos três serviços (api, trainer e predict), sem Docker.
+
+Cada serviço é iniciado com uvicorn em um subprocesso, em uma porta livre, com `TRAINER_URL` e
+`PREDICT_URL` do gateway apontando para os outros dois e um diretório temporário no lugar de
+`/shared-data`. Um primeiro modelo é treinado pelo gateway com um dataset sintético, e então o
+gateway recebe uma mistura de requisições em malha aberta: as chegadas seguem um processo de
+Poisson com a taxa pedida (`--rps`), independentemente de as respostas anteriores já terem
+voltado. A latência é medida a partir do instante agendado para o envio, de modo que a espera
+causada por um serviço saturado aparece nos percentis em vez de reduzir a carga.
+
+Tipos de requisição da mistura (`--mix`):
+- `batch`: CSV com `--batch-rows` linhas em `/predict`;
+- `record`: um único registro JSON em `/predict/records`;
+- `train`: CSV com `--train-rows` linhas em `/train` (mede a submissão do job; o resultado
+  final dos jobs aparece em `train_jobs`).
+
+O relatório JSON traz, por tipo e no total, requisições, vazão, taxa de erros, códigos HTTP e
+latências p50/p95/p99, e, por serviço (incluindo processos filhos), CPU média e RSS de pico
+durante a carga.
+
+Uso:
+    python -m benchmarks.load_test --rps 50 --duration 30 --mix batch=0.5,record=0.45,train=0.05
+    python -m benchmarks.load_test --rps 20 --duration 10 --output load_report.json
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from dataset_manager.synthetic_datasets import SyntheticDataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = {
+    "trainer": "trainer_service.main:app",
+    "predict": "predict_service.main:app",
+    "api": "api_service.main:app",
+}
+REQUEST_KINDS = ("batch", "record", "train")
+DEFAULT_MIX = "batch=0.5,record=0.45,train=0.05"
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """
+    Converte `batch=0.5,record=0.45,train=0.05` em pesos normalizados para somar 1.
+    """
+    mix = {}
+    for item in value.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise ValueError(f"Tipo de requisição '{kind}' desconhecido. Use {list(REQUEST_KINDS)}.")
+        mix[kind] = float(weight)
+    total = sum(mix.values())
+    if total <= 0 or any(weight < 0 for weight in mix.values()):
+        raise ValueError("Os pesos da mistura devem ser não negativos e somar mais que zero.")
+    return {kind: weight / total for kind, weight in mix.items() if weight > 0}
+
+
+def schedule(rps: float, duration: float, mix: Dict[str, float], seed: int = 0) -> List[tuple]:
+    """
+    Instantes de envio (segundos desde o início) e tipo de cada requisição: chegadas de Poisson
+    com taxa `rps` durante `duration` segundos, com o tipo sorteado pelos pesos da mistura.
+    """
+    rng = np.random.default_rng(seed)
+    expected = int(rps * duration * 1.2) + 10
+    times = np.cumsum(rng.exponential(1 / rps, expected))
+    while times[-1] < duration:
+        times = np.append(times, times[-1] + np.cumsum(rng.exponential(1 / rps, expected)))
+    times = times[times < duration]
+    kinds = rng.choice(list(mix), size=len(times), p=list(mix.values()))
+    return list(zip(times.tolist(), kinds.tolist()))
+
+
+def summarize(samples: List[tuple], elapsed: float) -> dict:
+    """
+    Resume amostras `(status, latência em segundos)`; status 0 indica erro de conexão ou timeout.
+    """
+    statuses = [status for status, _ in samples]
+    ok = [latency for status, latency in samples if 200 <= status < 300]
+    latencies = np.asarray([latency for _, latency in samples]) * 1000 if samples else np.array([0.0])
+    status_counts = {}
+    for status in statuses:
+        key = str(status) if status else "connection_error"
+        status_counts[key] = status_counts.get(key, 0) + 1
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": len(samples) - len(ok),
+        "error_rate": round((len(samples) - len(ok)) / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        "status_counts": status_counts,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "max_ms": round(float(latencies.max()), 2),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _process_tree(pid: int) -> List[int]:
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return pids
+
+
+def _cpu_seconds(pid: int) -> float:
+    # utime + stime do processo e dos filhos já encerrados (campos 14 a 17 de /proc/<pid>/stat).
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (FileNotFoundError, ProcessLookupError):
+        return 0.0
+    return sum(int(value) for value in fields[11:15]) / _CLOCK_TICKS
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return 0
+
+
+class ResourceSampler:
+    """
+    Amostra em uma thread, a cada `interval` segundos, o RSS somado de cada serviço e dos seus
+    processos filhos (os workers de treinamento, por exemplo), e mede a CPU consumida entre
+    start e stop.
+    """
+
+    def __init__(self, pids: Dict[str, int], interval: float = 0.25):
+        self.pids = pids
+        self.interval = interval
+        self.peak_rss_kb = {name: 0 for name in pids}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _cpu(self) -> Dict[str, float]:
+        return {name: sum(_cpu_seconds(pid) for pid in _process_tree(root)) for name, root in self.pids.items()}
+
+    def _sample(self):
+        for name, root in self.pids.items():
+            rss = sum(_rss_kb(pid) for pid in _process_tree(root))
+            self.peak_rss_kb[name] = max(self.peak_rss_kb[name], rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._cpu_start, self._started = self._cpu(), time.monotonic()
+        self._sample()
+        self._thread.start()
+
+    def stop(self) -> dict:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        elapsed = time.monotonic() - self._started
+        cpu_end = self._cpu()
+        report = {}
+        for name, root in self.pids.items():
+            cpu = max(cpu_end[name] - self._cpu_start[name], 0.0)
+            report[name] = {
+                "processes": len(_process_tree(root)),
+                "cpu_seconds": round(cpu, 2),
+                "cpu_percent": round(100 * cpu / elapsed, 1) if elapsed > 0 else 0.0,
+                "peak_rss_mb": round(self.peak_rss_kb[name] / 1024, 1),
+                "rss_mb": round(sum(_rss_kb(pid) for pid in _process_tree(root)) / 1024, 1),
+            }
+        return report
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"O serviço em {url} terminou com código {process.returncode} ao iniciar.")
+        try:
+            if httpx.get(f"{url}/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Serviço em {url} não respondeu em {timeout}s.")
+
+
+@contextmanager
+def run_stack(shared_dir: str, env: Optional[dict] = None, log_level: str = "warning"):
+    """
+    Inicia trainer, predict e api com uvicorn e devolve as URLs e os PIDs de cada serviço.
+    `env` acrescenta variáveis de ambiente aos três processos.
+    """
+    ports = {name: _free_port() for name in SERVICES}
+    urls = {name: f"http://127.0.0.1:{port}" for name, port in ports.items()}
+    base_env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "PYTHONUNBUFFERED": "1",
+        "MODEL_DIR": os.path.join(shared_dir, "models"),
+        "DATASET_CACHE_DIR": os.path.join(shared_dir, "datasets"),
+        "TRAINER_URL": urls["trainer"],
+        "PREDICT_URL": urls["predict"],
+        **(env or {}),
+    }
+    base_env.pop("PREDICT_URLS", None)
+    processes = {}
+    try:
+        for name, app in SERVICES.items():
+            processes[name] = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(ports[name]),
+                 "--log-level", log_level],
+                cwd=ROOT,
+                env=base_env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        for name, process in processes.items():
+            _wait_ready(urls[name], process)
+        yield urls, {name: process.pid for name, process in processes.items()}
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+def _wait_for_job(client: httpx.Client, job_id: str, timeout: float = 300) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.1)
+    raise TimeoutError(f"Job {job_id} não terminou em {timeout}s.")
+
+
+def _payloads(batch_rows: int, train_rows: int, seed: int) -> dict:
+    # Todas as requisições usam datasets com as mesmas colunas, gerados pelo gerador sintético.
+    columns = {"numeric": 8, "categorical": 2, "cardinality": 20, "missing_rate": 0.01}
+    train = SyntheticDataset(rows=train_rows, seed=seed, **columns).to_frame()
+    features = SyntheticDataset(rows=max(batch_rows, 1), seed=seed + 1, **columns).to_frame(include_target=False)
+    record = json.loads(features.head(1).to_json(orient="records"))
+    return {
+        "train_csv": train.to_csv(index=False).encode(),
+        "batch_csv": features.head(batch_rows).to_csv(index=False).encode(),
+        "record": {"records": record},
+    }
+
+
+async def _drive(
+    api_url: str,
+    plan: List[tuple],
+    payloads: dict,
+    train_params: dict,
+    timeout: float,
+    max_in_flight: int
+) -> tuple:
+    samples = {kind: [] for kind in REQUEST_KINDS}
+    dropped = {kind: 0 for kind in REQUEST_KINDS}
+    job_ids = []
+    in_flight = 0
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+
+    async with httpx.AsyncClient(base_url=api_url, timeout=timeout, limits=limits) as client:
+        async def send(kind: str, scheduled: float):
+            nonlocal in_flight
+            try:
+                if kind == "batch":
+                    request = client.post(
+                        "/predict", files={"input_file": ("input.csv", payloads["batch_csv"], "text/csv")}
+                    )
+                elif kind == "record":
+                    request = client.post("/predict/records", json=payloads["record"])
+                else:
+                    request = client.post(
+                        "/train", files={"dataset_file": ("train.csv", payloads["train_csv"], "text/csv")},
+                        data=train_params
+                    )
+                response = await request
+                status = response.status_code
+                if kind == "train" and status == 202:
+                    job_ids.append(response.json()["job_id"])
+            except httpx.HTTPError:
+                status = 0
+            finally:
+                in_flight -= 1
+            samples[kind].append((status, time.perf_counter() - scheduled))
+
+        tasks = []
+        started = time.perf_counter()
+        for offset, kind in plan:
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if in_flight >= max_in_flight:
+                # Malha aberta: a requisição não é adiada; acima do limite ela é descartada e contada.
+                dropped[kind] += 1
+                continue
+            in_flight += 1
+            tasks.append(asyncio.ensure_future(send(kind, started + offset)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return samples, dropped, job_ids, elapsed
+
+
+def run_load_test(
+    rps: float,
+    duration: float,
+    mix: Dict[str, float],
+    batch_rows: int = 100,
+    train_rows: int = 2000,
+    model_type: str = "RandomForestClassifier",
+    model_params: str = '{"n_estimators": 20}',
+    timeout: float = 60.0,
+    max_in_flight: int = 256,
+    seed: int = 0,
+    env: Optional[dict] = None
+) -> dict:
+    payloads = _payloads(batch_rows, train_rows, seed)
+    train_params = {"model_type": model_type, "model_params": model_params, "target_column": "target"}
+    plan = schedule(rps, duration, mix, seed)
+
+    with tempfile.TemporaryDirectory() as shared_dir, run_stack(shared_dir, env) as (urls, pids):
+        with httpx.Client(base_url=urls["api"], timeout=timeout) as client:
+            # Modelo inicial, promovido, para que as predições tenham o que servir.
+            response = client.post(
+                "/train", files={"dataset_file": ("train.csv", payloads["train_csv"], "text/csv")}, data=train_params
+            )
+            response.raise_for_status()
+            job = _wait_for_job(client, response.json()["job_id"])
+            if job["status"] != "succeeded":
+                raise RuntimeError(f"Treinamento do modelo inicial falhou: {job.get('error')}")
+
+            sampler = ResourceSampler(pids)
+            sampler.start()
+            samples, dropped, job_ids, elapsed = asyncio.run(
+                _drive(urls["api"], plan, payloads, train_params, timeout, max_in_flight)
+            )
+            services = sampler.stop()
+
+            train_jobs = {}
+            for job_id in job_ids:
+                status = client.get(f"/jobs/{job_id}").json().get("status", "unknown")
+                train_jobs[status] = train_jobs.get(status, 0) + 1
+
+    all_samples = [sample for kind in REQUEST_KINDS for sample in samples[kind]]
+    return {
+        "config": {
+            "target_rps": rps,
+            "duration_s": duration,
+            "mix": mix,
+            "batch_rows": batch_rows,
+            "train_rows": train_rows,
+            "model_type": model_type,
+            "model_params": json.loads(model_params),
+            "max_in_flight": max_in_flight,
+            "seed": seed,
+            "cpus": os.cpu_count(),
+        },
+        "elapsed_s": round(elapsed, 2),
+        "scheduled": len(plan),
+        "dropped": sum(dropped.values()),
+        "total": summarize(all_samples, elapsed),
+        "requests": {
+            kind: {**summarize(samples[kind], elapsed), "dropped": dropped[kind]} for kind in mix
+        },
+        "train_jobs": train_jobs,
+        "services": services,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=20.0, help="Taxa alvo de requisições por segundo (total).")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Pesos dos tipos de requisição: batch, record e train.")
+    parser.add_argument("--batch-rows", type=int, default=100, help="Linhas do CSV de cada predição em lote.")
+    parser.add_argument("--train-rows", type=int, default=2000, help="Linhas do CSV de cada treinamento.")
+    parser.add_argument("--model-type", default="RandomForestClassifier")
+    parser.add_argument("--model-params", default='{"n_estimators": 20}')
+    parser.add_argument("--timeout", type=float, default=60.0, help="Timeout de cada requisição, em segundos.")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Requisições simultâneas acima das quais novas chegadas são descartadas.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--env", action="append", default=[], metavar="NOME=VALOR", help="Variável de ambiente extra para os serviços (repetível).")
+    parser.add_argument("--output", help="Arquivo JSON onde o relatório é gravado (opcional).")
+    args = parser.parse_args()
+
+    env = dict(item.split("=", 1) for item in args.env)
+    report = run_load_test(
+        args.rps, args.duration, parse_mix(args.mix), args.batch_rows, args.train_rows, args.model_type,
+        args.model_params, args.timeout, args.max_in_flight, args.seed, env
+    )
+    print(f"CPUs disponíveis: {os.cpu_count()} | agendadas: {report['scheduled']} | descartadas: {report['dropped']}")
+    for kind, entry in [*report["requests"].items(), ("total", report["total"])]:
+        print(
+            f"{kind:<7} req={entry['requests']:<6} ok/s={entry['throughput_rps']:>8} erros={entry['error_rate']:.2%} "
+            f"p50={entry['p50_ms']}ms p95={entry['p95_ms']}ms p99={entry['p99_ms']}ms"
+        )
+    for name, entry in report["services"].items():
+        print(f"{name:<7} cpu={entry['cpu_percent']}% rss_pico={entry['peak_rss_mb']} MB processos={entry['processes']}")
+    if report["train_jobs"]:
+        print(f"jobs de treinamento: {report['train_jobs']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
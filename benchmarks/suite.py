@@ -0,0 +1,385 @@
+"""
+Suíte de benchmarks do Trainer e dos caminhos quentes de treino e predição, sem rede.
+
+Para cada modelo do MODEL_FACTORY, formato de dataset gerado (estreito, largo, categórico) e
+tamanho, mede tempo, vazão (linhas/s) e pico de RSS das etapas `_preprocess_train`, `train`,
+`load_model`, `_preprocess_predict`, `predict` e dos endpoints `/train` e `/predict` chamados
+pelo TestClient do FastAPI. Cada caso roda em um subprocesso próprio, para que o pico de RSS
+de um caso não contamine o seguinte.
+
+O relatório é gravado em JSON e pode servir de linha de base: com `--baseline`, a suíte
+termina com código 1 se alguma etapa ficar mais lenta (ou usar mais memória) do que a linha
+de base além do limite `--threshold`.
+
+Uso:
+    python -m benchmarks.suite --profile quick --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --profile quick --baseline benchmarks/baseline.json --threshold 0.25
+    python -m benchmarks.suite --rows 1000 1000000 --shapes narrow --models LogisticRegression
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import warnings
+import subprocess
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# (colunas numéricas, colunas categóricas) de cada formato de dataset.
+SHAPES = {
+    "narrow": (8, 0),
+    "wide": (200, 0),
+    "categorical": (4, 4),
+}
+CATEGORY_CARDINALITY = 50
+
+PROFILES = {
+    "quick": {"rows": [1_000, 10_000], "shapes": list(SHAPES)},
+    "full": {"rows": [1_000, 100_000, 1_000_000, 10_000_000], "shapes": list(SHAPES)},
+}
+
+# Parâmetros fixos por modelo, para que os tempos sejam comparáveis entre execuções.
+MODEL_PARAMS = {
+    "RandomForestClassifier": {"n_estimators": 20, "random_state": 0},
+    "RandomForestRegressor": {"n_estimators": 20, "random_state": 0},
+    "LogisticRegression": {"max_iter": 200},
+    "SGDClassifier": {"random_state": 0},
+    "SGDRegressor": {"random_state": 0},
+    "PassiveAggressiveClassifier": {"random_state": 0},
+}
+
+PREDICT_ROWS = 10_000
+# Ruído abaixo destes valores não conta como regressão.
+MIN_SECONDS_DELTA = 0.01
+MIN_RSS_MB_DELTA = 20.0
+
+
+def generate_dataset(shape: str, rows: int, classification: bool, seed: int = 0) -> pd.DataFrame:
+    """
+    Gera um dataset determinístico com o formato pedido e uma coluna `target`.
+    As colunas categóricas têm 1% de valores ausentes, como costuma acontecer em CSVs reais.
+    """
+    numeric, categorical = SHAPES[shape]
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(
+        rng.standard_normal((rows, numeric)),
+        columns=[f"num_{i}" for i in range(numeric)]
+    )
+    vocabulary = np.array([f"cat_{i}" for i in range(CATEGORY_CARDINALITY)], dtype=object)
+    for i in range(categorical):
+        values = vocabulary[rng.integers(0, CATEGORY_CARDINALITY, rows)]
+        values[rng.random(rows) < 0.01] = None
+        data[f"cat_{i}"] = values
+
+    signal = data["num_0"].to_numpy() + 0.5 * data[f"num_{numeric - 1}"].to_numpy()
+    if classification:
+        data["target"] = (signal > 0).astype(np.int64)
+    else:
+        data["target"] = signal + 0.1 * rng.standard_normal(rows)
+    return data
+
+
+def _reset_peak_rss():
+    # No Linux, escrever "5" em clear_refs zera o pico de RSS (VmHWM) do processo.
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(fn: Callable, rows: Optional[int], repeat: int = 1) -> dict:
+    """
+    Executa `fn` `repeat` vezes e guarda o menor tempo; o pico de RSS cobre todas as execuções.
+    """
+    _reset_peak_rss()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "seconds": best,
+        "rows_per_second": rows / best if rows and best else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _wait_for_job(job_manager, job_id: str, timeout: float = 3600) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = job_manager.get(job_id)
+        if job.status not in ("queued", "running"):
+            if job.status != "succeeded":
+                raise RuntimeError(f"Job de treinamento {job_id} terminou com status {job.status}: {job.error}")
+            return job.to_dict()
+        time.sleep(0.005)
+    raise TimeoutError(f"Job de treinamento {job_id} não terminou em {timeout}s.")
+
+
+def run_case(model_name: str, shape: str, rows: int, repeat: int = 3, api: bool = True) -> dict:
+    """
+    Mede todas as etapas de um caso no processo atual e retorna {etapa: medidas}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from fastapi.testclient import TestClient
+    from sklearn.base import is_classifier
+
+    import predict_service.main as predict_main
+    import trainer_service.main as trainer_main
+    from dataset_manager.dataset_cache import DatasetCache
+    from predict_service.model_store import ModelStore
+    from trainer_service.jobs import JobManager
+    from training_pipeline.registry import DEFAULT_MODEL_NAME, ModelRegistry
+    from training_pipeline.trainer import Trainer
+
+    warnings.filterwarnings("ignore")
+    model_class = trainer_main.MODEL_FACTORY[model_name]
+    model_params = MODEL_PARAMS.get(model_name, {})
+    data = generate_dataset(shape, rows, classification=is_classifier(model_class()))
+    predict_data = data.drop(columns=["target"]).head(PREDICT_ROWS)
+    predict_rows = len(predict_data)
+
+    stages = {}
+    with tempfile.TemporaryDirectory() as root:
+        model_dir = os.path.join(root, "trainer")
+        trainer = Trainer(model_dir=model_dir, model_class=model_class, model_params=model_params)
+        stages["preprocess_train"] = _measure(
+            lambda: trainer._preprocess_train(data, target_column="target"), rows
+        )
+        stages["train"] = _measure(lambda: trainer.train(data, target_column="target"), rows)
+
+        loaded = Trainer(model_dir=model_dir, model_class=model_class)
+        stages["load_model"] = _measure(loaded.load_model, None, repeat)
+        stages["preprocess_predict"] = _measure(
+            lambda: loaded._preprocess_predict(predict_data), predict_rows, repeat
+        )
+        stages["predict"] = _measure(lambda: loaded.predict(predict_data), predict_rows, repeat)
+
+        if api:
+            registry_root = os.path.join(root, "models")
+            registry = ModelRegistry(registry_root)
+            job_manager = JobManager(max_workers=1, executor=ThreadPoolExecutor(max_workers=1))
+            trainer_main.MODEL_DIR = registry_root
+            trainer_main.registry = registry
+            trainer_main.dataset_cache = DatasetCache(os.path.join(root, "datasets"))
+            trainer_main.job_manager = job_manager
+            predict_main.model_store = ModelStore(registry, mmap_mode=predict_main.MODEL_MMAP_MODE)
+
+            train_csv = data.to_csv(index=False).encode()
+            predict_csv = predict_data.to_csv(index=False).encode()
+            trainer_client = TestClient(trainer_main.app)
+            predict_client = TestClient(predict_main.app)
+
+            def api_train():
+                response = trainer_client.post(
+                    "/train",
+                    files={"dataset_file": ("train.csv", io.BytesIO(train_csv), "text/csv")},
+                    data={
+                        "model_type": model_name,
+                        "model_params": json.dumps(model_params),
+                        "target_column": "target",
+                        "model_name": DEFAULT_MODEL_NAME,
+                    },
+                )
+                response.raise_for_status()
+                _wait_for_job(job_manager, response.json()["job_id"])
+
+            def api_predict():
+                response = predict_client.post(
+                    "/predict",
+                    files={"input_file": ("input.csv", io.BytesIO(predict_csv), "text/csv")},
+                )
+                response.raise_for_status()
+
+            try:
+                stages["api_train"] = _measure(api_train, rows)
+                stages["api_predict"] = _measure(api_predict, predict_rows, repeat)
+            finally:
+                job_manager.shutdown()
+
+    return stages
+
+
+def case_id(model_name: str, shape: str, rows: int) -> str:
+    return f"{model_name}/{shape}/{rows}"
+
+
+def _run_case_subprocess(case: dict, timeout: Optional[float]) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--run-case", json.dumps(case)],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "falha sem saída")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_suite(
+    models: List[str],
+    shapes: List[str],
+    rows: List[int],
+    repeat: int = 3,
+    api_max_rows: int = 1_000_000,
+    max_cells: int = 200_000_000,
+    timeout: Optional[float] = None
+) -> dict:
+    cases = {}
+    skipped = {}
+    for model_name in models:
+        for shape in shapes:
+            for n_rows in rows:
+                key = case_id(model_name, shape, n_rows)
+                if n_rows * sum(SHAPES[shape]) > max_cells:
+                    skipped[key] = f"mais de {max_cells} células"
+                    continue
+                case = {
+                    "model_name": model_name,
+                    "shape": shape,
+                    "rows": n_rows,
+                    "repeat": repeat,
+                    "api": n_rows <= api_max_rows,
+                }
+                print(f"{key} ...", file=sys.stderr, flush=True)
+                try:
+                    stages = _run_case_subprocess(case, timeout)
+                except (RuntimeError, subprocess.TimeoutExpired) as e:
+                    skipped[key] = f"erro: {e}"
+                    continue
+                cases[key] = {"model": model_name, "shape": shape, "rows": n_rows, "stages": stages}
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "created_at": time.time(),
+        },
+        "cases": cases,
+        "skipped": skipped,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.25) -> List[dict]:
+    """
+    Lista as etapas em que o tempo ou o pico de RSS passaram da linha de base por mais de
+    `threshold` (fração). Casos ou etapas ausentes em um dos relatórios são ignorados.
+    """
+    regressions = []
+    for key, case in current["cases"].items():
+        base_case = baseline.get("cases", {}).get(key)
+        if base_case is None:
+            continue
+        for stage, measured in case["stages"].items():
+            base = base_case["stages"].get(stage)
+            if base is None:
+                continue
+            for metric, min_delta in (("seconds", MIN_SECONDS_DELTA), ("peak_rss_mb", MIN_RSS_MB_DELTA)):
+                value, reference = measured.get(metric), base.get(metric)
+                if value is None or not reference:
+                    continue
+                if value > reference * (1 + threshold) and value - reference > min_delta:
+                    regressions.append({
+                        "case": key,
+                        "stage": stage,
+                        "metric": metric,
+                        "baseline": reference,
+                        "current": value,
+                        "change": value / reference - 1,
+                    })
+    return regressions
+
+
+def _print_report(report: dict):
+    for key, case in report["cases"].items():
+        for stage, measured in case["stages"].items():
+            throughput = measured["rows_per_second"]
+            print(
+                f"{key:<48} {stage:<20} {measured['seconds']:>10.4f}s "
+                f"{throughput or 0:>14,.0f} linhas/s pico={measured['peak_rss_mb']:>8} MB"
+            )
+    for key, reason in report["skipped"].items():
+        print(f"{key:<48} ignorado ({reason})")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=list(PROFILES), default="quick")
+    parser.add_argument("--rows", type=int, nargs="+", help="Tamanhos de dataset (substitui os do perfil).")
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), help="Formatos de dataset (substitui os do perfil).")
+    parser.add_argument("--models", nargs="+", help="Modelos do MODEL_FACTORY (padrão: todos).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições das etapas de predição (vale o menor tempo).")
+    parser.add_argument("--api-max-rows", type=int, default=1_000_000, help="Acima disso os endpoints não são medidos.")
+    parser.add_argument("--max-cells", type=int, default=200_000_000, help="Casos com mais células são ignorados.")
+    parser.add_argument("--timeout", type=float, help="Tempo máximo de cada caso, em segundos.")
+    parser.add_argument("--output", help="Arquivo JSON onde o relatório é gravado.")
+    parser.add_argument("--save-baseline", help="Grava o relatório como nova linha de base.")
+    parser.add_argument("--baseline", help="Linha de base para comparação.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Piora relativa tolerada (0.25 = 25%%).")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        case = json.loads(args.run_case)
+        print(json.dumps(run_case(**case)))
+        return 0
+
+    if args.models:
+        models = args.models
+    else:
+        from trainer_service.main import MODEL_FACTORY
+        models = list(MODEL_FACTORY)
+    profile = PROFILES[args.profile]
+    report = run_suite(
+        models,
+        args.shapes or profile["shapes"],
+        args.rows or profile["rows"],
+        repeat=args.repeat,
+        api_max_rows=args.api_max_rows,
+        max_cells=args.max_cells,
+        timeout=args.timeout,
+    )
+    _print_report(report)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(
+                f"REGRESSÃO {regression['case']} {regression['stage']} {regression['metric']}: "
+                f"{regression['baseline']:.4f} -> {regression['current']:.4f} ({regression['change']:+.0%})"
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+from typing import BinaryIO, Optional
+
+# Assinaturas (magic bytes) dos formatos de compressão aceitos nos uploads de CSV, no nome
+# usado pelo argumento `compression` do pandas.
+_MAGIC_NUMBERS = {
+    "gzip": b"\x1f\x8b",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+
+def csv_compression(file: BinaryIO) -> Optional[str]:
+    """
+    Identifica pelos primeiros bytes se o arquivo está comprimido com gzip ou zstd e volta o
+    cursor para o início. O resultado vai para `pd.read_csv(file, compression=...)`, que
+    descomprime enquanto lê: o CSV descomprimido nunca fica inteiro em memória.
+    """
+    file.seek(0)
+    header = file.read(4)
+    file.seek(0)
+    for method, magic in _MAGIC_NUMBERS.items():
+        if header.startswith(magic):
+            return method
+    return None
@@ -0,0 +1,345 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset_manager.compression import csv_compression
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+META_FILE = "meta.json"
+# Prefixo dos diretórios em montagem; só viram entradas do cache ao serem renomeados para o hash.
+TMP_PREFIX = ".dataset-"
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file: BinaryIO) -> str:
+    """
+    Calcula o SHA-256 do conteúdo do arquivo em blocos e volta o cursor para o início.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(_HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def is_valid_hash(value: str) -> bool:
+    return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+
+class DatasetCache:
+    """
+    Cache de datasets endereçado pelo conteúdo do arquivo enviado.
+
+    Cada dataset é gravado uma única vez em `<cache_dir>/<sha256>/`, com um `.npy` por coluna
+    e os tipos inferidos pelo pandas no `meta.json`. Colunas de texto são guardadas como
+    códigos inteiros mais a lista de categorias, então nenhuma leitura posterior precisa
+    reinterpretar texto. O diretório é montado em um temporário e renomeado, de modo que
+    leitores nunca enxergam uma entrada incompleta. Quando o tamanho total passa de
+    `max_bytes`, as entradas acessadas há mais tempo são removidas.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 10 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_dir(self, digest: str) -> str:
+        if not is_valid_hash(digest):
+            raise ValueError(f"Hash de dataset inválido: '{digest}'.")
+        return os.path.join(self.cache_dir, digest)
+
+    def contains(self, digest: str) -> bool:
+        return os.path.exists(os.path.join(self._entry_dir(digest), META_FILE))
+
+    def read_meta(self, digest: str) -> dict:
+        """
+        Retorna os metadados (linhas, colunas e tipos) do dataset. Lança KeyError se não estiver em cache.
+        """
+        try:
+            with open(os.path.join(self._entry_dir(digest), META_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(digest)
+
+    @staticmethod
+    def _restore(values: np.ndarray, column: dict):
+        if column["categories"] is not None:
+            return pd.Categorical.from_codes(values, column["categories"]).astype(object)
+        return values
+
+    def load(self, digest: str) -> pd.DataFrame:
+        """
+        Lê o dataset do cache. Lança KeyError se o hash não estiver em cache.
+        """
+        entry_dir = self._entry_dir(digest)
+        meta = self.read_meta(digest)
+        try:
+            columns = {
+                column["name"]: self._restore(np.load(os.path.join(entry_dir, f"{i}.npy"), allow_pickle=False), column)
+                for i, column in enumerate(meta["columns"])
+            }
+            # Marca o acesso para a política LRU.
+            os.utime(os.path.join(entry_dir, META_FILE))
+        except FileNotFoundError:
+            raise KeyError(digest)
+        with self._lock:
+            self.hits += 1
+        return pd.DataFrame(columns, columns=[column["name"] for column in meta["columns"]])
+
+    def iter_chunks(self, digest: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Percorre o dataset em blocos de `chunk_size` linhas. As colunas são mapeadas com
+        mmap, então só o bloco corrente é materializado em memória.
+        """
+        entry_dir = self._entry_dir(digest)
+        meta = self.read_meta(digest)
+        try:
+            arrays = [
+                np.load(os.path.join(entry_dir, f"{i}.npy"), mmap_mode="r", allow_pickle=False)
+                for i in range(len(meta["columns"]))
+            ]
+            os.utime(os.path.join(entry_dir, META_FILE))
+        except FileNotFoundError:
+            raise KeyError(digest)
+        names = [column["name"] for column in meta["columns"]]
+        for start in range(0, meta["rows"], chunk_size):
+            yield pd.DataFrame(
+                {
+                    column["name"]: self._restore(np.array(array[start:start + chunk_size]), column)
+                    for column, array in zip(meta["columns"], arrays)
+                },
+                columns=names,
+                index=pd.RangeIndex(start, min(start + chunk_size, meta["rows"]))
+            )
+
+    def _write_entry(self, digest: str, write_columns: Callable[[str], Tuple[int, list]]):
+        """
+        Monta a entrada em um diretório temporário com `write_columns(tmp_dir)`, que grava os
+        `.npy` e retorna (linhas, colunas), e a publica com um rename atômico.
+        """
+        entry_dir = self._entry_dir(digest)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=TMP_PREFIX)
+        try:
+            rows, columns = write_columns(tmp_dir)
+            with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+                json.dump({
+                    "format_version": CACHE_FORMAT_VERSION,
+                    "rows": rows,
+                    "columns": columns,
+                    "created_at": time.time(),
+                }, f)
+            os.chmod(tmp_dir, 0o755)
+            try:
+                os.rename(tmp_dir, entry_dir)
+            except OSError:
+                # Outro processo pode ter gravado o mesmo dataset ao mesmo tempo.
+                if not os.path.exists(entry_dir):
+                    raise
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self._evict(keep=digest)
+
+    @staticmethod
+    def _write_frame(tmp_dir: str, data: pd.DataFrame) -> Tuple[int, list]:
+        columns = []
+        for i, (name, values) in enumerate(data.items()):
+            categories = None
+            if values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype):
+                categorical = pd.Categorical(values)
+                categories = categorical.categories.tolist()
+                array = categorical.codes
+            else:
+                array = values.to_numpy()
+            np.save(os.path.join(tmp_dir, f"{i}.npy"), array, allow_pickle=False)
+            columns.append({"name": name, "dtype": str(values.dtype), "categories": categories})
+        return len(data), columns
+
+    @staticmethod
+    def _write_csv_chunks(tmp_dir: str, file: BinaryIO, chunk_size: int) -> Tuple[int, list]:
+        compression = csv_compression(file)
+
+        def read_chunks(dtype: Optional[dict]) -> Iterable[pd.DataFrame]:
+            file.seek(0)
+            return pd.read_csv(file, chunksize=chunk_size, dtype=dtype, compression=compression)
+
+        return DatasetCache._write_chunks(tmp_dir, read_chunks)
+
+    @staticmethod
+    def _write_chunks(tmp_dir: str, read_chunks: Callable[[Optional[dict]], Iterable[pd.DataFrame]]) -> Tuple[int, list]:
+        """
+        Converte o dataset para o formato colunar em duas passadas, com memória limitada ao bloco:
+        a primeira conta as linhas e unifica os tipos inferidos em cada bloco; a segunda grava
+        cada bloco direto nos `.npy` pré-alocados. `read_chunks(dtype)` percorre os blocos do
+        início a cada chamada; na segunda, `dtype` indica as colunas que devem ser lidas como texto.
+        """
+        rows = 0
+        dtypes = {}
+        for chunk in read_chunks(None):
+            rows += len(chunk)
+            for name, values in chunk.items():
+                previous = dtypes.get(name)
+                if values.dtype == object or previous == object:
+                    dtypes[name] = np.dtype(object)
+                else:
+                    dtypes[name] = values.dtype if previous is None else np.result_type(previous, values.dtype)
+
+        names = list(dtypes)
+        object_columns = [name for name in names if dtypes[name] == object]
+        vocabularies = {name: {} for name in object_columns}
+        arrays = [
+            np.lib.format.open_memmap(
+                os.path.join(tmp_dir, f"{i}.npy"),
+                mode="w+",
+                dtype=np.int32 if name in vocabularies else dtypes[name],
+                shape=(rows,)
+            )
+            for i, name in enumerate(names)
+        ]
+
+        offset = 0
+        # Colunas de texto são lidas como texto em todos os blocos, como numa leitura única do arquivo.
+        dtype = {name: object for name in object_columns}
+        for chunk in read_chunks(dtype):
+            end = offset + len(chunk)
+            for name, array in zip(names, arrays):
+                values = chunk[name]
+                if name in vocabularies:
+                    vocabulary = vocabularies[name]
+                    for value in values.dropna().unique():
+                        vocabulary.setdefault(value, len(vocabulary))
+                    array[offset:end] = values.map(vocabulary).fillna(-1).to_numpy(dtype=np.int32)
+                else:
+                    array[offset:end] = values.to_numpy(dtype=dtypes[name])
+            offset = end
+
+        for array in arrays:
+            array.flush()
+        columns = [
+            {
+                "name": name,
+                "dtype": str(dtypes[name]),
+                "categories": list(vocabularies[name]) if name in vocabularies else None,
+            }
+            for name in names
+        ]
+        return rows, columns
+
+    def store(self, digest: str, data: pd.DataFrame):
+        """
+        Grava o dataset no cache. Falhas de disco não interrompem o chamador, apenas são registradas.
+        """
+        if self.contains(digest):
+            return
+        try:
+            self._write_entry(digest, lambda tmp_dir: self._write_frame(tmp_dir, data))
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o dataset {digest} em cache: {e}")
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Dataset {digest} não pode ser gravado em formato colunar: {e}")
+
+    def store_csv(self, file: BinaryIO, chunk_size: int = 100_000) -> str:
+        """
+        Grava o CSV no cache sem carregá-lo inteiro em memória e retorna o hash do conteúdo.
+        Usado pelo treinamento incremental, que depois lê o dataset com iter_chunks.
+        """
+        digest = hash_file(file)
+        if self.contains(digest):
+            with self._lock:
+                self.hits += 1
+            return digest
+        with self._lock:
+            self.misses += 1
+        self._write_entry(digest, lambda tmp_dir: self._write_csv_chunks(tmp_dir, file, chunk_size))
+        return digest
+
+    def store_chunks(self, digest: str, read_chunks: Callable[[Optional[dict]], Iterable[pd.DataFrame]]) -> str:
+        """
+        Grava sob `digest` um dataset produzido em blocos por `read_chunks(dtype)`, que é
+        chamado duas vezes e deve gerar os mesmos blocos em ambas (ver _write_chunks).
+        Usado pelos datasets sintéticos, que não passam por um arquivo CSV.
+        """
+        if self.contains(digest):
+            with self._lock:
+                self.hits += 1
+            return digest
+        with self._lock:
+            self.misses += 1
+        self._write_entry(digest, lambda tmp_dir: self._write_chunks(tmp_dir, read_chunks))
+        return digest
+
+    def load_csv(self, file: BinaryIO) -> Tuple[str, pd.DataFrame]:
+        """
+        Retorna o hash do arquivo e o DataFrame, lendo do cache quando o mesmo conteúdo
+        já foi enviado antes e interpretando o CSV (e gravando-o) apenas na primeira vez.
+        """
+        digest = hash_file(file)
+        try:
+            return digest, self.load(digest)
+        except KeyError:
+            pass
+        with self._lock:
+            self.misses += 1
+        data = pd.read_csv(file, compression=csv_compression(file))
+        self.store(digest, data)
+        return digest, data
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for name in os.listdir(self.cache_dir):
+            # Um diretório temporário já pode ter o meta.json enquanto outro escritor ainda o publica.
+            if name.startswith(TMP_PREFIX) or not is_valid_hash(name):
+                continue
+            entry_dir = os.path.join(self.cache_dir, name)
+            try:
+                last_access = os.stat(os.path.join(entry_dir, META_FILE)).st_mtime
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+            except FileNotFoundError:
+                continue
+            entries.append((last_access, name, size))
+        return sorted(entries)
+
+    def _evict(self, keep: Optional[str] = None):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, _, size in entries)
+            for _, name, size in entries:
+                if total <= self.max_bytes:
+                    return
+                if name == keep:
+                    continue
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+                total -= size
+                self.evictions += 1
+                logger.info(f"Dataset {name} removido do cache (orçamento de {self.max_bytes} bytes).")
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "cache_dir": self.cache_dir,
+            "max_bytes": self.max_bytes,
+            "cached_bytes": sum(size for _, _, size in entries),
+            "datasets": len(entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
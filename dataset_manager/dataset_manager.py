@@ -1,29 +1,83 @@
 import pandas as pd
+from typing import Iterator, Optional
+from .compression import csv_compression
+from .dataset_cache import DatasetCache
 from .default_datasets import load_iris_dataset
 from .local_datasets import load_local_csv, load_local_excel
+from .synthetic_datasets import SYNTHETIC_DATASETS, SyntheticDataset
 
 class DatasetManager:
-    def __init__(self, default_dataset="iris"):
+    def __init__(self, default_dataset="iris", cache: Optional[DatasetCache] = None, dataset_params: Optional[dict] = None):
         self.default_dataset = default_dataset
+        self.cache = cache
+        # Parâmetros dos datasets sintéticos (rows, numeric, categorical, cardinality, missing_rate, seed...).
+        self.dataset_params = dataset_params or {}
+
+    def synthetic_dataset(self) -> SyntheticDataset:
+        """
+        Gerador do dataset sintético definido em self.default_dataset, com self.dataset_params.
+        """
+        if self.default_dataset not in SYNTHETIC_DATASETS:
+            raise ValueError(f"Dataset default '{self.default_dataset}' não é sintético.")
+        return SyntheticDataset(task=SYNTHETIC_DATASETS[self.default_dataset], **self.dataset_params)
 
     def load_default_dataset(self):
         """
         Carrega o dataset padrão definido em self.default_dataset.
-        Atualmente suporta apenas 'iris'.
+        Suporta 'iris' e os datasets sintéticos ('synthetic_classification' e 'synthetic_regression').
         """
         if self.default_dataset == "iris":
             return load_iris_dataset()
+        elif self.default_dataset in SYNTHETIC_DATASETS:
+            return self.synthetic_dataset().to_frame()
         else:
             raise ValueError(f"Dataset default '{self.default_dataset}' não suportado.")
 
+    def iter_default_dataset(self, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        """
+        Percorre o dataset padrão em blocos de até `chunk_size` linhas. Os datasets sintéticos
+        são gerados bloco a bloco, sem nunca ficarem inteiros em memória.
+        """
+        if self.default_dataset in SYNTHETIC_DATASETS:
+            yield from self.synthetic_dataset().iter_chunks(chunk_size)
+            return
+        data = self.load_default_dataset()
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size]
+
+    def cache_default_dataset(self, chunk_size: int = 100_000) -> str:
+        """
+        Grava o dataset padrão no DatasetCache, bloco a bloco, e retorna o hash usado como chave.
+        Com esse hash, o treinamento incremental percorre o dataset com DatasetCache.iter_chunks.
+        """
+        if self.cache is None:
+            raise ValueError("O DatasetManager não tem um DatasetCache configurado.")
+        if self.default_dataset in SYNTHETIC_DATASETS:
+            dataset = self.synthetic_dataset()
+            return self.cache.store_chunks(dataset.digest(), lambda dtype: dataset.iter_chunks(chunk_size))
+        raise ValueError(f"Dataset default '{self.default_dataset}' não pode ser gravado em cache.")
+
     def load_local_dataset(self, file, file_type="csv"):
         """
         Carrega um dataset local a partir de um arquivo (objeto file).
-        Suporta arquivos CSV ou Excel.
+        Suporta arquivos CSV ou Excel. Com um DatasetCache, um CSV já enviado antes
+        é lido do cache colunar em vez de ser interpretado novamente. CSVs comprimidos
+        com gzip ou zstd são descomprimidos durante a leitura.
         """
         if file_type == "csv":
-            return pd.read_csv(file)
+            if self.cache is not None:
+                return self.cache.load_csv(file)[1]
+            return pd.read_csv(file, compression=csv_compression(file))
         elif file_type in ["xls", "xlsx"]:
             return pd.read_excel(file)
         else:
             raise ValueError(f"Tipo de arquivo '{file_type}' não suportado.")
+
+    def load_cached_dataset(self, dataset_hash: str) -> pd.DataFrame:
+        """
+        Carrega um dataset enviado anteriormente a partir do hash do seu conteúdo.
+        Lança KeyError se o hash não estiver em cache e ValueError se for inválido.
+        """
+        if self.cache is None:
+            raise KeyError(dataset_hash)
+        return self.cache.load(dataset_hash)
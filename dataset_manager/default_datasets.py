@@ -1,11 +1,17 @@
+from functools import lru_cache
 from sklearn.datasets import load_iris
 import pandas as pd
 
-def load_iris_dataset():
-    """
-    Carrega e retorna o dataset Iris como um DataFrame do pandas.
-    """
+@lru_cache(maxsize=1)
+def _iris_frame():
     iris = load_iris()
     df = pd.DataFrame(data=iris.data, columns=iris.feature_names)
     df["target"] = iris.target
     return df
+
+def load_iris_dataset():
+    """
+    Carrega e retorna o dataset Iris como um DataFrame do pandas.
+    O DataFrame é montado uma vez por processo; cada chamada recebe uma cópia.
+    """
+    return _iris_frame().copy()
@@ -0,0 +1,182 @@
+import json
+import hashlib
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+TASKS = ("classification", "regression")
+# Datasets sintéticos registrados como datasets padrão do DatasetManager, com a tarefa de cada um.
+SYNTHETIC_DATASETS = {
+    "synthetic_classification": "classification",
+    "synthetic_regression": "regression",
+}
+# As linhas são geradas em blocos deste tamanho, cada um com a sua semente: o conteúdo não
+# depende do tamanho de bloco pedido pelo leitor, e qualquer bloco pode ser gerado isoladamente.
+BLOCK_ROWS = 65_536
+
+
+class SyntheticDataset:
+    """
+    Dataset sintético determinístico, gerado sob demanda em blocos.
+
+    Tem `numeric` colunas numéricas (`num_i`, normais padrão), `categorical` colunas de texto
+    (`cat_i`, com `cardinality` categorias) e a coluna `target`. O alvo é uma combinação linear
+    das colunas numéricas somada a um efeito por categoria, com ruído: na classificação, a classe
+    com maior pontuação entre `n_classes`; na regressão, a própria pontuação. Uma fração
+    `missing_rate` dos valores das features fica ausente (depois de calculado o alvo).
+
+    A mesma configuração gera sempre os mesmos dados, e nada além de um bloco fica em memória,
+    então datasets de centenas de milhões de linhas podem ser percorridos com iter_chunks ou
+    gravados em CSV com to_csv.
+    """
+
+    def __init__(
+        self,
+        task: str = "classification",
+        rows: int = 100_000,
+        numeric: int = 8,
+        categorical: int = 2,
+        cardinality: int = 50,
+        missing_rate: float = 0.01,
+        n_classes: int = 2,
+        noise: float = 0.5,
+        seed: int = 0
+    ):
+        if task not in TASKS:
+            raise ValueError(f"Tarefa '{task}' não suportada. Use {list(TASKS)}.")
+        if rows < 0 or numeric < 0 or categorical < 0 or numeric + categorical == 0:
+            raise ValueError("rows, numeric e categorical devem ser não negativos, com ao menos uma feature.")
+        if categorical and cardinality < 1:
+            raise ValueError("cardinality deve ser maior que zero.")
+        if not 0 <= missing_rate < 1:
+            raise ValueError("missing_rate deve estar em [0, 1).")
+        if task == "classification" and n_classes < 2:
+            raise ValueError("n_classes deve ser pelo menos 2.")
+        self.task = task
+        self.rows = rows
+        self.numeric = numeric
+        self.categorical = categorical
+        self.cardinality = cardinality
+        self.missing_rate = missing_rate
+        self.n_classes = n_classes if task == "classification" else 1
+        self.noise = noise
+        self.seed = seed
+
+        # Coeficientes comuns a todos os blocos.
+        rng = np.random.default_rng(np.random.SeedSequence([seed, 0]))
+        self._weights = rng.standard_normal((numeric, self.n_classes))
+        self._effects = rng.standard_normal((categorical, cardinality, self.n_classes))
+        self._vocabulary = np.array([f"cat_{k}" for k in range(cardinality)], dtype=object)
+
+    def params(self) -> dict:
+        return {
+            "task": self.task,
+            "rows": self.rows,
+            "numeric": self.numeric,
+            "categorical": self.categorical,
+            "cardinality": self.cardinality,
+            "missing_rate": self.missing_rate,
+            "n_classes": self.n_classes,
+            "noise": self.noise,
+            "seed": self.seed,
+        }
+
+    def digest(self) -> str:
+        """
+        SHA-256 da configuração, usado como chave do dataset no DatasetCache.
+        """
+        return hashlib.sha256(json.dumps({"synthetic": self.params()}, sort_keys=True).encode()).hexdigest()
+
+    @property
+    def columns(self) -> list:
+        return [f"num_{i}" for i in range(self.numeric)] + [f"cat_{i}" for i in range(self.categorical)] + ["target"]
+
+    def _block(self, index: int) -> pd.DataFrame:
+        start = index * BLOCK_ROWS
+        n = min(BLOCK_ROWS, self.rows - start)
+        rng = np.random.default_rng(np.random.SeedSequence([self.seed, 1, index]))
+
+        numeric = rng.standard_normal((n, self.numeric))
+        scores = numeric @ self._weights
+        columns = {f"num_{i}": numeric[:, i] for i in range(self.numeric)}
+        for i in range(self.categorical):
+            codes = rng.integers(0, self.cardinality, n)
+            scores += self._effects[i][codes]
+            columns[f"cat_{i}"] = self._vocabulary[codes]
+        scores += self.noise * rng.standard_normal(scores.shape)
+
+        if self.missing_rate:
+            for name, values in columns.items():
+                missing = rng.random(n) < self.missing_rate
+                if values.dtype == object:
+                    values[missing] = None
+                else:
+                    values[missing] = np.nan
+        columns["target"] = scores.argmax(axis=1) if self.task == "classification" else scores[:, 0]
+        return pd.DataFrame(columns, index=pd.RangeIndex(start, start + n))
+
+    def iter_chunks(self, chunk_size: int = BLOCK_ROWS, include_target: bool = True) -> Iterator[pd.DataFrame]:
+        """
+        Gera o dataset em blocos de `chunk_size` linhas (o último pode ser menor), com o índice
+        contínuo entre os blocos. Sem `include_target`, a coluna alvo é omitida (entrada de predição).
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size deve ser maior que zero.")
+        pending, pending_rows = [], 0
+        for index in range(-(-self.rows // BLOCK_ROWS)):
+            block = self._block(index)
+            if not include_target:
+                block = block.drop(columns=["target"])
+            pending.append(block)
+            pending_rows += len(block)
+            while pending_rows >= chunk_size:
+                buffer = pd.concat(pending) if len(pending) > 1 else pending[0]
+                yield buffer.iloc[:chunk_size]
+                rest = buffer.iloc[chunk_size:]
+                pending, pending_rows = ([rest], len(rest)) if len(rest) else ([], 0)
+        if pending_rows:
+            yield pd.concat(pending) if len(pending) > 1 else pending[0]
+
+    def to_frame(self, include_target: bool = True) -> pd.DataFrame:
+        """
+        O dataset inteiro em um DataFrame (só para tamanhos que cabem em memória).
+        """
+        chunks = list(self.iter_chunks(BLOCK_ROWS, include_target=include_target))
+        if not chunks:
+            return pd.DataFrame(columns=self.columns if include_target else self.columns[:-1])
+        return pd.concat(chunks)
+
+    def to_csv(
+        self,
+        path_or_buf,
+        chunk_size: int = BLOCK_ROWS,
+        include_target: bool = True,
+        compression: Optional[str] = None
+    ):
+        """
+        Grava o dataset em CSV bloco a bloco, com o cabeçalho só no primeiro. `compression`
+        ("gzip" ou "zstd") comprime o arquivo enquanto ele é gravado.
+        """
+        if compression is None:
+            self._write_csv(path_or_buf, chunk_size, include_target)
+            return
+        if compression == "gzip":
+            import gzip
+
+            with gzip.open(path_or_buf, "wb", compresslevel=1) as f:
+                self._write_csv(f, chunk_size, include_target)
+        elif compression == "zstd":
+            import zstandard
+
+            with zstandard.open(path_or_buf, "wb") as f:
+                self._write_csv(f, chunk_size, include_target)
+        else:
+            raise ValueError(f"Compressão '{compression}' não suportada. Use 'gzip' ou 'zstd'.")
+
+    def _write_csv(self, path_or_buf, chunk_size: int, include_target: bool):
+        if isinstance(path_or_buf, str):
+            with open(path_or_buf, "wb") as f:
+                return self._write_csv(f, chunk_size, include_target)
+        for i, chunk in enumerate(self.iter_chunks(chunk_size, include_target=include_target)):
+            path_or_buf.write(chunk.to_csv(index=False, header=i == 0).encode())
@@ -0,0 +1,112 @@
+import re
+import time
+import uuid
+import weakref
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.datastructures import MutableHeaders
+
+from observability import timing
+from observability.metrics import CONTENT_TYPE, REGISTRY, REQUEST_SECONDS
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class ObservabilityMiddleware:
+    """
+    Middleware ASGI compartilhado pelos três serviços.
+
+    Reaproveita o `X-Request-ID` recebido (ou gera um novo), devolve-o na resposta junto com o
+    header `Server-Timing` das etapas registradas durante a requisição e alimenta o histograma
+    de duração por rota. Como é ASGI puro, não interfere em respostas em streaming.
+    """
+
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if not request_id or not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        context, token = timing.begin_request(request_id, self.service)
+        status = 500
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[REQUEST_ID_HEADER] = request_id
+                headers["Server-Timing"] = context.server_timing()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            endpoint = scope.get("endpoint")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - context.started_at,
+                service=self.service,
+                method=scope.get("method", ""),
+                handler=getattr(endpoint, "__name__", "unmatched"),
+                status=status,
+            )
+            timing.end_request(token)
+
+
+def install(app: FastAPI, service: str):
+    """
+    Instala o middleware de observabilidade e o endpoint `/metrics` (formato Prometheus).
+    """
+    timing.set_service_name(service)
+    app.add_middleware(ObservabilityMiddleware, service=service)
+
+    def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    app.add_api_route(
+        "/metrics",
+        metrics,
+        methods=["GET"],
+        summary="Métricas",
+        description="Histogramas de duração das requisições e das etapas instrumentadas, no formato do Prometheus.",
+        response_class=PlainTextResponse,
+        tags=["Status"],
+    )
+
+
+# Início de cada chamada feita pelo cliente httpx, para medir o tempo até a resposta.
+_upstream_started = weakref.WeakKeyDictionary()
+
+
+async def propagate_request_id(request):
+    """
+    Event hook de requisição do httpx.AsyncClient: repassa o `X-Request-ID` da requisição
+    corrente aos serviços chamados, para que os logs e métricas possam ser correlacionados.
+    """
+    request_id = timing.current_request_id()
+    if request_id and REQUEST_ID_HEADER not in request.headers:
+        request.headers[REQUEST_ID_HEADER] = request_id
+    _upstream_started[request] = time.perf_counter()
+
+
+async def record_upstream_time(response):
+    """
+    Event hook de resposta do httpx.AsyncClient: registra o tempo até os headers da resposta
+    como a etapa `upstream_<host>`.
+    """
+    started = _upstream_started.pop(response.request, None)
+    if started is not None:
+        timing.record(f"upstream_{response.request.url.host}", time.perf_counter() - started)
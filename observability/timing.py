@@ -0,0 +1,93 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from observability.metrics import STAGE_SECONDS
+
+# Nome do serviço usado no rótulo `service` das métricas; definido por observability.middleware.install.
+_service_name = "app"
+
+
+class RequestContext:
+    """
+    Identificador e tempos por etapa da requisição HTTP em andamento.
+    """
+
+    def __init__(self, request_id: str, service: Optional[str] = None):
+        self.request_id = request_id
+        self.service = service
+        self.started_at = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    def stage_totals(self) -> Dict[str, float]:
+        # Etapas repetidas (por exemplo, uma por bloco no streaming) são somadas.
+        totals = {}
+        for name, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def server_timing(self) -> str:
+        """
+        Valor do header Server-Timing, com as durações em milissegundos.
+        """
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stage_totals().items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_current_request: ContextVar[Optional[RequestContext]] = ContextVar("observability_request", default=None)
+
+
+def begin_request(request_id: str, service: Optional[str] = None):
+    """
+    Abre o contexto da requisição; retorna o contexto e o token para end_request.
+    """
+    context = RequestContext(request_id, service)
+    return context, _current_request.set(context)
+
+
+def end_request(token):
+    _current_request.reset(token)
+
+
+def set_service_name(name: str):
+    global _service_name
+    _service_name = name
+
+
+def current_request() -> Optional[RequestContext]:
+    return _current_request.get()
+
+
+def current_request_id() -> Optional[str]:
+    context = _current_request.get()
+    return context.request_id if context is not None else None
+
+
+def elapsed() -> float:
+    """
+    Segundos desde o início da requisição corrente (0 fora de uma requisição).
+    """
+    context = _current_request.get()
+    return time.perf_counter() - context.started_at if context is not None else 0.0
+
+
+def record(name: str, seconds: float):
+    """
+    Registra a duração de uma etapa no histograma e, dentro de uma requisição, no Server-Timing.
+    """
+    context = _current_request.get()
+    service = context.service if context is not None and context.service else _service_name
+    STAGE_SECONDS.observe(seconds, service=service, stage=name)
+    if context is not None:
+        context.stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
@@ -0,0 +1,209 @@
+import asyncio
+import contextvars
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    """
+    A fila de trabalho está cheia; `retry_after` é a espera sugerida ao cliente, em segundos.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Serviço sobrecarregado. Tente novamente em {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    pass
+
+
+class ClientDisconnectedError(Exception):
+    pass
+
+
+class WorkTicket:
+    """
+    Prazo e sinal de cancelamento de um trabalho em execução no pool.
+
+    Uma thread não pode ser interrompida no meio de uma chamada ao modelo; o trabalho chama
+    `check` entre as etapas para desistir assim que o cliente foi embora ou o prazo acabou.
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline
+        self._cancelled = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason: Exception):
+        self.reason = reason
+        self._cancelled.set()
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise self.reason
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceededError("Prazo da requisição esgotado.")
+
+
+class AdmissionController:
+    """
+    Executa o trabalho de CPU das predições fora do event loop, em um pool de threads limitado,
+    com controle de admissão.
+
+    O numpy, o pandas (leitor de CSV em C) e as árvores do scikit-learn liberam o GIL na maior
+    parte do trabalho, então threads bastam dentro de um processo; para usar vários núcleos
+    com isolamento, há o servidor pre-fork (predict_service.server).
+
+    No máximo `max_workers` trabalhos rodam ao mesmo tempo e `max_queue` esperam; além disso a
+    requisição é recusada na hora (OverloadedError), com um Retry-After estimado pela duração
+    média recente dos trabalhos, em vez de deixar a latência crescer sem limite. Um trabalho
+    abandonado (prazo esgotado ou cliente desconectado) continua ocupando sua vaga até a thread
+    terminar, para que a admissão reflita a CPU realmente em uso.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 16,
+        default_timeout: Optional[float] = 30.0,
+        disconnect_poll_interval: float = 0.1
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self.disconnect_poll_interval = disconnect_poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="predict")
+        self._lock = threading.Lock()
+        self._pending = 0
+        # Média móvel exponencial da duração de um trabalho, usada para estimar o Retry-After.
+        self._avg_seconds = 0.1
+        self.rejected = 0
+        self.timeouts = 0
+        self.disconnects = 0
+
+    def ticket(self, timeout: Optional[float] = None) -> WorkTicket:
+        """
+        Cria o ticket da requisição; `timeout` (em segundos) não pode passar do padrão do serviço.
+        """
+        if timeout is None or timeout <= 0:
+            timeout = self.default_timeout
+        elif self.default_timeout:
+            timeout = min(timeout, self.default_timeout)
+        return WorkTicket(time.monotonic() + timeout if timeout else None)
+
+    def _retry_after(self) -> int:
+        waves = math.ceil((self._pending + 1) / self.max_workers)
+        return max(1, math.ceil(waves * self._avg_seconds))
+
+    def _reject_if_full(self):
+        # Chamado com o lock adquirido.
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise OverloadedError(self._retry_after())
+
+    def _admit(self):
+        with self._lock:
+            self._reject_if_full()
+            self._pending += 1
+
+    def _release(self, seconds: float):
+        with self._lock:
+            self._pending -= 1
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * seconds
+
+    async def run(
+        self,
+        fn: Callable,
+        ticket: WorkTicket,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ):
+        """
+        Executa `fn(ticket)` no pool e aguarda o resultado. Lança OverloadedError se a fila
+        estiver cheia, DeadlineExceededError se o prazo acabar e ClientDisconnectedError se
+        `is_disconnected` indicar que o cliente foi embora; nesses dois casos o ticket é
+        cancelado, para que o trabalho pare na próxima verificação.
+        """
+        self._admit()
+
+        def work():
+            start = time.perf_counter()
+            try:
+                ticket.check()
+                return fn(ticket)
+            finally:
+                self._release(time.perf_counter() - start)
+
+        loop = asyncio.get_running_loop()
+        # run_in_executor não propaga contextvars: sem a cópia, as etapas medidas na thread não
+        # chegariam ao Server-Timing da requisição.
+        future = loop.run_in_executor(self.executor, contextvars.copy_context().run, work)
+        try:
+            while True:
+                remaining = ticket.remaining()
+                if remaining is not None and remaining <= 0:
+                    self.timeouts += 1
+                    error = DeadlineExceededError("Prazo da requisição esgotado.")
+                    break
+                wait = self.disconnect_poll_interval if is_disconnected else remaining
+                if remaining is not None and wait is not None:
+                    wait = min(wait, remaining)
+                done, _ = await asyncio.wait({future}, timeout=wait)
+                if done:
+                    return future.result()
+                if is_disconnected is not None and await is_disconnected():
+                    self.disconnects += 1
+                    error = ClientDisconnectedError("Cliente desconectado.")
+                    break
+        except asyncio.CancelledError:
+            ticket.cancel(ClientDisconnectedError("Requisição cancelada."))
+            raise
+
+        # O trabalho que ainda está na fila termina na primeira verificação do ticket, liberando
+        # a vaga; o que já está rodando para na próxima etapa.
+        ticket.cancel(error)
+        future.add_done_callback(_consume_exception)
+        raise error
+
+    def retry_after(self) -> int:
+        """
+        Espera sugerida ao cliente recusado por outro limite (ex.: a fila dos micro-lotes).
+        """
+        with self._lock:
+            return self._retry_after()
+
+    def check_capacity(self):
+        """
+        Lança OverloadedError se a fila estiver cheia, sem reservar vaga. Usado para recusar
+        cedo requisições de registros, antes de entrarem na fila dos micro-lotes (cada lote
+        reserva sua vaga ao rodar).
+        """
+        with self._lock:
+            self._reject_if_full()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "avg_seconds": round(self._avg_seconds, 4),
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "disconnects": self.disconnects,
+            }
+
+
+def _consume_exception(future):
+    # Evita o aviso "exception was never retrieved" de trabalhos abandonados.
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import functools
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from predict_service.admission import DeadlineExceededError, OverloadedError
+
+logger = logging.getLogger(__name__)
+
+
+class BatchQueueFullError(Exception):
+    pass
+
+
+# Marca colocada na fila por close: o worker processa o que veio antes e termina.
+_CLOSE = object()
+
+
+class MicroBatcher:
+    """
+    Agrupa registros de requisições concorrentes em uma única chamada de predição.
+
+    Cada chamada a `submit` entra em uma fila asyncio. Um worker retira a primeira
+    requisição e continua coletando outras até somar `max_batch_rows` registros ou até
+    passar `max_wait_us` microssegundos; o lote é então enviado a `predict_fn` em uma
+    única chamada (fora do event loop) e o resultado é fatiado de volta para cada chamador.
+
+    Com `run`, cada lote é executado por `await run(fn)` em vez de ir direto ao executor; o
+    serviço usa isso para que cada lote passe pelo controle de admissão. Com `max_queue` > 0,
+    no máximo esse número de requisições espera na fila; além disso submit lança
+    BatchQueueFullError.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[List[dict]], Sequence],
+        max_batch_rows: int = 256,
+        max_wait_us: int = 2000,
+        executor: Optional[Executor] = None,
+        run: Optional[Callable[[Callable[[], Sequence]], Awaitable[Sequence]]] = None,
+        max_queue: int = 0
+    ):
+        self.predict_fn = predict_fn
+        # Pool onde os lotes rodam; None usa o executor padrão do event loop.
+        self.executor = executor
+        self.run = run
+        self.max_queue = max_queue
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_us / 1_000_000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop = None
+        self._closed = False
+        self.batches = 0
+        self.rows = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        # A fila e o worker pertencem a um event loop; recria se o loop mudou (ex.: testes).
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, records: List[dict]) -> list:
+        """
+        Envia os registros para o próximo lote e aguarda as predições correspondentes.
+        Lança BatchQueueFullError se a fila estiver cheia.
+        """
+        if not records:
+            return []
+        if self._closed:
+            # Batcher de um modelo já descartado: a requisição que ainda o usa prediz sozinha.
+            return await self._predict(records)
+        self._ensure_worker()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((records, future))
+        except asyncio.QueueFull:
+            raise BatchQueueFullError(f"Fila de micro-lotes cheia ({self.max_queue} requisições).")
+        return await future
+
+    def close(self):
+        """
+        Encerra o worker depois de processar os registros já enfileirados. Pode ser chamado de
+        qualquer thread (o ModelStore descarta modelos a partir das threads de predição).
+        """
+        self._closed = True
+        loop, worker = self._loop, self._worker
+        if loop is None or worker is None or worker.done() or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake_to_close)
+        except RuntimeError:
+            # O event loop foi encerrado entre a verificação e o agendamento.
+            pass
+
+    def _wake_to_close(self):
+        try:
+            self._queue.put_nowait(_CLOSE)
+        except asyncio.QueueFull:
+            # Com a fila cheia o worker não está parado no get; ele encerra ao esvaziá-la.
+            pass
+
+    async def _collect(self) -> Optional[list]:
+        first = await self._queue.get()
+        if first is _CLOSE:
+            return None
+        batch = [first]
+        rows = len(batch[0][0])
+        deadline = self._loop.time() + self.max_wait
+        while rows < self.max_batch_rows:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _CLOSE:
+                # O lote atual ainda é processado; o worker encerra depois, com a fila vazia.
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    async def _predict(self, records: List[dict]) -> list:
+        if self.run is not None:
+            return list(await self.run(functools.partial(self.predict_fn, records)))
+        return list(await asyncio.get_running_loop().run_in_executor(self.executor, self.predict_fn, records))
+
+    async def _process(self, batch: list):
+        # Descarta requisições cujo cliente já desistiu antes de gastar CPU com elas.
+        batch = [(records, future) for records, future in batch if not future.done()]
+        if not batch:
+            return
+
+        combined = [record for records, _ in batch for record in records]
+        try:
+            predictions = await self._predict(combined)
+        except Exception as e:
+            if len(batch) == 1 or isinstance(e, (OverloadedError, DeadlineExceededError)):
+                # Recusa por sobrecarga ou prazo esgotado vale para o lote inteiro: repetir por
+                # requisição só aumentaria a carga.
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            # Um registro inválido não deve derrubar as outras requisições do lote.
+            logger.warning(f"Erro ao prever lote combinado, repetindo por requisição: {e}")
+            for records, future in batch:
+                try:
+                    result = await self._predict(records)
+                except Exception as request_error:
+                    if not future.done():
+                        future.set_exception(request_error)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            return
+
+        self.batches += 1
+        self.rows += len(combined)
+        start = 0
+        for records, future in batch:
+            end = start + len(records)
+            if not future.done():
+                future.set_result(predictions[start:end])
+            start = end
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            if batch is None:
+                return
+            try:
+                await self._process(batch)
+            except Exception as e:
+                logger.error(f"Erro inesperado no micro-batching: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if self._closed and self._queue.empty():
+                return
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "max_batch_rows": self.max_batch_rows,
+            "max_wait_us": int(self.max_wait * 1_000_000),
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
@@ -0,0 +1,139 @@
+import io
+import json
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+JSON = "application/json"
+NPY = "application/x-npy"
+NPZ = "application/x-npz"
+ARROW = "application/vnd.apache.arrow.stream"
+CSV = "text/csv"
+
+# Em ordem de preferência quando o cliente aceita qualquer formato.
+PREDICTION_MEDIA_TYPES = (JSON, NPY, NPZ, ARROW, CSV)
+
+
+class NotAcceptableError(Exception):
+    pass
+
+
+def _arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _parse_accept(accept: Optional[str]) -> List[Tuple[str, float]]:
+    """
+    Retorna os tipos do header Accept ordenados pelo peso `q` (estável para empates).
+    """
+    if not accept:
+        return [("*/*", 1.0)]
+    ranges = []
+    for part in accept.split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            ranges.append((media_type.lower(), q))
+    return sorted(ranges, key=lambda item: -item[1])
+
+
+def negotiate(accept: Optional[str], include_proba: bool = False) -> str:
+    """
+    Escolhe o formato da resposta a partir do header Accept.
+
+    `.npy` só carrega um array; com probabilidades, pedidos de `.npy` recebem `.npz`.
+    Arrow só é oferecido com o pyarrow instalado. Lança NotAcceptableError se nenhum
+    formato aceito pelo cliente puder ser produzido.
+    """
+    unavailable = None
+    for media_type, _ in _parse_accept(accept):
+        if media_type in ("*/*", "application/*"):
+            return JSON
+        if media_type == "text/*":
+            return CSV
+        if media_type == NPY and include_proba:
+            media_type = NPZ
+        if media_type == ARROW and not _arrow_available():
+            unavailable = "O formato Arrow exige o pacote pyarrow, que não está instalado."
+            continue
+        if media_type in PREDICTION_MEDIA_TYPES:
+            return media_type
+    raise NotAcceptableError(
+        unavailable or f"Nenhum formato aceito pelo cliente é suportado. Use um de {list(PREDICTION_MEDIA_TYPES)}."
+    )
+
+
+def _json_values(values: np.ndarray) -> str:
+    if values.dtype.kind in "iub":
+        # Inteiros são exatos no encoder em C do pandas, que não cria um objeto Python por valor.
+        frame = pd.DataFrame(values) if values.ndim == 2 else pd.Series(values)
+        return frame.to_json(orient="values")
+    # Floats usam o repr mais curto que volta ao mesmo valor; o to_json arredonda para
+    # `double_precision` dígitos e zera valores pequenos (ex.: probabilidades float32 de 1e-9).
+    return json.dumps(values.tolist())
+
+
+def _plain_array(values: np.ndarray) -> np.ndarray:
+    # Arrays de objetos (rótulos em texto) não podem ser gravados em .npy sem pickle.
+    return values.astype(str) if values.dtype == object else values
+
+
+def encode(
+    media_type: str,
+    predictions: np.ndarray,
+    probabilities: Optional[np.ndarray] = None,
+    classes: Optional[np.ndarray] = None
+) -> bytes:
+    """
+    Serializa as predições (e, opcionalmente, a matriz de probabilidades float32) no formato pedido.
+    """
+    if media_type == JSON:
+        parts = ['{"predictions":', _json_values(predictions)]
+        if probabilities is not None:
+            parts += [',"probabilities":', _json_values(probabilities), ',"classes":', json.dumps(classes.tolist())]
+        return ("".join(parts) + "}").encode()
+
+    if media_type in (NPY, NPZ):
+        buffer = io.BytesIO()
+        if media_type == NPY:
+            np.save(buffer, _plain_array(predictions), allow_pickle=False)
+        else:
+            arrays = {"predictions": _plain_array(predictions)}
+            if probabilities is not None:
+                arrays["probabilities"] = probabilities
+                arrays["classes"] = _plain_array(classes)
+            np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    columns = {"prediction": predictions}
+    if probabilities is not None:
+        for j, label in enumerate(classes.tolist()):
+            columns[f"proba_{label}"] = probabilities[:, j]
+
+    if media_type == CSV:
+        return pd.DataFrame(columns).to_csv(index=False).encode()
+
+    if media_type == ARROW:
+        import pyarrow as pa
+
+        table = pa.table({name: pa.array(values) for name, values in columns.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    raise NotAcceptableError(f"Formato '{media_type}' não suportado.")
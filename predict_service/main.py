@@ -1,8 +1,24 @@
 import os
-from fastapi import FastAPI, HTTPException, UploadFile, Form
+import asyncio
+from fastapi import FastAPI, HTTPException, UploadFile, Form, Header, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
-from training_pipeline.trainer import Trainer
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 from training_pipeline.utils import parse_columns_to_drop
+from dataset_manager.compression import csv_compression
+from predict_service import formats
+from predict_service.admission import (
+    AdmissionController, ClientDisconnectedError, DeadlineExceededError, OverloadedError, WorkTicket
+)
+from predict_service.batching import BatchQueueFullError, MicroBatcher
+from predict_service.model_cache import ModelCache
+from predict_service.model_store import ModelStore
+from predict_service.streaming import STREAM_MEDIA_TYPES, read_csv_chunks, stream_predictions
+from training_pipeline.registry import ModelRegistry
+from observability import timing
+from observability.middleware import install as install_observability
 import logging
 
 # Configuração de logging
@@ -30,19 +46,143 @@ app = FastAPI(
         "url": "https://opensource.org/licenses/MIT",
     }
 )
+install_observability(app, service="predict")
+
+MODEL_DIR = os.environ.get("MODEL_DIR", "/shared-data/models")
+PREDICT_CHUNK_SIZE = int(os.environ.get("PREDICT_CHUNK_SIZE", "10000"))
+# Código atribuído a categorias não vistas no treinamento; "none" faz a predição falhar.
+_unknown_category_code = os.environ.get("UNKNOWN_CATEGORY_CODE", "-1")
+UNKNOWN_CATEGORY_CODE = None if _unknown_category_code.lower() == "none" else int(_unknown_category_code)
+# Modo de memory mapping dos artefatos ("r" por padrão); "none" copia os arrays para o heap de cada worker.
+_model_mmap_mode = os.environ.get("MODEL_MMAP_MODE", "r")
+MODEL_MMAP_MODE = None if _model_mmap_mode.lower() == "none" else _model_mmap_mode
+model_store = ModelStore(
+    ModelRegistry(MODEL_DIR),
+    legacy_dir=MODEL_DIR,
+    max_bytes=int(os.environ.get("MODEL_CACHE_MAX_BYTES", str(2 * 1024 ** 3))),
+    unknown_category_code=UNKNOWN_CATEGORY_CODE,
+    mmap_mode=MODEL_MMAP_MODE,
+    # Cache de predições por linha repetida; desligado com 0 (padrão).
+    result_cache_max_bytes=int(os.environ.get("PREDICTION_CACHE_MAX_BYTES", "0")),
+    result_cache_ttl=float(os.environ.get("PREDICTION_CACHE_TTL_SECONDS", "300")),
+    # "compiled" serve florestas e regressão logística pelo motor numpy, sem importar o scikit-learn.
+    engine=os.environ.get("PREDICT_ENGINE", "sklearn")
+)
+MICROBATCH_MAX_ROWS = int(os.environ.get("MICROBATCH_MAX_ROWS", "256"))
+MICROBATCH_MAX_WAIT_US = int(os.environ.get("MICROBATCH_MAX_WAIT_US", "2000"))
+# Requisições de registros JSON à espera de um micro-lote, por modelo; além disso, 503.
+MICROBATCH_MAX_QUEUE = int(os.environ.get("MICROBATCH_MAX_QUEUE", "1024"))
+# Leitura do CSV, pré-processamento e predição rodam neste pool, fora do event loop. Além de
+# PREDICT_THREADS trabalhos em execução e PREDICT_MAX_QUEUE na fila, as requisições recebem 503
+# com Retry-After; o prazo de cada uma (header X-Request-Timeout, limitado a
+# PREDICT_TIMEOUT_SECONDS) esgotado gera 504.
+admission = AdmissionController(
+    max_workers=int(os.environ.get("PREDICT_THREADS", "4")),
+    max_queue=int(os.environ.get("PREDICT_MAX_QUEUE", "16")),
+    default_timeout=float(os.environ.get("PREDICT_TIMEOUT_SECONDS", "30")) or None
+)
+
+
+def _resolve_model(model: Optional[str], version: Optional[str]) -> ModelCache:
+    try:
+        return model_store.get_cache(model_store.resolve_dir(model, version))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Modelo não encontrado.")
+
+
+async def _get_model(cache: ModelCache):
+    # A primeira carga lê o artefato do disco (joblib.load) e não pode bloquear o event loop.
+    if cache.loaded:
+        return cache.get()
+    return await run_in_threadpool(cache.get)
+
+
+def _check_record_columns(trainer, records: List[dict]):
+    """
+    Garante que a requisição traz todas as features do treinamento antes de entrar no lote.
+    Sem isso, colunas ausentes seriam preenchidas pelos registros de outras requisições.
+    """
+    feature_columns = trainer.feature_columns
+    if feature_columns is None:
+        return
+    present = set().union(*records)
+    missing = [col for col in feature_columns if col not in present]
+    if missing:
+        raise ValueError(f"Colunas ausentes no dataset de predição: {missing}")
+
+
+def _get_batcher(cache: ModelCache) -> MicroBatcher:
+    # Um MicroBatcher por artefato, guardado no ModelCache: registros de modelos diferentes nunca
+    # entram no mesmo lote, e o worker do lote é encerrado quando o ModelStore descarta o modelo.
+    if cache.batcher is None:
+        model_dir = cache.model_dir
+
+        def predict_records(records: List[dict]) -> list:
+            # Busca no store a cada lote para não manter vivo um modelo já despejado.
+            return model_store.get_cache(model_dir).predict(pd.DataFrame.from_records(records))
+
+        cache.batcher = MicroBatcher(
+            predict_records,
+            max_batch_rows=MICROBATCH_MAX_ROWS,
+            max_wait_us=MICROBATCH_MAX_WAIT_US,
+            run=_run_batch,
+            max_queue=MICROBATCH_MAX_QUEUE
+        )
+    return cache.batcher
+
+
+async def _run_batch(fn):
+    # Cada micro-lote ocupa uma vaga do pool de predição, como uma requisição de CSV, e é
+    # recusado com OverloadedError quando o pool e sua fila estão cheios.
+    return await admission.run(lambda ticket: fn(), admission.ticket())
+
+
+async def _run_admitted(request: Request, work, ticket: WorkTicket):
+    """
+    Executa `work(ticket)` no pool de predição, traduzindo a recusa e o prazo em respostas HTTP.
+    """
+    try:
+        return await admission.run(work, ticket, is_disconnected=request.is_disconnected)
+    except OverloadedError as e:
+        logger.warning(f"Requisição recusada: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except DeadlineExceededError as e:
+        logger.warning(f"Predição abandonada: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except ClientDisconnectedError as e:
+        logger.info(f"Predição abandonada: {e}")
+        # 499 (convenção do nginx): o cliente já foi embora e não lerá esta resposta.
+        raise HTTPException(status_code=499, detail=str(e))
+
+
+class PredictRecordsRequest(BaseModel):
+    records: List[Dict[str, Any]] = Field(..., description="Registros a serem preditos, um objeto JSON por linha.")
+    columns_to_drop: Optional[List[str]] = Field(None, description="Colunas a serem descartadas antes da predição.")
+    model: Optional[str] = Field(None, description="Nome do modelo no registro. Padrão: modelo `default`.")
+    version: Optional[str] = Field(None, description="Versão do modelo. Padrão: a versão promovida.")
 
 @app.post(
     "/predict",
     summary="Realizar Predições",
     description=(
         "Enviar um dataset para gerar predições utilizando um modelo previamente treinado. "
-        "Este endpoint aceita um arquivo CSV contendo os dados e permite especificar colunas que devem ser ignoradas."
+        "Este endpoint aceita um arquivo CSV contendo os dados e permite especificar colunas que devem ser ignoradas. "
+        "O formato da resposta é escolhido pelo header `Accept`: JSON (padrão), `application/x-npy`, "
+        "`application/x-npz`, `application/vnd.apache.arrow.stream` (requer pyarrow) ou `text/csv`."
     ),
     tags=["Predições"]
 )
 async def predict(
+    request: Request,
     input_file: UploadFile,
-    columns_to_drop: str = Form(None, description="Lista de colunas a serem descartadas no dataset, separadas por vírgula (opcional).")
+    columns_to_drop: str = Form(None, description="Lista de colunas a serem descartadas no dataset, separadas por vírgula (opcional)."),
+    model: str = Form(None, description="Nome do modelo no registro. Padrão: modelo `default`."),
+    version: str = Form(None, description="Versão do modelo. Padrão: a versão promovida."),
+    include_proba: bool = Form(False, description="Incluir as probabilidades por classe (matriz float32) na resposta."),
+    accept: str = Header(None, description="Formato da resposta."),
+    x_request_timeout: float = Header(None, description="Prazo da requisição em segundos (opcional).")
 ):
     """
     Realizar predições utilizando um modelo treinado.
@@ -50,37 +190,197 @@ async def predict(
     **Parâmetros:**
     - **input_file** (*UploadFile*): Arquivo CSV contendo os dados para realizar as predições.
     - **columns_to_drop** (*str*): Lista de colunas a serem ignoradas no dataset, separadas por vírgula (opcional).
+    - **model** (*str*): Nome do modelo no registro (opcional).
+    - **version** (*str*): Versão do modelo (opcional; padrão: versão promovida).
+    - **include_proba** (*bool*): Incluir as probabilidades por classe (apenas classificadores).
+    - **accept** (*str*): Header `Accept` com o formato desejado da resposta.
+    - **x_request_timeout** (*float*): Header `X-Request-Timeout`, prazo em segundos (opcional).
 
     **Retornos:**
-    - **200**: Sucesso. Retorna as predições geradas pelo modelo.
+    - **200**: Sucesso. Retorna as predições geradas pelo modelo no formato negociado.
     - **404**: Modelo não encontrado no caminho especificado.
-    - **400**: Erro ao ler o arquivo CSV fornecido.
+    - **400**: Erro ao ler o arquivo CSV fornecido, ou probabilidades pedidas para um modelo sem `predict_proba`.
+    - **406**: Nenhum dos formatos aceitos pelo cliente é suportado.
     - **500**: Erro ao realizar as predições ou ao carregar o modelo.
+    - **503**: Serviço sobrecarregado; tente de novo após `Retry-After` segundos.
+    - **504**: Prazo da requisição esgotado.
     """
-    model_path = "/shared-data/models/model.pkl"
-    if not os.path.exists(model_path):
-        raise HTTPException(status_code=404, detail="Modelo não encontrado.")
+    timing.record("upload", timing.elapsed())
+    try:
+        media_type = formats.negotiate(accept, include_proba=include_proba)
+    except formats.NotAcceptableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    cache = _resolve_model(model, version)
+    columns_to_drop_list = parse_columns_to_drop(columns_to_drop)
+
+    def work(ticket: WorkTicket) -> Response:
+        try:
+            with timing.stage("read_csv"):
+                data = pd.read_csv(input_file.file, compression=csv_compression(input_file.file))
+            logger.info(f"Dataset carregado com sucesso a partir do arquivo {input_file.filename}.")
+        except Exception as e:
+            logger.error(f"Erro ao ler o arquivo CSV: {e}")
+            raise HTTPException(status_code=400, detail=f"Erro ao ler o arquivo CSV: {e}")
+
+        try:
+            current = cache.get_current()
+        except Exception as e:
+            logger.error(f"Erro ao carregar o modelo: {e}")
+            raise HTTPException(status_code=500, detail=f"Erro ao carregar o modelo: {e}")
+
+        if include_proba and not hasattr(current[1].model, "predict_proba"):
+            raise HTTPException(status_code=400, detail="O modelo não fornece probabilidades (predict_proba).")
+
+        ticket.check()
+        try:
+            predictions, probabilities, classes = cache.predict_arrays(
+                data, columns_to_drop=columns_to_drop_list, current=current, include_proba=include_proba
+            )
+        except Exception as e:
+            logger.error(f"Erro ao fazer predições: {e}")
+            raise HTTPException(status_code=500, detail=f"Erro ao fazer predições: {e}")
+        logger.info(f"Predições realizadas com sucesso.")
+
+        ticket.check()
+        try:
+            with timing.stage("serialize"):
+                content = formats.encode(media_type, predictions, probabilities, classes)
+        except Exception as e:
+            logger.error(f"Erro ao serializar as predições: {e}")
+            raise HTTPException(status_code=500, detail=f"Erro ao serializar as predições: {e}")
+        return Response(content=content, media_type=media_type)
+
+    return await _run_admitted(request, work, admission.ticket(x_request_timeout))
+
+
+@app.post(
+    "/predict/stream",
+    summary="Realizar Predições em Streaming",
+    description=(
+        "Gerar predições para arquivos CSV grandes processando o arquivo em blocos de linhas. "
+        "As predições são enviadas em NDJSON ou CSV à medida que cada bloco é processado, "
+        "mantendo o uso de memória limitado ao tamanho do bloco."
+    ),
+    tags=["Predições"]
+)
+async def predict_stream(
+    input_file: UploadFile,
+    columns_to_drop: str = Form(None, description="Lista de colunas a serem descartadas no dataset, separadas por vírgula (opcional)."),
+    chunk_size: int = Form(PREDICT_CHUNK_SIZE, description="Quantidade de linhas processadas por bloco."),
+    output_format: str = Form("ndjson", description="Formato da resposta: `ndjson` ou `csv`."),
+    model: str = Form(None, description="Nome do modelo no registro. Padrão: modelo `default`."),
+    version: str = Form(None, description="Versão do modelo. Padrão: a versão promovida.")
+):
+    """
+    Realizar predições em blocos, com resposta em streaming.
+
+    **Parâmetros:**
+    - **input_file** (*UploadFile*): Arquivo CSV contendo os dados para realizar as predições.
+    - **columns_to_drop** (*str*): Lista de colunas a serem ignoradas no dataset, separadas por vírgula (opcional).
+    - **chunk_size** (*int*): Quantidade de linhas lidas e processadas por vez.
+    - **output_format** (*str*): `ndjson` (uma linha `{"row", "prediction"}` por registro) ou `csv`.
+    - **model** (*str*): Nome do modelo no registro (opcional).
+    - **version** (*str*): Versão do modelo (opcional; padrão: versão promovida).
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna as predições em streaming.
+    - **404**: Modelo não encontrado no caminho especificado.
+    - **400**: Parâmetros inválidos ou erro ao ler o arquivo CSV fornecido.
+    - **500**: Erro ao carregar o modelo.
+    """
+    if output_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Formato de saída '{output_format}' não suportado.")
+    if chunk_size <= 0:
+        raise HTTPException(status_code=400, detail="chunk_size deve ser maior que zero.")
+    cache = _resolve_model(model, version)
 
     try:
-        data = pd.read_csv(input_file.file)
-        logger.info(f"Dataset carregado com sucesso a partir do arquivo {input_file.filename}.")
+        # O primeiro bloco é lido aqui, fora do event loop; os demais, pelo StreamingResponse.
+        chunks = await run_in_threadpool(read_csv_chunks, input_file.file, chunk_size)
     except Exception as e:
         logger.error(f"Erro ao ler o arquivo CSV: {e}")
         raise HTTPException(status_code=400, detail=f"Erro ao ler o arquivo CSV: {e}")
 
     columns_to_drop_list = parse_columns_to_drop(columns_to_drop)
-    trainer = Trainer(model_dir="/shared-data/models", model_class=None)
     try:
-        trainer.load_model()
-        logger.info("Modelo carregado com sucesso.")
+        trainer = await _get_model(cache)
     except Exception as e:
         logger.error(f"Erro ao carregar o modelo: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao carregar o modelo: {e}")
 
+    logger.info(f"Iniciando predições em streaming do arquivo {input_file.filename} em blocos de {chunk_size} linhas.")
+    return StreamingResponse(
+        stream_predictions(trainer, chunks, output_format, columns_to_drop=columns_to_drop_list),
+        media_type=STREAM_MEDIA_TYPES[output_format]
+    )
+
+
+@app.post(
+    "/predict/records",
+    summary="Realizar Predições sobre Registros JSON",
+    description=(
+        "Endpoint de baixa latência para tráfego online: recebe uma ou poucas linhas em JSON. "
+        "Requisições concorrentes são agrupadas em micro-lotes e avaliadas em uma única chamada ao modelo."
+    ),
+    tags=["Predições"]
+)
+async def predict_records(
+    request: PredictRecordsRequest,
+    x_request_timeout: float = Header(None, description="Prazo da requisição em segundos (opcional).")
+):
+    """
+    Realizar predições sobre registros enviados em JSON.
+
+    **Parâmetros:**
+    - **records** (*list[dict]*): Registros a serem preditos. Exemplo: `[{"sepal.length": 5.1, ...}]`.
+    - **columns_to_drop** (*list[str]*): Colunas a serem ignoradas (opcional).
+    - **model** (*str*): Nome do modelo no registro (opcional).
+    - **version** (*str*): Versão do modelo (opcional; padrão: versão promovida).
+    - **x_request_timeout** (*float*): Header `X-Request-Timeout`, prazo em segundos (opcional).
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna as predições na mesma ordem dos registros (lista vazia sem registros).
+    - **400**: Colunas do treinamento ausentes nos registros ou valores inválidos.
+    - **404**: Modelo não encontrado no caminho especificado.
+    - **500**: Erro ao realizar as predições ou ao carregar o modelo.
+    - **503**: Serviço sobrecarregado; tente de novo após `Retry-After` segundos.
+    - **504**: Prazo da requisição esgotado.
+    """
     try:
-        predictions = trainer.predict(data, columns_to_drop=columns_to_drop_list)
-        logger.info(f"Predições realizadas com sucesso.")
-        return {"predictions": predictions}
+        admission.check_capacity()
+    except OverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    cache = _resolve_model(request.model, request.version)
+    if not request.records:
+        return JSONResponse({"predictions": []})
+
+    records = request.records
+    if request.columns_to_drop:
+        drop = set(request.columns_to_drop)
+        records = [{k: v for k, v in record.items() if k not in drop} for record in records]
+
+    try:
+        _check_record_columns(await _get_model(cache), records)
+        with timing.stage("batch_predict"):
+            # Com o prazo esgotado o future é cancelado e o micro-lote descarta os registros.
+            predictions = await asyncio.wait_for(
+                _get_batcher(cache).submit(records), admission.ticket(x_request_timeout).remaining()
+            )
+        with timing.stage("serialize"):
+            return JSONResponse({"predictions": predictions})
+    except OverloadedError as e:
+        logger.warning(f"Requisição recusada: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except BatchQueueFullError as e:
+        logger.warning(f"Requisição recusada: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(admission.retry_after())})
+    except (asyncio.TimeoutError, DeadlineExceededError):
+        raise HTTPException(status_code=504, detail="Prazo da requisição esgotado.")
+    except ValueError as e:
+        # Colunas ausentes ou valores que o pré-processamento não aceita: erro nos dados enviados.
+        # Um lote combinado que falha é repetido por requisição, então o erro é desta requisição.
+        logger.warning(f"Registros inválidos para predição: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Erro ao fazer predições: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao fazer predições: {e}")
@@ -97,6 +397,22 @@ def root():
     Verificar o status do serviço.
 
     **Retornos:**
-    - **200**: Sucesso. O serviço está ativo.
+    - **200**: Sucesso. O serviço está ativo. Inclui a ocupação do pool de predição (`admission`).
+    """
+    return {"message": "Predict Service ativo e pronto para gerar predições!", "admission": admission.stats()}
+
+
+@app.get(
+    "/model/cache",
+    summary="Status do Cache de Modelo",
+    description="Retornar os modelos mantidos em memória, seus contadores de acertos e recargas e o uso do orçamento de bytes.",
+    tags=["Status"]
+)
+def model_cache_status():
+    """
+    Consultar o estado do cache de modelo.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna, por modelo carregado, o arquivo monitorado, o tamanho estimado e os contadores de acertos, carregamentos e recargas.
     """
-    return {"message": "Predict Service ativo e pronto para gerar predições!"}
+    return model_store.stats()
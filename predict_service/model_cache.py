@@ -0,0 +1,237 @@
+import os
+import threading
+import logging
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from predict_service.batching import MicroBatcher
+from predict_service.result_cache import PredictionResultCache
+from training_pipeline.compiled import COMPILED_ARTIFACT_FILE, CompiledPredictor
+
+if TYPE_CHECKING:
+    # Só para anotações: o Trainer importa o scikit-learn, que o motor compilado dispensa.
+    from training_pipeline.trainer import Trainer
+
+logger = logging.getLogger(__name__)
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Retorna a assinatura (inode, mtime_ns, tamanho) do arquivo, ou None se ele não existir.
+    Como o Trainer grava o artefato com os.replace, qualquer novo modelo muda o inode.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class ModelCache:
+    """
+    Mantém o modelo treinado residente em memória para todo o processo.
+
+    A cada acesso a assinatura do arquivo é comparada com a do modelo carregado.
+    Se o arquivo mudou, a recarga acontece em uma thread de fundo e as requisições
+    continuam usando o modelo anterior até que o novo esteja pronto; a troca é feita
+    atribuindo uma única referência, então nenhuma requisição vê um modelo parcial.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        loader: Optional[Callable[[str], "Trainer"]] = None,
+        unknown_category_code: Optional[int] = -1,
+        mmap_mode: Optional[str] = None,
+        result_cache: Optional[PredictionResultCache] = None,
+        engine: str = "sklearn"
+    ):
+        self.model_dir = model_dir
+        self.model_file = os.path.join(model_dir, "model.pkl")
+        # "compiled" usa o artefato compilado (training_pipeline.compiled) quando ele existe,
+        # sem importar o scikit-learn; sem ele, e com "sklearn", o modelo original é carregado.
+        self.engine = engine
+        self.unknown_category_code = unknown_category_code
+        # O mapeamento é seguro porque o Trainer nunca reescreve o artefato no lugar: um novo
+        # modelo ganha outro inode (os.replace) e o arquivo antigo segue válido enquanto mapeado.
+        self.mmap_mode = mmap_mode
+        # Cache opcional de predições por linha; é esvaziado sempre que um novo modelo é carregado.
+        self.result_cache = result_cache
+        # Micro-batcher dos registros JSON deste modelo, criado pelo serviço no primeiro uso e
+        # encerrado em close, quando o ModelStore descarta o modelo.
+        self.batcher: Optional[MicroBatcher] = None
+        self._loader = loader or self._load_trainer
+        self._lock = threading.Lock()
+        self._current = None  # (assinatura, trainer)
+        self._reloading = False
+        # Assinatura cuja recarga falhou; só tentamos de novo quando o arquivo mudar outra vez.
+        self._failed_signature = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def _load_trainer(self, model_dir: str) -> "Trainer":
+        if self.engine == "compiled" and os.path.exists(os.path.join(model_dir, COMPILED_ARTIFACT_FILE)):
+            predictor = CompiledPredictor(
+                model_dir, unknown_category_code=self.unknown_category_code, mmap_mode=self.mmap_mode
+            )
+            predictor.load_model()
+            return predictor
+
+        from training_pipeline.trainer import Trainer
+
+        trainer = Trainer(
+            model_dir=model_dir,
+            model_class=None,
+            unknown_category_code=self.unknown_category_code,
+            mmap_mode=self.mmap_mode
+        )
+        trainer.load_model()
+        return trainer
+
+    def _load(self, signature):
+        trainer = self._loader(self.model_dir)
+        # Se o arquivo mudou durante a leitura, a próxima chamada detecta a nova assinatura.
+        self._current = (signature, trainer)
+        if self.result_cache is not None:
+            self.result_cache.reset(signature)
+        return trainer
+
+    def _reload_in_background(self, signature):
+        try:
+            self._load(signature)
+            with self._lock:
+                self.reloads += 1
+                self._failed_signature = None
+            logger.info("Novo modelo carregado em segundo plano.")
+        except Exception as e:
+            with self._lock:
+                self.reload_errors += 1
+                self._failed_signature = signature
+            logger.error(f"Erro ao recarregar o modelo: {e}")
+        finally:
+            with self._lock:
+                self._reloading = False
+
+    def get(self) -> "Trainer":
+        """
+        Retorna o Trainer com o modelo carregado, carregando-o na primeira chamada.
+        Lança FileNotFoundError se não houver modelo treinado.
+        """
+        return self.get_current()[1]
+
+    def predict(
+        self,
+        data: pd.DataFrame,
+        columns_to_drop: Optional[List[str]] = None,
+        current: Optional[tuple] = None
+    ) -> list:
+        """
+        Prediz com o modelo carregado, passando pelo cache de predições quando configurado.
+        `current` é o retorno de get_current, para quem já resolveu o modelo.
+        """
+        signature, trainer = current or self.get_current()
+        if self.result_cache is None:
+            return trainer.predict(data, columns_to_drop=columns_to_drop)
+        return self.result_cache.predict(trainer, data, fingerprint=signature, columns_to_drop=columns_to_drop)
+
+    def predict_arrays(
+        self,
+        data: pd.DataFrame,
+        columns_to_drop: Optional[List[str]] = None,
+        current: Optional[tuple] = None,
+        include_proba: bool = False
+    ) -> tuple:
+        """
+        Como predict, mas retorna (predições, probabilidades, classes) como arrays do numpy,
+        sem converter para listas do Python. Sem `include_proba`, probabilidades e classes são None.
+        As probabilidades não ficam no cache de predições, então esse caso vai direto ao modelo.
+        """
+        signature, trainer = current or self.get_current()
+        if self.result_cache is not None and not include_proba:
+            return np.asarray(self.predict(data, columns_to_drop=columns_to_drop, current=(signature, trainer))), None, None
+
+        features = trainer.transform(data, columns_to_drop=columns_to_drop)
+        predictions = trainer.predict_features(features)
+        if not include_proba:
+            return predictions, None, None
+        return (predictions, *trainer.predict_proba_features(features))
+
+    def get_current(self) -> tuple:
+        """
+        Como get, mas retorna (assinatura do artefato, trainer).
+        """
+        signature = _file_signature(self.model_file)
+        current = self._current
+
+        if current is not None:
+            loaded_signature, trainer = current
+            if signature is not None and signature not in (loaded_signature, self._failed_signature):
+                with self._lock:
+                    start_reload = not self._reloading
+                    self._reloading = True
+                if start_reload:
+                    threading.Thread(
+                        target=self._reload_in_background, args=(signature,), daemon=True
+                    ).start()
+            with self._lock:
+                self.hits += 1
+            return current
+
+        if signature is None:
+            raise FileNotFoundError(f"Modelo não encontrado em {self.model_file}. Treine primeiro.")
+
+        with self._lock:
+            # Outra requisição pode ter carregado o modelo enquanto esperávamos o lock.
+            if self._current is not None:
+                self.hits += 1
+                return self._current
+            self._load(signature)
+            self.misses += 1
+            return self._current
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    def artifact_file(self) -> str:
+        """
+        Arquivo do artefato em uso: o do objeto carregado ou, antes da carga, o que o motor
+        configurado vai carregar (o compilado, se existir, com o motor "compiled").
+        """
+        current = self._current
+        if current is not None:
+            return getattr(current[1], "model_file", self.model_file)
+        compiled_file = os.path.join(self.model_dir, COMPILED_ARTIFACT_FILE)
+        if self.engine == "compiled" and os.path.exists(compiled_file):
+            return compiled_file
+        return self.model_file
+
+    def close(self):
+        """
+        Libera os recursos ligados ao modelo (o worker do micro-batcher).
+        """
+        batcher, self.batcher = self.batcher, None
+        if batcher is not None:
+            batcher.close()
+
+    def stats(self) -> dict:
+        """
+        Retorna os contadores do cache e a assinatura do modelo carregado.
+        """
+        current = self._current
+        return {
+            "model_file": self.model_file,
+            "loaded": current is not None,
+            "loaded_mtime_ns": current[0][1] if current else None,
+            "engine": ("compiled" if isinstance(current[1], CompiledPredictor) else "sklearn") if current else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "reloading": self._reloading,
+            "result_cache": self.result_cache.stats() if self.result_cache is not None else None,
+        }
@@ -0,0 +1,155 @@
+import os
+import threading
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+from predict_service.model_cache import ModelCache
+from predict_service.result_cache import PredictionResultCache
+from training_pipeline.registry import ARTIFACT_FILE, DEFAULT_MODEL_NAME, ModelRegistry
+if TYPE_CHECKING:
+    # Só para anotações: o Trainer importa o scikit-learn, que o motor compilado dispensa.
+    from training_pipeline.trainer import Trainer
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStore:
+    """
+    Mantém vários modelos carregados, com despejo LRU limitado por um orçamento de bytes.
+
+    Cada artefato resolvido no registro ganha seu próprio ModelCache. O tamanho em memória
+    é estimado pelo tamanho em disco do artefato carregado, o original ou o compilado (o pickle
+    do joblib guarda os arrays numpy sem compressão). Quando a soma passa de `max_bytes`, os
+    modelos usados há mais tempo são descartados; o modelo recém-usado nunca é despejado, mesmo
+    que sozinho exceda o orçamento. A versão anterior de um modelo também é descartada quando
+    outra é promovida. Um modelo descartado tem seus recursos liberados (ModelCache.close).
+
+    Com `result_cache_max_bytes` > 0, cada modelo ganha também um cache de predições por linha
+    com esse orçamento próprio (fora de `max_bytes`) e expiração de `result_cache_ttl` segundos.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        legacy_dir: Optional[str] = None,
+        max_bytes: int = 2 * 1024 ** 3,
+        unknown_category_code: Optional[int] = -1,
+        mmap_mode: Optional[str] = None,
+        result_cache_max_bytes: int = 0,
+        result_cache_ttl: Optional[float] = 300.0,
+        engine: str = "sklearn"
+    ):
+        self.registry = registry
+        self.legacy_dir = legacy_dir
+        self.max_bytes = max_bytes
+        self.unknown_category_code = unknown_category_code
+        self.mmap_mode = mmap_mode
+        self.result_cache_max_bytes = result_cache_max_bytes
+        self.result_cache_ttl = result_cache_ttl
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # diretório do artefato -> ModelCache
+        self._sizes = {}
+        # Nome do modelo -> diretório da versão promovida resolvida por último.
+        self._latest = {}
+        self.evictions = 0
+
+    def resolve_dir(self, name: Optional[str] = None, version: Optional[str] = None) -> str:
+        """
+        Resolve o diretório do artefato. Sem nome, usa o modelo `default` do registro e,
+        se ele ainda não existir, o `model.pkl` legado na raiz do diretório de modelos.
+        """
+        if name is None and version is None:
+            try:
+                model_dir = self.registry.resolve(DEFAULT_MODEL_NAME)
+            except FileNotFoundError:
+                if self.legacy_dir and os.path.exists(os.path.join(self.legacy_dir, ARTIFACT_FILE)):
+                    return self.legacy_dir
+                raise
+        else:
+            model_dir = self.registry.resolve(name or DEFAULT_MODEL_NAME, version)
+        if version is None:
+            self._track_latest(name or DEFAULT_MODEL_NAME, model_dir)
+        return model_dir
+
+    def _track_latest(self, name: str, model_dir: str):
+        # Com uma nova versão promovida, a anterior só continua em memória se for pedida pela versão.
+        with self._lock:
+            previous = self._latest.get(name)
+            self._latest[name] = model_dir
+            if previous is not None and previous != model_dir and previous in self._entries:
+                self._discard(previous)
+                logger.info(f"Modelo {previous} removido da memória (nova versão de '{name}' promovida).")
+
+    def get(self, name: Optional[str] = None, version: Optional[str] = None) -> "Trainer":
+        """
+        Retorna o Trainer do modelo pedido, carregando-o se necessário.
+        Lança FileNotFoundError se o modelo não existir e ValueError se o nome for inválido.
+        """
+        return self.get_cache(self.resolve_dir(name, version)).get()
+
+    def get_cache(self, model_dir: str) -> ModelCache:
+        with self._lock:
+            cache = self._entries.get(model_dir)
+            if cache is None:
+                result_cache = None
+                if self.result_cache_max_bytes > 0:
+                    result_cache = PredictionResultCache(
+                        max_bytes=self.result_cache_max_bytes, ttl_seconds=self.result_cache_ttl
+                    )
+                cache = ModelCache(
+                    model_dir,
+                    unknown_category_code=self.unknown_category_code,
+                    mmap_mode=self.mmap_mode,
+                    result_cache=result_cache,
+                    engine=self.engine
+                )
+                self._entries[model_dir] = cache
+            self._entries.move_to_end(model_dir)
+
+        try:
+            size = os.path.getsize(cache.artifact_file())
+        except FileNotFoundError:
+            size = 0
+        with self._lock:
+            self._sizes[model_dir] = size
+            self._evict(keep=model_dir)
+        return cache
+
+    def clear(self):
+        """
+        Descarta todos os modelos carregados; o próximo acesso carrega cada um de novo, de forma síncrona.
+        """
+        with self._lock:
+            for model_dir in list(self._entries):
+                self._discard(model_dir)
+
+    def _discard(self, model_dir: str):
+        # Chamado com o lock adquirido.
+        self._entries.pop(model_dir).close()
+        self._sizes.pop(model_dir, None)
+
+    def _evict(self, keep: str):
+        total = sum(self._sizes.values())
+        for model_dir in list(self._entries):
+            if total <= self.max_bytes:
+                return
+            if model_dir == keep:
+                continue
+            total -= self._sizes.get(model_dir, 0)
+            self._discard(model_dir)
+            self.evictions += 1
+            logger.info(f"Modelo {model_dir} removido da memória (orçamento de {self.max_bytes} bytes).")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "loaded_bytes": sum(self._sizes.values()),
+                "evictions": self.evictions,
+                "models": [
+                    {**cache.stats(), "model_dir": model_dir, "estimated_bytes": self._sizes.get(model_dir, 0)}
+                    for model_dir, cache in self._entries.items()
+                ],
+            }
@@ -0,0 +1,151 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    # Só para anotações: o Trainer importa o scikit-learn, que o motor compilado dispensa.
+    from training_pipeline.trainer import Trainer
+
+# Custo aproximado de uma entrada além do valor: chave, tupla e nó do OrderedDict.
+_ENTRY_OVERHEAD_BYTES = 160
+
+
+class PredictionResultCache:
+    """
+    Cache de predições por linha de features, para tráfego que repete as mesmas linhas.
+
+    A chave é o hash de 64 bits (pandas.util.hash_pandas_object) da linha já pré-processada,
+    então linhas que só diferem em colunas descartadas ou em valores ausentes imputados com o
+    mesmo valor compartilham a entrada. As entradas pertencem à impressão digital do modelo
+    informada em `reset`, chamado a cada carga de artefato, que também descarta o cache inteiro.
+    Predições feitas com outra impressão digital (por exemplo, pelo modelo anterior durante a
+    troca) passam direto pelo modelo, sem ler nem gravar entradas.
+
+    As linhas ausentes de um lote são deduplicadas e avaliadas em uma única chamada ao modelo.
+    A memória é limitada por `max_bytes` (despejo LRU) e cada entrada expira após `ttl_seconds`.
+    Lotes com mais de `max_batch_rows` linhas passam direto pelo modelo: o custo de consultar
+    linha a linha não compensa em cargas em lote.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 ** 2,
+        ttl_seconds: Optional[float] = 300.0,
+        max_batch_rows: int = 100_000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_batch_rows = max_batch_rows
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # hash da linha -> (predição, expira_em, bytes)
+        self._bytes = 0
+        self._fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def reset(self, fingerprint: Hashable):
+        """
+        Descarta todas as entradas e passa a aceitar apenas a impressão digital informada.
+        """
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._fingerprint = fingerprint
+
+    def _lookup(self, fingerprint: Hashable, hashes: np.ndarray, now: float) -> Optional[list]:
+        results = [None] * len(hashes)
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                return None
+            for i, key in enumerate(hashes.tolist()):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[1] is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self._bytes -= entry[2]
+                    self.expirations += 1
+                    continue
+                self._entries.move_to_end(key)
+                results[i] = entry
+        return results
+
+    def _store(self, fingerprint: Hashable, keys: list, values: list, now: float):
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            # O modelo pode ter sido trocado enquanto estas linhas eram avaliadas.
+            if fingerprint != self._fingerprint:
+                return
+            for key, value in zip(keys, values):
+                size = _ENTRY_OVERHEAD_BYTES + sys.getsizeof(value)
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._bytes -= previous[2]
+                self._entries[key] = (value, expires_at, size)
+                self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, _, size) = self._entries.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+
+    def predict(
+        self,
+        trainer: "Trainer",
+        data: pd.DataFrame,
+        fingerprint: Hashable,
+        columns_to_drop: Optional[List[str]] = None
+    ) -> list:
+        """
+        Retorna as predições de `data` na ordem das linhas, avaliando no modelo só as que
+        não estão no cache para a impressão digital `fingerprint`.
+        """
+        features = trainer.transform(data, columns_to_drop=columns_to_drop)
+        entries = None
+        if len(features) <= self.max_batch_rows:
+            hashes = pd.util.hash_pandas_object(features, index=False).to_numpy()
+            now = self._clock()
+            entries = self._lookup(fingerprint, hashes, now)
+        if entries is None:
+            return trainer.predict_features(features).tolist()
+
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        with self._lock:
+            self.hits += len(entries) - len(missing)
+            self.misses += len(missing)
+
+        results = [entry[0] if entry is not None else None for entry in entries]
+        if missing:
+            # Linhas repetidas dentro do lote são avaliadas uma única vez.
+            unique_hashes, first, inverse = np.unique(hashes[missing], return_index=True, return_inverse=True)
+            positions = np.asarray(missing)[first]
+            values = trainer.predict_features(features.iloc[positions]).tolist()
+            for i, value_index in zip(missing, inverse.tolist()):
+                results[i] = values[value_index]
+            self._store(fingerprint, unique_hashes.tolist(), values, now)
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "cached_bytes": self._bytes,
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
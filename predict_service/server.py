@@ -0,0 +1,244 @@
+"""
+Servidor pre-fork do Predict Service.
+
+O processo pai importa a aplicação (e com ela numpy, pandas e o motor de predição), carrega o
+modelo padrão, congela o heap com gc.freeze e só então cria os workers com fork. Os workers
+herdam essas páginas em copy-on-write: o modelo e as bibliotecas ocupam memória uma vez, não
+uma vez por worker. Todos aceitam conexões do mesmo socket, aberto pelo pai antes do fork, de
+modo que uma requisição lenta ocupa só um worker.
+
+O pai não atende requisições. Ele recria workers que morrem e, quando o artefato do modelo
+padrão muda (nova versão promovida ou novo model.pkl), carrega o novo modelo e troca os
+workers um a um: o substituto é criado primeiro e o antigo recebe SIGTERM, terminando as
+requisições em andamento (desligamento gracioso do uvicorn). SIGHUP força essa troca; SIGTERM
+e SIGINT encerram tudo. As métricas de /metrics são por worker.
+
+Uso:
+    python -m predict_service.server --host 0.0.0.0 --port 8002 --workers 4
+"""
+import os
+import gc
+import sys
+import time
+import socket
+import signal
+import logging
+import argparse
+from typing import Dict, Optional
+
+import uvicorn
+
+import predict_service.main as predict_main
+from predict_service.model_cache import _file_signature
+from training_pipeline.registry import ARTIFACT_FILE
+
+logger = logging.getLogger(__name__)
+
+PREDICT_WORKERS = int(os.environ.get("PREDICT_WORKERS", "0")) or os.cpu_count() or 1
+# Intervalo entre verificações do artefato do modelo padrão no processo pai.
+PREDICT_RELOAD_INTERVAL_SECONDS = float(os.environ.get("PREDICT_RELOAD_INTERVAL_SECONDS", "5"))
+# Tempo que um worker tem para terminar as requisições em andamento antes do SIGKILL.
+PREDICT_GRACEFUL_TIMEOUT_SECONDS = float(os.environ.get("PREDICT_GRACEFUL_TIMEOUT_SECONDS", "30"))
+
+
+class _NotifyingServer(uvicorn.Server):
+    """
+    Servidor uvicorn que avisa o pai, por um pipe, quando já está aceitando conexões.
+    """
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        os.write(self.ready_fd, b"1")
+        os.close(self.ready_fd)
+
+
+class PreforkServer:
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 8002,
+        workers: int = PREDICT_WORKERS,
+        reload_interval: float = PREDICT_RELOAD_INTERVAL_SECONDS,
+        graceful_timeout: float = PREDICT_GRACEFUL_TIMEOUT_SECONDS,
+        log_level: str = "info"
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.reload_interval = reload_interval
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.socket = None
+        self.children: Dict[int, float] = {}  # pid -> início
+        self.model_key = None
+        self._stopping = False
+        self._restart_requested = False
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _current_model_key(self) -> Optional[tuple]:
+        try:
+            model_dir = predict_main.model_store.resolve_dir()
+        except (FileNotFoundError, ValueError):
+            return None
+        return model_dir, _file_signature(os.path.join(model_dir, ARTIFACT_FILE))
+
+    def preload(self):
+        """
+        Carrega o modelo padrão no pai e congela o heap, para que os próximos workers o herdem.
+        """
+        gc.unfreeze()
+        predict_main.model_store.clear()
+        self.model_key = self._current_model_key()
+        if self.model_key is not None:
+            try:
+                predict_main.model_store.get()
+                logger.info(f"Modelo pré-carregado no processo pai: {self.model_key[0]}")
+            except Exception as e:
+                # Os workers sobem mesmo assim e tentam carregar o modelo na primeira requisição.
+                logger.error(f"Erro ao pré-carregar o modelo: {e}")
+        gc.collect()
+        # Objetos congelados não são mais visitados pelo coletor, que de outra forma escreveria
+        # nos cabeçalhos de todos eles e copiaria as páginas compartilhadas em cada worker.
+        gc.freeze()
+
+    def _spawn(self) -> int:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+                signal.signal(sig, signal.SIG_DFL)
+            code = 0
+            try:
+                config = uvicorn.Config(predict_main.app, log_level=self.log_level)
+                _NotifyingServer(config, write_fd).run(sockets=[self.socket])
+            except BaseException:
+                logger.exception("Worker encerrado com erro.")
+                code = 1
+            finally:
+                os._exit(code)
+
+        os.close(write_fd)
+        self.children[pid] = time.monotonic()
+        try:
+            # Espera o worker começar a aceitar conexões (ou morrer, fechando o pipe).
+            ready = os.read(read_fd, 1)
+        finally:
+            os.close(read_fd)
+        if not ready:
+            logger.error(f"Worker {pid} não iniciou.")
+            # Evita recriar em laço um worker que falha na inicialização.
+            time.sleep(1)
+        return pid
+
+    def _stop_worker(self, pid: int):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + self.graceful_timeout
+        try:
+            while time.monotonic() < deadline:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+                if done:
+                    break
+                time.sleep(0.05)
+            else:
+                logger.warning(f"Worker {pid} não terminou em {self.graceful_timeout}s; enviando SIGKILL.")
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+        self.children.pop(pid, None)
+
+    def rolling_restart(self):
+        """
+        Troca os workers um a um; a capacidade nunca fica abaixo de `workers`.
+        """
+        for pid in list(self.children):
+            if self._stopping:
+                return
+            self._spawn()
+            self._stop_worker(pid)
+        logger.info(f"Workers reiniciados: {sorted(self.children)}")
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self.children.pop(pid, None) is not None and not self._stopping:
+                logger.warning(f"Worker {pid} terminou inesperadamente (status {status}); criando outro.")
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_hup(self, signum, frame):
+        self._restart_requested = True
+
+    def run(self):
+        self.socket = self._bind()
+        self.preload()
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_hup)
+        logger.info(f"Servidor pre-fork em {self.host}:{self.port} com {self.workers} workers.")
+
+        next_check = time.monotonic() + self.reload_interval
+        try:
+            while not self._stopping:
+                self._reap()
+                while len(self.children) < self.workers and not self._stopping:
+                    self._spawn()
+
+                if time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.reload_interval
+                    if self._current_model_key() != self.model_key:
+                        logger.info("Novo modelo detectado; recarregando e reiniciando os workers.")
+                        self._restart_requested = True
+                        self.preload()
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self.rolling_restart()
+                time.sleep(0.2)
+        finally:
+            for pid in list(self.children):
+                self._stop_worker(pid)
+            self.socket.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("PREDICT_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PREDICT_PORT", "8002")))
+    parser.add_argument("--workers", type=int, default=PREDICT_WORKERS)
+    parser.add_argument("--reload-interval", type=float, default=PREDICT_RELOAD_INTERVAL_SECONDS)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    PreforkServer(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload_interval=args.reload_interval,
+        log_level=args.log_level
+    ).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
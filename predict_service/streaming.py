@@ -0,0 +1,93 @@
+import io
+import csv
+import json
+import logging
+import itertools
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dataset_manager.compression import csv_compression
+
+if TYPE_CHECKING:
+    # Só para anotações: o Trainer importa o scikit-learn, que o motor compilado dispensa.
+    from training_pipeline.trainer import Trainer
+
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def read_csv_chunks(file, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Lê o CSV em blocos de `chunk_size` linhas.
+
+    O primeiro bloco é lido imediatamente para que erros de formato sejam
+    detectados antes do início da resposta, enquanto ainda é possível devolver 400.
+    """
+    reader = pd.read_csv(file, chunksize=chunk_size, compression=csv_compression(file))
+    first = next(reader, None)
+    if first is None:
+        return iter(())
+    return itertools.chain([first], reader)
+
+
+def _encode_ndjson(predictions: np.ndarray, start_row: int) -> str:
+    return "".join(
+        json.dumps({"row": row, "prediction": value}) + "\n"
+        for row, value in enumerate(predictions.tolist(), start=start_row)
+    )
+
+
+def _encode_csv(predictions: np.ndarray) -> str:
+    # Rótulos em texto podem conter vírgulas, aspas ou quebras de linha e precisam ser escapados.
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows([value] for value in predictions.tolist())
+    return buffer.getvalue()
+
+
+def _encode_error(error: Exception, output_format: str, row: int) -> str:
+    message = f"Erro ao fazer predições a partir da linha {row}: {error}"
+    if output_format == "csv":
+        # Linha marcada para que o cliente diferencie uma falha de um resultado completo.
+        return f"#ERROR,{json.dumps(message)}\n"
+    return json.dumps({"error": message, "row": row}) + "\n"
+
+
+def stream_predictions(
+    trainer: "Trainer",
+    chunks: Iterable[pd.DataFrame],
+    output_format: str = "ndjson",
+    columns_to_drop: Optional[List[str]] = None
+) -> Iterator[str]:
+    """
+    Gera o corpo da resposta em NDJSON ou CSV, um bloco de predições por vez.
+    A memória usada fica limitada ao tamanho do bloco, e não ao do arquivo.
+
+    Como o status 200 já foi enviado, um erro em um bloco posterior encerra o corpo com
+    um registro de erro (`{"error": ...}` em NDJSON ou uma linha `#ERROR` em CSV).
+    """
+    if output_format == "csv":
+        yield "prediction\n"
+
+    row = 0
+    predictions_iter = trainer.predict_iter(chunks, columns_to_drop=columns_to_drop)
+    while True:
+        try:
+            predictions = next(predictions_iter)
+        except StopIteration:
+            return
+        except Exception as e:
+            logger.error(f"Erro ao fazer predições em streaming a partir da linha {row}: {e}")
+            yield _encode_error(e, output_format, row)
+            return
+
+        if output_format == "csv":
+            yield _encode_csv(predictions)
+        else:
+            yield _encode_ndjson(predictions, row)
+        row += len(predictions)
@@ -1,21 +1,73 @@
+import asyncio
+import gzip
+import time
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
 # from api_service.main import app
+import api_service.main as api_main
 from api_service.main import app
 
 client = TestClient(app)
 
-def test_root_status():
-    with patch('requests.get') as mock_get:
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"status": "ok"}
-        mock_get.return_value = mock_response
 
-        response = client.get("/")
-        assert response.status_code == 200
-        assert response.json()["message"] == "API Front ativa!"
+@pytest.fixture
+def mock_services(monkeypatch):
+    """
+    Substitui o cliente HTTP compartilhado do gateway por um MockTransport.
+    Retorna uma função que registra o handler e a lista de requisições recebidas.
+    """
+    requests_seen = []
+
+    def install(handler):
+        def recording_handler(request):
+            requests_seen.append(request)
+            return handler(request)
+
+        monkeypatch.setattr(
+            api_main, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(recording_handler))
+        )
+        monkeypatch.setitem(api_main._health_cache, "value", None)
+        return requests_seen
+
+    return install
+
+def test_root_status(mock_services):
+    mock_services(lambda request: httpx.Response(200, json={"status": "ok"}))
+
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.json()["message"] == "API Front ativa!"
+    assert response.json()["trainer_status"] == {"status": "ok"}
+
+def test_root_status_service_down_and_cache(mock_services):
+    def handler(request):
+        if request.url.host == "trainer":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"status": "ok"})
+
+    requests_seen = mock_services(handler)
+
+    first = client.get("/").json()
+    second = client.get("/").json()
+    assert "error" in first["trainer_status"]
+    assert first["predict_status"] == {"status": "ok"}
+    assert second == first
+    assert len(requests_seen) == 2
+
+def test_root_status_probes_run_concurrently(monkeypatch):
+    class SlowTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            await asyncio.sleep(0.3)
+            return httpx.Response(200, json={"status": "ok"})
+
+    monkeypatch.setattr(api_main, "http_client", httpx.AsyncClient(transport=SlowTransport()))
+    monkeypatch.setitem(api_main._health_cache, "value", None)
+
+    start = time.monotonic()
+    response = client.get("/")
+    assert response.status_code == 200
+    assert time.monotonic() - start < 0.55
 
 def test_train_invalid_file_type():
     response = client.post(
@@ -30,28 +82,37 @@ def test_train_invalid_file_type():
     assert response.status_code == 400
     assert response.json()["detail"] == "Apenas arquivos CSV são suportados."
 
-def test_train_success():
-    with patch('requests.post') as mock_post:
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"status": "training started"}
-        mock_post.return_value = mock_response
-
-        with open("test.csv", "w") as f:
-            f.write("col1,col2,target\n1,2,0\n3,4,1")
-
-        with open("test.csv", "rb") as f:
-            response = client.post(
-                "/train",
-                files={"dataset_file": ("test.csv", f)},
-                data={
-                    "model_type": "RandomForestClassifier",
-                    "model_params": "{}",
-                    "target_column": "target"
-                }
-            )
-        assert response.status_code == 200
-        assert response.json()["status"] == "training started"
+def test_train_success(mock_services, tmp_path):
+    requests_seen = mock_services(lambda request: httpx.Response(200, json={"status": "training started"}))
+
+    path = tmp_path / "test.csv"
+    path.write_text("col1,col2,target\n1,2,0\n3,4,1")
+
+    with open(path, "rb") as f:
+        response = client.post(
+            "/train",
+            files={"dataset_file": ("test.csv", f)},
+            data={
+                "model_type": "RandomForestClassifier",
+                "model_params": "{}",
+                "target_column": "target"
+            }
+        )
+    assert response.status_code == 200
+    assert response.json()["status"] == "training started"
+    assert str(requests_seen[0].url) == f"{api_main.TRAINER_URL}/train"
+    assert b"col1,col2,target" in requests_seen[0].content
+
+def test_train_downstream_error(mock_services):
+    mock_services(lambda request: httpx.Response(500, json={"detail": "erro"}))
+
+    response = client.post(
+        "/train",
+        files={"dataset_file": ("test.csv", b"col1,target\n1,0", "text/csv")},
+        data={"target_column": "target"}
+    )
+    assert response.status_code == 500
+    assert "Erro ao chamar Trainer Service" in response.json()["detail"]
 
 def test_predict_invalid_file_type():
     response = client.post(
@@ -62,21 +123,318 @@ def test_predict_invalid_file_type():
     assert response.status_code == 400
     assert response.json()["detail"] == "Apenas arquivos CSV são suportados."
 
-def test_predict_success():
-    with patch('requests.post') as mock_post:
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"predictions": [0, 1]}
-        mock_post.return_value = mock_response
-
-        with open("test.csv", "w") as f:
-            f.write("col1,col2\n1,2\n3,4")
-
-        with open("test.csv", "rb") as f:
-            response = client.post(
-                "/predict",
-                files={"input_file": ("test.csv", f)},
-                data={"columns_to_drop": None}
-            )
-        assert response.status_code == 200
-        assert response.json()["predictions"] == [0, 1]
\ No newline at end of file
+def test_predict_success(mock_services, tmp_path):
+    mock_services(lambda request: httpx.Response(200, json={"predictions": [0, 1]}))
+
+    path = tmp_path / "test.csv"
+    path.write_text("col1,col2\n1,2\n3,4")
+
+    with open(path, "rb") as f:
+        response = client.post(
+            "/predict",
+            files={"input_file": ("test.csv", f)},
+            data={"columns_to_drop": None}
+        )
+    assert response.status_code == 200
+    assert response.json()["predictions"] == [0, 1]
+
+
+def test_predict_stream_success(mock_services):
+    async def body():
+        yield b'{"row": 0, "prediction": 1}\n'
+
+    mock_services(lambda request: httpx.Response(
+        200,
+        content=body(),
+        headers={"content-type": "application/x-ndjson"}
+    ))
+
+    response = client.post(
+        "/predict/stream",
+        files={"input_file": ("test.csv", b"col1,col2\n1,2", "text/csv")},
+        data={"output_format": "ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.text == '{"row": 0, "prediction": 1}\n'
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+
+@pytest.mark.parametrize("status, headers", [(400, {}), (406, {}), (503, {"Retry-After": "2"}), (504, {})])
+def test_predict_stream_forwards_service_errors(mock_services, status, headers):
+    mock_services(lambda request: httpx.Response(status, json={"detail": "recusado"}, headers=headers))
+
+    response = client.post(
+        "/predict/stream",
+        files={"input_file": ("test.csv", b"col1,col2\n1,2", "text/csv")},
+    )
+    assert response.status_code == status
+    assert response.json()["detail"] == "recusado"
+    assert response.headers.get("Retry-After") == headers.get("Retry-After")
+
+
+def test_predict_records_success(mock_services):
+    requests_seen = mock_services(lambda request: httpx.Response(200, json={"predictions": [1]}))
+
+    response = client.post("/predict/records", json={"records": [{"col1": 1, "col2": 2}]})
+    assert response.status_code == 200
+    assert response.json()["predictions"] == [1]
+    assert b'"records": [{"col1": 1, "col2": 2}]' in requests_seen[0].content
+
+
+def test_train_forwards_job_accepted(mock_services):
+    mock_services(lambda request: httpx.Response(202, json={"job_id": "abc", "status": "queued"}))
+
+    response = client.post(
+        "/train",
+        files={"dataset_file": ("test.csv", b"col1,target\n1,0", "text/csv")},
+        data={"target_column": "target", "owner": "time-a"}
+    )
+    assert response.status_code == 202
+    assert response.json() == {"job_id": "abc", "status": "queued"}
+
+
+def test_train_queue_full_is_forwarded(mock_services):
+    mock_services(lambda request: httpx.Response(429, json={"detail": "Fila de treinamento cheia."}))
+
+    response = client.post(
+        "/train",
+        files={"dataset_file": ("test.csv", b"col1,target\n1,0", "text/csv")},
+        data={"target_column": "target"}
+    )
+    assert response.status_code == 429
+    assert response.json()["detail"] == "Fila de treinamento cheia."
+
+
+def test_get_job_success(mock_services):
+    requests_seen = mock_services(lambda request: httpx.Response(200, json={"job_id": "abc", "status": "running"}))
+
+    response = client.get("/jobs/abc")
+    assert response.status_code == 200
+    assert response.json()["status"] == "running"
+    assert str(requests_seen[0].url) == f"{api_main.TRAINER_URL}/jobs/abc"
+
+
+def test_get_job_not_found(mock_services):
+    mock_services(lambda request: httpx.Response(404, json={"detail": "Job não encontrado."}))
+
+    response = client.get("/jobs/unknown")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Job não encontrado."
+
+
+def test_cancel_job_conflict(mock_services):
+    requests_seen = mock_services(lambda request: httpx.Response(409, json={"detail": "Job em execução."}))
+
+    response = client.delete("/jobs/abc")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Job em execução."
+    assert requests_seen[0].method == "DELETE"
+
+
+def test_cancel_job_service_error(mock_services):
+    mock_services(lambda request: httpx.Response(500, text="erro"))
+
+    response = client.delete("/jobs/abc")
+    assert response.status_code == 500
+    assert "Erro ao chamar Trainer Service" in response.json()["detail"]
+
+
+def test_predict_invalid_json_from_service(mock_services):
+    mock_services(lambda request: httpx.Response(200, text="<html>proxy error</html>"))
+
+    response = client.post(
+        "/predict",
+        files={"input_file": ("test.csv", b"col1,col2\n1,2", "text/csv")}
+    )
+    assert response.status_code == 500
+    assert "Erro ao chamar Predict Service" in response.json()["detail"]
+
+
+def test_root_status_invalid_json_from_service(mock_services):
+    mock_services(lambda request: httpx.Response(200, text="not json"))
+
+    response = client.get("/")
+    assert response.status_code == 200
+    assert "error" in response.json()["trainer_status"]
+
+
+def test_predict_forwards_model_and_version(mock_services):
+    requests_seen = mock_services(lambda request: httpx.Response(200, json={"predictions": [1]}))
+
+    response = client.post(
+        "/predict",
+        files={"input_file": ("test.csv", b"col1,col2\n1,2", "text/csv")},
+        data={"model": "churn", "version": "v1"}
+    )
+    assert response.status_code == 200
+    assert b'name="model"\r\n\r\nchurn' in requests_seen[0].content
+    assert b'name="version"\r\n\r\nv1' in requests_seen[0].content
+
+
+def test_predict_model_not_found_is_forwarded(mock_services):
+    mock_services(lambda request: httpx.Response(404, json={"detail": "Modelo não encontrado."}))
+
+    response = client.post("/predict/records", json={"records": [{"col1": 1}], "model": "missing"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Modelo não encontrado."
+
+
+def test_list_and_promote_models(mock_services):
+    def handler(request):
+        if request.method == "GET":
+            return httpx.Response(200, json={"models": {"churn": {"latest": "v1", "versions": ["v1", "v2"]}}})
+        return httpx.Response(200, json={"model_name": "churn", "latest": "v2"})
+
+    requests_seen = mock_services(handler)
+
+    assert client.get("/models").json()["models"]["churn"]["latest"] == "v1"
+    response = client.post("/models/churn/promote", data={"version": "v2"})
+    assert response.status_code == 200
+    assert str(requests_seen[1].url) == f"{api_main.TRAINER_URL}/models/churn/promote"
+    assert requests_seen[1].content == b"version=v2"
+
+
+def test_train_with_dataset_hash_only(mock_services):
+    requests_seen = mock_services(lambda request: httpx.Response(202, json={"job_id": "abc", "status": "queued"}))
+
+    response = client.post("/train", data={"target_column": "target", "dataset_hash": "ab" * 32})
+    assert response.status_code == 202
+    assert b"dataset_hash=" + b"ab" * 32 in requests_seen[0].content
+
+    assert client.post("/train", data={"target_column": "target"}).status_code == 400
+
+
+def test_train_forwards_distributed_workers(mock_services):
+    requests_seen = mock_services(lambda request: httpx.Response(202, json={"job_id": "abc", "status": "queued"}))
+
+    data = {"target_column": "target", "dataset_hash": "ab" * 32}
+    assert client.post("/train", data={**data, "distributed_workers": "3"}).status_code == 202
+    assert client.post("/train", data=data).status_code == 202
+    assert b"distributed_workers=3" in requests_seen[0].content
+    # Sem o campo, o Trainer decide o padrão.
+    assert b"distributed_workers" not in requests_seen[1].content
+
+
+def test_tune_forwards_search_and_client_errors(mock_services):
+    def handler(request):
+        if b"bayes" in request.content:
+            return httpx.Response(400, json={"detail": "Estratégia de busca 'bayes' não suportada."})
+        return httpx.Response(202, json={"job_id": "abc", "status": "queued"})
+
+    requests_seen = mock_services(handler)
+
+    response = client.post(
+        "/tune",
+        files={"dataset_file": ("test.csv", b"col1,target\n1,0", "text/csv")},
+        data={"param_grid": '{"max_depth": [2, 4]}', "cv": "3"}
+    )
+    assert response.status_code == 202
+    assert str(requests_seen[0].url) == f"{api_main.TRAINER_URL}/tune"
+    assert b'name="cv"\r\n\r\n3' in requests_seen[0].content
+
+    response = client.post("/tune", data={"param_grid": "{}", "search": "bayes"})
+    assert response.status_code == 400
+    assert "bayes" in response.json()["detail"]
+
+
+def test_retrain_forwards_base_version(mock_services):
+    def handler(request):
+        if b"inexistente" in request.content:
+            return httpx.Response(404, json={"detail": "Modelo 'inexistente' não encontrado."})
+        return httpx.Response(202, json={"job_id": "abc", "status": "queued"})
+
+    requests_seen = mock_services(handler)
+
+    response = client.post(
+        "/retrain",
+        files={"dataset_file": ("delta.csv", b"col1,target\n1,0", "text/csv")},
+        data={"version": "v1", "n_estimators": "5"}
+    )
+    assert response.status_code == 202
+    assert str(requests_seen[0].url) == f"{api_main.TRAINER_URL}/retrain"
+    assert b'name="version"\r\n\r\nv1' in requests_seen[0].content
+
+    response = client.post("/retrain", data={"model_name": "inexistente", "dataset_hash": "x"})
+    assert response.status_code == 404
+
+
+def test_request_id_is_propagated_to_services(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("X-Request-ID"))
+        return httpx.Response(200, json={"predictions": [1]})
+
+    monkeypatch.setattr(
+        api_main,
+        "http_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(handler), event_hooks=api_main.HTTP_EVENT_HOOKS),
+    )
+    files = {"input_file": ("test.csv", b"x1\n1\n", "text/csv")}
+
+    response = client.post("/predict", files=files, headers={"X-Request-ID": "req-123"})
+
+    assert response.status_code == 200
+    assert seen == ["req-123"]
+    assert response.headers["X-Request-ID"] == "req-123"
+    assert "upstream_predict;dur=" in response.headers["Server-Timing"]
+
+
+def test_predict_passes_binary_body_through(mock_services):
+    seen = {}
+    body = b"\x93NUMPY binary"
+
+    def handler(request):
+        seen["accept"] = request.headers.get("Accept")
+        return httpx.Response(200, content=body, headers={"content-type": "application/x-npy"})
+
+    mock_services(handler)
+    response = client.post(
+        "/predict",
+        files={"input_file": ("test.csv", b"x1\n1\n", "text/csv")},
+        headers={"Accept": "application/x-npy"},
+    )
+
+    assert response.status_code == 200
+    assert seen["accept"] == "application/x-npy"
+    assert response.headers["content-type"] == "application/x-npy"
+    assert response.content == body
+
+
+def test_predict_forwards_overload_with_retry_after(mock_services):
+    seen = {}
+
+    def handler(request):
+        seen["timeout"] = request.headers.get("X-Request-Timeout")
+        return httpx.Response(503, json={"detail": "Serviço sobrecarregado."}, headers={"Retry-After": "3"})
+
+    mock_services(handler)
+    response = client.post("/predict", files={"input_file": ("test.csv", b"x1\n1\n", "text/csv")})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert seen["timeout"] == str(api_main.HTTP_TIMEOUT)
+
+
+
+def test_compressed_uploads_are_forwarded_unchanged(mock_services):
+    body = gzip.compress(b"x1\n1\n")
+    requests_seen = mock_services(lambda request: httpx.Response(200, json={"predictions": [0]}))
+
+    response = client.post("/predict", files={"input_file": ("test.csv.gz", body, "application/gzip")})
+    assert response.status_code == 200
+    assert body in requests_seen[0].content
+    assert b"Content-Type: application/gzip" in requests_seen[0].content
+
+    response = client.post(
+        "/predict",
+        files={"input_file": ("test.csv", body, "text/csv", {"Content-Encoding": "gzip"})},
+    )
+    assert response.status_code == 200
+    assert b"Content-Encoding: gzip" in requests_seen[1].content
+
+    response = client.post(
+        "/predict",
+        files={"input_file": ("test.csv", body, "text/csv", {"Content-Encoding": "br"})},
+    )
+    assert response.status_code == 400
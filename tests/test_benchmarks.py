@@ -0,0 +1,83 @@
+import pytest
+
+import predict_service.main as predict_main
+import trainer_service.main as trainer_main
+from benchmarks.load_test import DEFAULT_MIX, parse_mix, run_load_test, schedule, summarize
+from benchmarks.suite import SHAPES, compare, generate_dataset, run_case
+
+
+def report(seconds, peak_rss_mb=100.0):
+    return {"cases": {"m/narrow/1000": {"stages": {"train": {"seconds": seconds, "peak_rss_mb": peak_rss_mb}}}}}
+
+
+def test_generate_dataset_is_deterministic():
+    first = generate_dataset("categorical", 500, classification=True)
+    second = generate_dataset("categorical", 500, classification=True)
+
+    assert first.equals(second)
+    assert first.shape == (500, sum(SHAPES["categorical"]) + 1)
+    assert set(first["target"].unique()) <= {0, 1}
+    assert first["cat_0"].isna().any()
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = report(1.0)
+
+    assert compare(report(1.2), baseline, threshold=0.25) == []
+    assert compare(report(0.5), baseline, threshold=0.25) == []
+    regressions = compare(report(1.5, peak_rss_mb=200.0), baseline, threshold=0.25)
+    assert {(r["stage"], r["metric"]) for r in regressions} == {("train", "seconds"), ("train", "peak_rss_mb")}
+    assert compare(report(1.5), {"cases": {}}, threshold=0.25) == []
+
+
+def test_run_case_measures_every_stage(monkeypatch):
+    # run_case troca o estado global dos serviços; o monkeypatch restaura ao final.
+    for name in ("MODEL_DIR", "registry", "dataset_cache", "job_manager"):
+        monkeypatch.setattr(trainer_main, name, getattr(trainer_main, name))
+    monkeypatch.setattr(predict_main, "model_store", predict_main.model_store)
+
+    stages = run_case("GaussianNB", "narrow", 200, repeat=1)
+
+    assert set(stages) == {
+        "preprocess_train", "train", "load_model", "preprocess_predict", "predict", "api_train", "api_predict"
+    }
+    assert all(stage["seconds"] > 0 for stage in stages.values())
+    assert stages["predict"]["rows_per_second"] > 0
+
+
+def test_load_test_mix_and_open_loop_schedule():
+    assert parse_mix("batch=2,record=1,train=1") == {"batch": 0.5, "record": 0.25, "train": 0.25}
+    assert parse_mix("record=1,train=0") == {"record": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("upload=1")
+
+    plan = schedule(rps=200, duration=5, mix={"batch": 0.75, "record": 0.25}, seed=1)
+    times = [offset for offset, _ in plan]
+    assert times == sorted(times) and times[-1] < 5
+    assert 900 < len(plan) < 1100
+    assert 0.7 < sum(kind == "batch" for _, kind in plan) / len(plan) < 0.8
+    assert schedule(rps=200, duration=5, mix={"batch": 0.75, "record": 0.25}, seed=1) == plan
+
+
+def test_load_test_summary_counts_errors_and_percentiles():
+    samples = [(200, i / 1000) for i in range(1, 99)] + [(503, 0.5), (0, 1.0)]
+
+    summary = summarize(samples, elapsed=2.0)
+
+    assert summary["requests"] == 100 and summary["ok"] == 98 and summary["errors"] == 2
+    assert summary["error_rate"] == 0.02
+    assert summary["throughput_rps"] == 49.0
+    assert summary["status_counts"] == {"200": 98, "503": 1, "connection_error": 1}
+    assert summary["p50_ms"] == pytest.approx(50.5)
+    assert summary["max_ms"] == 1000.0
+    assert summarize([], elapsed=1.0)["requests"] == 0
+
+
+def test_load_test_runs_against_local_stack():
+    report = run_load_test(rps=5, duration=1, mix=parse_mix(DEFAULT_MIX), batch_rows=20, train_rows=200,
+                           model_params='{"n_estimators": 5}')
+
+    assert report["total"]["requests"] == report["scheduled"] - report["dropped"]
+    assert report["total"]["errors"] == 0
+    assert set(report["services"]) == {"api", "trainer", "predict"}
+    assert all(entry["peak_rss_mb"] > 0 for entry in report["services"].values())
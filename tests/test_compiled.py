@@ -0,0 +1,106 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from predict_service.model_cache import ModelCache
+from training_pipeline.compiled import COMPILED_ARTIFACT_FILE, CompiledPredictor, compile_model
+from training_pipeline.trainer import Trainer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+rng = np.random.default_rng(0)
+X = pd.DataFrame(rng.normal(size=(600, 5)), columns=["a", "b", "c", "d", "e"])
+X["code"] = rng.integers(0, 4, 600).astype(np.int8)
+X_NEW = pd.DataFrame(rng.normal(size=(300, 5)), columns=["a", "b", "c", "d", "e"])
+X_NEW["code"] = rng.integers(-1, 5, 300).astype(np.int8)
+Y_BINARY = (X["a"] + X["b"] > 0).astype(int)
+Y_MULTI = np.array(["x", "y", "z"])[rng.integers(0, 3, 600)]
+
+
+@pytest.mark.parametrize("model, y", [
+    (RandomForestClassifier(n_estimators=15, random_state=0), Y_MULTI),
+    (RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0), Y_BINARY),
+    (LogisticRegression(max_iter=500), Y_BINARY),
+    (LogisticRegression(max_iter=500), Y_MULTI),
+    (LogisticRegression(multi_class="ovr", max_iter=500), Y_MULTI),
+])
+def test_compiled_classifier_is_bit_identical(model, y):
+    model.fit(X, y)
+    compiled = compile_model(model)
+
+    assert np.array_equal(compiled.predict(X_NEW), model.predict(X_NEW))
+    assert compiled.predict_proba(X_NEW).tobytes() == model.predict_proba(X_NEW).tobytes()
+
+
+def test_compiled_regressor_is_bit_identical():
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, X["a"] * 3 + X["code"])
+    assert compile_model(model).predict(X_NEW).tobytes() == model.predict(X_NEW).tobytes()
+
+
+def test_trainer_exports_compiled_artifact(tmp_path):
+    data = X.assign(color=np.array(["red", "blue"])[rng.integers(0, 2, 600)], target=Y_BINARY)
+    trainer = Trainer(str(tmp_path), RandomForestClassifier, {"n_estimators": 5, "random_state": 0})
+    trainer.train(data, target_column="target")
+    assert os.path.exists(tmp_path / COMPILED_ARTIFACT_FILE)
+
+    new = data.drop(columns=["target"]).head(50)
+    predictor = CompiledPredictor(str(tmp_path))
+    predictor.load_model()
+    assert predictor.predict(new) == trainer.predict(new)
+
+    # Um modelo sem forma compilada não pode deixar para trás o artefato do modelo anterior.
+    Trainer(str(tmp_path), SGDClassifier, {"random_state": 0}).train(data, target_column="target")
+    assert not os.path.exists(tmp_path / COMPILED_ARTIFACT_FILE)
+    cache = ModelCache(str(tmp_path), engine="compiled")
+    assert cache.stats()["engine"] is None
+    cache.get()
+    assert cache.stats()["engine"] == "sklearn"
+
+
+def test_compiled_engine_serves_without_sklearn(tmp_path):
+    Trainer(str(tmp_path), LogisticRegression, {"max_iter": 500}).train(X.assign(target=Y_BINARY))
+    script = (
+        "import sys\n"
+        "import pandas as pd\n"
+        "from predict_service.model_cache import ModelCache\n"
+        f"cache = ModelCache({str(tmp_path)!r}, engine='compiled')\n"
+        "print(cache.predict(pd.DataFrame({'a': [1.0], 'b': [1.0], 'c': [0.0], 'd': [0.0], 'e': [0.0], 'code': [1]})))\n"
+        "assert not any(name.startswith('sklearn') for name in sys.modules), 'sklearn importado'\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ROOT}
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[1]"
+
+
+def test_compiled_engine_serves_records(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import predict_service.main as predict_main
+    from predict_service.model_store import ModelStore
+    from training_pipeline.registry import ModelRegistry
+
+    Trainer(str(tmp_path), RandomForestClassifier, {"n_estimators": 5, "random_state": 0}).train(
+        X.assign(target=Y_BINARY)
+    )
+    monkeypatch.setattr(
+        predict_main, "model_store", ModelStore(ModelRegistry(str(tmp_path)), legacy_dir=str(tmp_path), engine="compiled")
+    )
+    client = TestClient(predict_main.app)
+
+    response = client.post("/predict/records", json={"records": X_NEW.head(3).to_dict(orient="records")})
+    assert response.status_code == 200
+    assert len(response.json()["predictions"]) == 3
+    entry = client.get("/model/cache").json()["models"][0]
+    assert entry["engine"] == "compiled"
+    assert entry["estimated_bytes"] == os.path.getsize(os.path.join(str(tmp_path), COMPILED_ARTIFACT_FILE))
+
+    response = client.post("/predict/records", json={"records": [{"a": 1.0}]})
+    assert "Colunas ausentes" in response.json()["detail"]
@@ -0,0 +1,115 @@
+import gzip
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import zstandard
+
+from dataset_manager.dataset_cache import DatasetCache, hash_file
+from dataset_manager.dataset_manager import DatasetManager
+
+CSV = b"x1,x2,color,flag,target\n1.5,2,red,True,0\n,3,,False,1\n2.5,4,blue,True,0\n"
+
+
+def test_load_csv_round_trips_dtypes_and_missing_values(tmp_path):
+    cache = DatasetCache(str(tmp_path))
+    expected = pd.read_csv(io.BytesIO(CSV))
+
+    digest, first = cache.load_csv(io.BytesIO(CSV))
+    second_digest, second = cache.load_csv(io.BytesIO(CSV))
+
+    assert digest == second_digest == hash_file(io.BytesIO(CSV))
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_load_unknown_hash(tmp_path):
+    cache = DatasetCache(str(tmp_path))
+    with pytest.raises(KeyError):
+        cache.load("0" * 64)
+    with pytest.raises(ValueError):
+        cache.load("../escape")
+
+
+def test_evicts_least_recently_used_dataset(tmp_path):
+    cache = DatasetCache(str(tmp_path))
+    digests = []
+    for i in range(3):
+        digest, _ = cache.load_csv(io.BytesIO(CSV + f"{i},0,red,True,1\n".encode()))
+        digests.append(digest)
+        # Garante mtimes distintos mesmo em sistemas de arquivos com baixa resolução.
+        os.utime(os.path.join(str(tmp_path), digest, "meta.json"), (i, i))
+
+    entry_bytes = cache.stats()["cached_bytes"] // 3
+    cache.max_bytes = entry_bytes * 2
+    cache.load(digests[0])
+    cache.store("f" * 64, pd.DataFrame({"x": [1.0]}))
+
+    assert cache.contains(digests[0])
+    assert not cache.contains(digests[1])
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_eviction_skips_entries_still_being_written(tmp_path):
+    cache = DatasetCache(str(tmp_path), max_bytes=1)
+    # Entrada em montagem por outro escritor: já tem o meta.json, mas ainda não foi renomeada.
+    pending = tmp_path / ".dataset-other-writer"
+    pending.mkdir()
+    (pending / "meta.json").write_text("{}")
+    (pending / "0.npy").write_bytes(b"0" * 1024)
+    os.utime(pending / "meta.json", (0, 0))
+
+    digest, _ = cache.load_csv(io.BytesIO(CSV))
+    cache.store("f" * 64, pd.DataFrame({"x": [1.0]}))
+
+    assert (pending / "0.npy").exists()
+    assert not cache.contains(digest)
+    assert cache.stats()["datasets"] == 1
+
+
+def test_dataset_manager_uses_cache_for_csv(tmp_path):
+    manager = DatasetManager(cache=DatasetCache(str(tmp_path)))
+    data = manager.load_local_dataset(io.BytesIO(CSV))
+
+    digest = hash_file(io.BytesIO(CSV))
+    pd.testing.assert_frame_equal(manager.load_cached_dataset(digest), data)
+    assert np.isnan(data["x1"].iloc[1])
+
+
+def test_default_dataset_is_copied_per_call():
+    manager = DatasetManager()
+    first = manager.load_default_dataset()
+    first["target"] = -1
+    assert (manager.load_default_dataset()["target"] >= 0).all()
+
+
+def test_store_csv_in_chunks_matches_single_read(tmp_path):
+    cache = DatasetCache(str(tmp_path))
+    # x2 só ganha valores ausentes no segundo bloco; x3 só vira texto no terceiro.
+    csv = b"x1,x2,x3,color\n1,2,3,red\n2,,4,\n3,5,abc,blue\n4,6,5,red\n"
+    expected = pd.read_csv(io.BytesIO(csv))
+
+    digest = cache.store_csv(io.BytesIO(csv), chunk_size=1)
+    chunks = list(cache.iter_chunks(digest, chunk_size=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+    pd.testing.assert_frame_equal(cache.load(digest), expected)
+    assert cache.store_csv(io.BytesIO(csv), chunk_size=1) == digest
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, lambda data: zstandard.ZstdCompressor().compress(data)])
+def test_compressed_csv_is_decompressed_while_reading(tmp_path, compress):
+    cache = DatasetCache(str(tmp_path))
+    expected = pd.read_csv(io.BytesIO(CSV))
+    compressed = compress(CSV)
+
+    _, data = cache.load_csv(io.BytesIO(compressed))
+    pd.testing.assert_frame_equal(data, expected)
+    digest = cache.store_csv(io.BytesIO(compressed), chunk_size=1)
+    pd.testing.assert_frame_equal(pd.concat(cache.iter_chunks(digest, chunk_size=2)), expected)
+    pd.testing.assert_frame_equal(DatasetManager().load_local_dataset(io.BytesIO(compressed)), expected)
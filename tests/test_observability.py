@@ -0,0 +1,61 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from observability import timing
+from observability.metrics import Histogram
+from observability.middleware import install
+
+
+def make_app():
+    app = FastAPI()
+    install(app, service="test")
+
+    @app.get("/work")
+    def work():
+        with timing.stage("slow_stage"):
+            time.sleep(0.01)
+        return {"request_id": timing.current_request_id()}
+
+    return app
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5.0, stage="a")
+
+    lines = histogram.render()
+
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="a"} 3' in lines
+
+
+def test_middleware_sets_request_id_and_server_timing():
+    client = TestClient(make_app())
+
+    response = client.get("/work", headers={"X-Request-ID": "abc-1"})
+    assert response.headers["X-Request-ID"] == "abc-1"
+    assert response.json()["request_id"] == "abc-1"
+    assert "slow_stage;dur=" in response.headers["Server-Timing"]
+    assert "total;dur=" in response.headers["Server-Timing"]
+
+    # IDs inválidos são substituídos por um novo.
+    generated = client.get("/work", headers={"X-Request-ID": "bad id\twith spaces"}).headers["X-Request-ID"]
+    assert generated != "bad id\twith spaces" and len(generated) == 32
+
+
+def test_metrics_endpoint_exposes_histograms():
+    client = TestClient(make_app())
+    client.get("/work")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'stage_duration_seconds_count{service="test",stage="slow_stage"}' in response.text
+    assert 'http_request_duration_seconds_count{service="test",method="GET",handler="work",status="200"}' in response.text
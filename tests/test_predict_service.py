@@ -0,0 +1,620 @@
+import asyncio
+import gzip
+import io
+import json
+import threading
+import time
+import pytest
+import zstandard
+import httpx
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+import predict_service.main as predict_main
+from predict_service.admission import AdmissionController, ClientDisconnectedError, DeadlineExceededError, OverloadedError
+from predict_service import formats
+from predict_service.batching import BatchQueueFullError, MicroBatcher
+from predict_service.model_store import ModelStore
+from predict_service.result_cache import PredictionResultCache
+from predict_service.streaming import _encode_csv
+from training_pipeline.registry import ModelRegistry
+from training_pipeline.trainer import Trainer
+
+client = TestClient(predict_main.app)
+
+TRAIN_DF = pd.DataFrame({
+    "x1": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0],
+    "color": ["red", "blue", "red", "blue", "red", "blue", "red", "blue", "red", "blue"],
+    "target": [0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
+})
+
+PREDICT_CSV = "x1,color\n1.5,red\n8.5,blue\n"
+
+
+def train_model(model_dir, model_class=RandomForestClassifier, model_params=None):
+    trainer = Trainer(
+        model_dir=str(model_dir),
+        model_class=model_class,
+        model_params={"n_estimators": 5, "random_state": 0} if model_params is None else model_params,
+    )
+    trainer.train(TRAIN_DF.copy(), target_column="target")
+    return trainer
+
+
+def make_store(root, **kwargs):
+    return ModelStore(ModelRegistry(str(root)), legacy_dir=str(root), **kwargs)
+
+
+def register_model(root, name, **kwargs):
+    registry = ModelRegistry(str(root))
+    version = registry.new_version(name)
+    train_model(registry.version_dir(name, version), **kwargs)
+    registry.promote(name, version)
+    return version
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    train_model(tmp_path)
+    monkeypatch.setattr(predict_main, "model_store", make_store(tmp_path))
+    return tmp_path
+
+
+def post_predict(csv=PREDICT_CSV, **data):
+    return client.post(
+        "/predict",
+        files={"input_file": ("input.csv", io.BytesIO(csv.encode()), "text/csv")},
+        data=data,
+    )
+
+
+def test_predict_model_not_found(tmp_path, monkeypatch):
+    monkeypatch.setattr(predict_main, "model_store", make_store(tmp_path))
+    response = post_predict()
+    assert response.status_code == 404
+
+
+def test_predict_keeps_model_resident(model_dir):
+    first = post_predict()
+    second = post_predict()
+    assert first.status_code == 200
+    assert first.json() == second.json()
+
+    stats = client.get("/model/cache").json()["models"][0]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["reloads"] == 0
+
+
+def test_model_cache_reloads_new_artifact(model_dir):
+    cache = predict_main.model_store.get_cache(str(model_dir))
+    old_trainer = cache.get()
+
+    train_model(model_dir, model_class=LogisticRegression, model_params={})
+    # O modelo antigo continua servindo enquanto o novo é carregado em segundo plano.
+    assert cache.get() is old_trainer
+
+    deadline = time.time() + 5
+    while cache.stats()["reloads"] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert cache.stats()["reloads"] == 1
+    assert isinstance(cache.get().model, LogisticRegression)
+
+
+def test_predict_stream_ndjson_matches_batch(model_dir):
+    csv = "x1,color\n" + "".join(f"{i % 10 + 0.5},{'red' if i % 2 else 'blue'}\n" for i in range(25))
+    expected = post_predict(csv).json()["predictions"]
+
+    response = client.post(
+        "/predict/stream",
+        files={"input_file": ("input.csv", io.BytesIO(csv.encode()), "text/csv")},
+        data={"chunk_size": "7", "output_format": "ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["row"] for line in lines] == list(range(25))
+    assert [line["prediction"] for line in lines] == expected
+
+
+def test_predict_stream_csv(model_dir):
+    response = client.post(
+        "/predict/stream",
+        files={"input_file": ("input.csv", io.BytesIO(PREDICT_CSV.encode()), "text/csv")},
+        data={"chunk_size": "1", "output_format": "csv"},
+    )
+    assert response.status_code == 200
+    assert response.text.splitlines()[0] == "prediction"
+    assert len(response.text.splitlines()) == 3
+
+
+def test_stream_csv_quotes_text_labels():
+    labels = np.array(['a,b', 'say "hi"', "two\nlines", "plain", 1.5], dtype=object)
+
+    body = "prediction\n" + _encode_csv(labels)
+
+    assert pd.read_csv(io.StringIO(body))["prediction"].tolist() == ['a,b', 'say "hi"', "two\nlines", "plain", "1.5"]
+
+
+def test_predict_accepts_gzip_and_zstd_uploads(model_dir):
+    csv = ("x1,color\n" + "".join(f"{i % 10 + 0.5},{'red' if i % 2 else 'blue'}\n" for i in range(25))).encode()
+    expected = post_predict(csv.decode()).json()["predictions"]
+
+    response = client.post(
+        "/predict", files={"input_file": ("input.csv.gz", io.BytesIO(gzip.compress(csv)), "application/gzip")}
+    )
+    assert response.json()["predictions"] == expected
+
+    response = client.post(
+        "/predict/stream",
+        files={"input_file": ("input.csv.zst", io.BytesIO(zstandard.ZstdCompressor().compress(csv)), "application/zstd")},
+        data={"chunk_size": "7", "output_format": "csv"},
+    )
+    assert response.text.splitlines()[1:] == [str(value) for value in expected]
+
+
+def test_predict_stream_invalid_format(model_dir):
+    response = client.post(
+        "/predict/stream",
+        files={"input_file": ("input.csv", io.BytesIO(PREDICT_CSV.encode()), "text/csv")},
+        data={"output_format": "xml"},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_json_encoding_round_trips_floats(dtype):
+    values = np.array([0.1 + 0.2, 123456789.12345679, 2 / 3, 1.2345678901234567e-20, 1e-9], dtype=dtype)
+    probabilities = np.array([[1e-9, 1 - 1e-9], [2 / 3, 1 / 3]], dtype=dtype)
+
+    body = json.loads(formats.encode(formats.JSON, values, probabilities, np.array([0, 1])))
+
+    assert body["predictions"] == values.tolist()
+    assert body["probabilities"] == probabilities.tolist()
+    assert json.loads(formats.encode(formats.JSON, np.array([3, -1, 2 ** 40])))["predictions"] == [3, -1, 2 ** 40]
+
+
+def test_predict_records_matches_csv_predict(model_dir):
+    expected = post_predict().json()["predictions"]
+    response = client.post(
+        "/predict/records",
+        json={
+            "records": [{"color": "red", "x1": 1.5, "extra": 1}, {"x1": 8.5, "color": "blue", "extra": 2}],
+            "columns_to_drop": ["extra"],
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["predictions"] == expected
+
+
+def test_micro_batcher_groups_concurrent_requests():
+    calls = []
+
+    def predict_fn(records):
+        calls.append(len(records))
+        return [record["x"] * 10 for record in records]
+
+    batcher = MicroBatcher(predict_fn, max_batch_rows=100, max_wait_us=50_000)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit([{"x": i}, {"x": i + 1}]) for i in range(10)))
+
+    results = asyncio.run(run())
+
+    assert results == [[i * 10, (i + 1) * 10] for i in range(10)]
+    assert sum(calls) == 20
+    assert len(calls) < 10
+
+
+def test_micro_batcher_isolates_failing_request():
+    def predict_fn(records):
+        if any(record.get("bad") for record in records):
+            raise ValueError("registro inválido")
+        return [0] * len(records)
+
+    batcher = MicroBatcher(predict_fn, max_batch_rows=100, max_wait_us=50_000)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit([{"x": 1}]),
+            batcher.submit([{"bad": True}]),
+            return_exceptions=True,
+        )
+
+    ok, failed = asyncio.run(run())
+    assert ok == [0]
+    assert isinstance(failed, ValueError)
+
+
+def test_micro_batcher_bounds_queue_and_does_not_retry_rejected_batches():
+    calls = []
+    release = None
+
+    async def run_batch(fn):
+        calls.append(fn)
+        await release.wait()
+        raise OverloadedError(retry_after=2)
+
+    batcher = MicroBatcher(lambda records: [0] * len(records), max_batch_rows=1, max_wait_us=0, run=run_batch, max_queue=1)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.ensure_future(batcher.submit([{"x": 1}]))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(batcher.submit([{"x": 2}]))
+        await asyncio.sleep(0)
+        with pytest.raises(BatchQueueFullError):
+            await batcher.submit([{"x": 3}])
+        release.set()
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, OverloadedError) for result in results)
+    assert len(calls) == 2
+
+
+def test_predict_records_batches_go_through_admission(model_dir, monkeypatch):
+    admission = AdmissionController(max_workers=1, max_queue=0)
+    monkeypatch.setattr(predict_main, "admission", admission)
+    runs = []
+    run = admission.run
+
+    async def counting_run(fn, ticket, is_disconnected=None):
+        runs.append(fn)
+        return await run(fn, ticket, is_disconnected)
+
+    monkeypatch.setattr(admission, "run", counting_run)
+    record = {"x1": 1.5, "color": "red"}
+
+    async def post_all(n):
+        async with httpx.AsyncClient(app=predict_main.app, base_url="http://predict") as async_client:
+            return await asyncio.gather(
+                *(async_client.post("/predict/records", json={"records": [record]}) for _ in range(n))
+            )
+
+    responses = asyncio.run(post_all(5))
+    assert [response.status_code for response in responses] == [200] * 5
+    assert 1 <= len(runs) < 5
+
+    async def overloaded(fn, ticket, is_disconnected=None):
+        raise OverloadedError(retry_after=3)
+
+    monkeypatch.setattr(admission, "run", overloaded)
+    response = client.post("/predict/records", json={"records": [record]})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_model_cache_does_not_retry_failed_artifact(model_dir):
+    cache = predict_main.model_store.get_cache(str(model_dir))
+    old_trainer = cache.get()
+
+    loads = []
+
+    def failing_loader(path):
+        loads.append(path)
+        raise ValueError("artefato corrompido")
+
+    cache._loader = failing_loader
+    (model_dir / "model.pkl").write_bytes(b"corrompido")
+
+    cache.get()
+    deadline = time.time() + 5
+    while cache.stats()["reload_errors"] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+
+    for _ in range(5):
+        assert cache.get() is old_trainer
+    time.sleep(0.05)
+    assert len(loads) == 1
+    assert cache.stats()["reload_errors"] == 1
+
+
+def test_predict_stream_reports_error_in_later_chunk(model_dir):
+    rows = [f"{i + 0.5},red" for i in range(5)] + ["invalido,red"] + [f"{i + 0.5},blue" for i in range(4)]
+    csv = "x1,color\n" + "\n".join(rows) + "\n"
+
+    response = client.post(
+        "/predict/stream",
+        files={"input_file": ("input.csv", io.BytesIO(csv.encode()), "text/csv")},
+        data={"chunk_size": "5", "output_format": "ndjson"},
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["row"] for line in lines[:5]] == list(range(5))
+    assert lines[-1]["row"] == 5
+    assert "error" in lines[-1]
+
+    response = client.post(
+        "/predict/stream",
+        files={"input_file": ("input.csv", io.BytesIO(csv.encode()), "text/csv")},
+        data={"chunk_size": "5", "output_format": "csv"},
+    )
+    assert response.text.splitlines()[-1].startswith("#ERROR,")
+
+
+def test_predict_records_missing_column_is_not_filled_by_neighbours(model_dir):
+    async def run():
+        async with httpx.AsyncClient(app=predict_main.app, base_url="http://predict") as async_client:
+            return await asyncio.gather(
+                async_client.post("/predict/records", json={"records": [{"color": "red"}]}),
+                async_client.post("/predict/records", json={"records": [{"x1": 1.5, "color": "red"}]}),
+            )
+
+    incomplete, complete = asyncio.run(run())
+    assert incomplete.status_code == 400
+    assert "['x1']" in incomplete.json()["detail"]
+    assert complete.status_code == 200
+    assert len(complete.json()["predictions"]) == 1
+
+
+def test_predict_records_client_errors(model_dir):
+    response = client.post("/predict/records", json={"records": [{"x1": 1.5}]})
+    assert response.status_code == 400
+    assert "['color']" in response.json()["detail"]
+
+    response = client.post("/predict/records", json={"records": [{"x1": "abc", "color": "red"}]})
+    assert response.status_code == 400
+
+    response = client.post("/predict/records", json={"records": []})
+    assert response.status_code == 200
+    assert response.json() == {"predictions": []}
+    assert client.post("/predict/records", json={"records": [], "model": "missing"}).status_code == 404
+
+
+def test_predict_selects_model_and_version_from_registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(predict_main, "model_store", make_store(tmp_path))
+    forest = register_model(tmp_path, "forest")
+    register_model(tmp_path, "linear", model_class=LogisticRegression, model_params={})
+
+    assert post_predict(model="forest").status_code == 200
+    assert post_predict(model="linear", version=forest).status_code == 404
+    assert post_predict(model="forest", version=forest).status_code == 200
+    assert post_predict(model="missing").status_code == 404
+    assert post_predict(model="../escape").status_code == 400
+
+    response = client.post("/predict/records", json={"records": [{"x1": 1.5, "color": "red"}], "model": "linear"})
+    assert response.status_code == 200
+    assert isinstance(predict_main.model_store.get("linear").model, LogisticRegression)
+
+
+def test_model_store_evicts_least_recently_used(tmp_path):
+    for name in ("a", "b", "c"):
+        register_model(tmp_path, name)
+    store = make_store(tmp_path)
+    artifact_size = (tmp_path / "a" / ModelRegistry(str(tmp_path)).latest_version("a") / "model.pkl").stat().st_size
+    store.max_bytes = int(artifact_size * 2.5)
+
+    store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+
+    stats = store.stats()
+    assert stats["evictions"] == 1
+    assert [m["model_dir"].split("/")[-2] for m in stats["models"]] == ["a", "c"]
+    assert stats["loaded_bytes"] <= store.max_bytes
+
+
+def test_model_store_closes_batchers_of_discarded_models(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    monkeypatch.setattr(predict_main, "model_store", store)
+    register_model(tmp_path, "a")
+    register_model(tmp_path, "b")
+    record = {"x1": 1.5, "color": "red"}
+
+    async def run():
+        async with httpx.AsyncClient(app=predict_main.app, base_url="http://predict") as async_client:
+            async def post(**body):
+                response = await async_client.post("/predict/records", json={"records": [record], **body})
+                assert response.status_code == 200
+
+            await post(model="a")
+            first = store.get_cache(store.resolve_dir("a")).batcher
+            # Uma nova versão promovida descarta a anterior, e o worker do seu lote termina.
+            register_model(tmp_path, "a")
+            await post(model="a")
+            await asyncio.sleep(0)
+            assert first._worker.done()
+            assert len(store.stats()["models"]) == 1
+
+            second = store.get_cache(store.resolve_dir("a")).batcher
+            store.max_bytes = 1
+            await post(model="b")
+            await asyncio.sleep(0)
+            assert second._worker.done()
+            # Quem ainda tem o batcher descartado em mãos recebe a predição mesmo assim.
+            assert await second.submit([record]) == [0]
+
+    asyncio.run(run())
+
+
+def test_predict_reports_stage_timings(model_dir):
+    response = post_predict()
+
+    assert response.status_code == 200
+    stages = {entry.split(";")[0].strip() for entry in response.headers["Server-Timing"].split(",")}
+    assert {"upload", "read_csv", "preprocess_predict", "model_predict", "serialize", "total"} <= stages
+    assert 'stage="model_predict"' in client.get("/metrics").text
+
+
+def test_result_cache_reuses_rows_and_batches_misses(tmp_path):
+    trainer = train_model(tmp_path)
+    calls = []
+    predict_features = trainer.predict_features
+    trainer.predict_features = lambda features: calls.append(len(features)) or predict_features(features)
+    cache = PredictionResultCache(max_bytes=1024 ** 2)
+    cache.reset("v1")
+    data = pd.DataFrame({"x1": [1.5, 8.5, 1.5, 3.0], "color": ["red", "blue", "red", "red"]})
+
+    first = cache.predict(trainer, data, fingerprint="v1")
+    second = cache.predict(trainer, data.iloc[::-1].reset_index(drop=True), fingerprint="v1")
+
+    assert first == predict_features(trainer.transform(data)).tolist()
+    assert second == first[::-1]
+    # A linha repetida no lote é avaliada uma única vez; o segundo lote não chega ao modelo.
+    assert calls == [3]
+    assert cache.stats()["hits"] == 4 and cache.stats()["misses"] == 4
+
+    # Outra impressão digital não usa o cache; reset descarta as entradas do modelo anterior.
+    cache.predict(trainer, data, fingerprint="v2")
+    assert calls == [3, 4]
+    cache.reset("v2")
+    cache.predict(trainer, data, fingerprint="v2")
+    assert calls == [3, 4, 3]
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_result_cache_expires_and_respects_byte_budget(tmp_path):
+    trainer = train_model(tmp_path)
+    now = [0.0]
+    cache = PredictionResultCache(max_bytes=1024 ** 2, ttl_seconds=10, clock=lambda: now[0])
+    cache.reset("v1")
+    data = pd.DataFrame({"x1": [1.5, 8.5], "color": ["red", "blue"]})
+
+    cache.predict(trainer, data, fingerprint="v1")
+    now[0] = 11.0
+    cache.predict(trainer, data, fingerprint="v1")
+    assert cache.stats()["expirations"] == 2
+
+    small = PredictionResultCache(max_bytes=400)
+    small.reset("v1")
+    small.predict(trainer, pd.DataFrame({"x1": [float(i) for i in range(10)], "color": ["red"] * 10}), fingerprint="v1")
+    assert small.stats()["cached_bytes"] <= 400
+    assert small.stats()["evictions"] > 0
+
+
+def test_result_cache_is_dropped_when_model_reloads(model_dir):
+    store = make_store(model_dir, result_cache_max_bytes=1024 ** 2)
+    cache = store.get_cache(str(model_dir))
+    data = pd.DataFrame({"x1": [1.5, 8.5], "color": ["red", "blue"]})
+    cache.predict(data)
+    assert cache.stats()["result_cache"]["entries"] == 2
+
+    train_model(model_dir, model_class=LogisticRegression, model_params={})
+    cache.predict(data)
+    deadline = time.time() + 5
+    while cache.stats()["reloads"] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert cache.stats()["result_cache"]["entries"] == 0
+    assert cache.predict(data) == cache.get().predict(data)
+
+
+def test_predict_negotiates_npy_and_csv(model_dir):
+    expected = post_predict().json()["predictions"]
+    files = {"input_file": ("input.csv", io.BytesIO(PREDICT_CSV.encode()), "text/csv")}
+
+    response = client.post("/predict", files=files, headers={"Accept": "application/x-npy"})
+    assert response.headers["content-type"] == "application/x-npy"
+    assert np.load(io.BytesIO(response.content), allow_pickle=False).tolist() == expected
+
+    files = {"input_file": ("input.csv", io.BytesIO(PREDICT_CSV.encode()), "text/csv")}
+    response = client.post("/predict", files=files, headers={"Accept": "text/csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert pd.read_csv(io.StringIO(response.text))["prediction"].tolist() == expected
+
+
+def test_predict_includes_float32_probabilities(model_dir):
+    response = post_predict(include_proba="true")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["classes"] == [0, 1]
+    assert len(body["probabilities"]) == 2
+    assert all(abs(sum(row) - 1) < 1e-6 for row in body["probabilities"])
+
+    files = {"input_file": ("input.csv", io.BytesIO(PREDICT_CSV.encode()), "text/csv")}
+    response = client.post(
+        "/predict", files=files, data={"include_proba": "true"}, headers={"Accept": "application/x-npy"}
+    )
+    assert response.headers["content-type"] == "application/x-npz"
+    arrays = np.load(io.BytesIO(response.content), allow_pickle=False)
+    assert arrays["probabilities"].dtype == np.float32
+    assert arrays["probabilities"].flags["C_CONTIGUOUS"]
+    assert arrays["predictions"].tolist() == body["predictions"]
+
+
+def test_predict_rejects_unsupported_format(model_dir):
+    files = {"input_file": ("input.csv", io.BytesIO(PREDICT_CSV.encode()), "text/csv")}
+    response = client.post("/predict", files=files, headers={"Accept": "application/xml"})
+    assert response.status_code == 406
+
+
+def test_admission_rejects_when_queue_is_full():
+    admission = AdmissionController(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.ensure_future(admission.run(lambda ticket: release.wait(5), admission.ticket()))
+        second = asyncio.ensure_future(admission.run(lambda ticket: "ok", admission.ticket()))
+        await asyncio.sleep(0.05)
+        with pytest.raises(OverloadedError) as error:
+            await admission.run(lambda ticket: "rejected", admission.ticket())
+        release.set()
+        return await first, await second, error.value.retry_after
+
+    first, second, retry_after = asyncio.run(run())
+    assert (first, second) == (True, "ok")
+    assert retry_after >= 1
+    assert admission.stats()["rejected"] == 1
+    assert admission.stats()["pending"] == 0
+
+
+def test_admission_cancels_work_after_deadline_or_disconnect():
+    admission = AdmissionController(max_workers=1, max_queue=4, disconnect_poll_interval=0.01)
+    stages = []
+
+    def slow(ticket):
+        time.sleep(0.2)
+        ticket.check()
+        stages.append("predict")
+
+    async def disconnected():
+        return True
+
+    async def run():
+        with pytest.raises(DeadlineExceededError):
+            await admission.run(slow, admission.ticket(0.05))
+        with pytest.raises(ClientDisconnectedError):
+            await admission.run(slow, admission.ticket(), is_disconnected=disconnected)
+
+    asyncio.run(run())
+    deadline = time.time() + 5
+    while admission.stats()["pending"] and time.time() < deadline:
+        time.sleep(0.01)
+    # Nenhum trabalho abandonado chegou à etapa seguinte e as vagas foram devolvidas.
+    assert stages == []
+    assert admission.stats()["pending"] == 0
+    assert admission.stats()["timeouts"] == 1
+    assert admission.stats()["disconnects"] == 1
+
+
+def test_predict_returns_503_when_overloaded_and_504_after_deadline(model_dir, monkeypatch):
+    admission = AdmissionController(max_workers=1, max_queue=0)
+    monkeypatch.setattr(predict_main, "admission", admission)
+
+    admission._pending = 1
+    response = post_predict()
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+    admission._pending = 0
+    original = predict_main.ModelCache.predict_arrays
+
+    def slow_predict(self, *args, **kwargs):
+        time.sleep(0.3)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(predict_main.ModelCache, "predict_arrays", slow_predict)
+    response = client.post(
+        "/predict",
+        files={"input_file": ("input.csv", io.BytesIO(PREDICT_CSV.encode()), "text/csv")},
+        headers={"X-Request-Timeout": "0.05"},
+    )
+    assert response.status_code == 504
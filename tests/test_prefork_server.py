@@ -0,0 +1,68 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from training_pipeline.trainer import Trainer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAIN_DF = pd.DataFrame({"x1": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0], "target": [0, 1, 0, 1, 0, 1]})
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return set(f.read().split())
+
+
+def _wait_for(condition, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if condition():
+                return True
+        except (OSError, httpx.HTTPError):
+            pass
+        time.sleep(0.1)
+    return False
+
+
+def test_prefork_server_restarts_workers_on_new_model(tmp_path):
+    Trainer(str(tmp_path), RandomForestClassifier, {"n_estimators": 3, "random_state": 0}).train(TRAIN_DF.copy())
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "predict_service.server", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", "2", "--reload-interval", "0.2", "--log-level", "warning"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT, "MODEL_DIR": str(tmp_path)},
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        assert _wait_for(lambda: len(_children(server.pid)) == 2 and httpx.get(url).status_code == 200)
+        response = httpx.post(f"{url}/predict", files={"input_file": ("a.csv", b"x1\n1.5\n", "text/csv")})
+        assert response.status_code == 200
+        # O modelo já chega carregado nos workers: herdado do processo pai.
+        assert httpx.get(f"{url}/model/cache").json()["models"][0]["misses"] == 1
+
+        workers = _children(server.pid)
+        Trainer(str(tmp_path), LogisticRegression, {}).train(TRAIN_DF.copy())
+        assert _wait_for(lambda: len(_children(server.pid) & workers) == 0 and len(_children(server.pid)) == 2)
+        assert httpx.get(f"{url}/model/cache").json()["models"][0]["loaded"]
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
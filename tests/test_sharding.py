@@ -0,0 +1,158 @@
+import asyncio
+import io
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+import api_service.main as api_main
+import predict_service.main as predict_main
+from api_service.sharding import iter_csv_shards, split_csv
+from predict_service.model_store import ModelStore
+from training_pipeline.registry import ModelRegistry
+from training_pipeline.trainer import Trainer
+
+client = TestClient(api_main.app)
+
+rng = np.random.default_rng(0)
+FEATURES = pd.DataFrame({"x1": rng.normal(size=230).round(4), "color": np.array(["red", "blue"])[rng.integers(0, 2, 230)]})
+CSV = FEATURES.to_csv(index=False).encode()
+
+
+class SlowTransport(httpx.AsyncBaseTransport):
+    async def handle_async_request(self, request):
+        await asyncio.sleep(30)
+        return httpx.Response(200, json={"predictions": []})
+
+
+class Replicas(httpx.AsyncBaseTransport):
+    """
+    Encaminha cada requisição ao transporte da réplica indicada pelo host da URL.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = {host: 0 for host in routes}
+
+    async def handle_async_request(self, request):
+        self.calls[request.url.host] += 1
+        return await self.routes[request.url.host].handle_async_request(request)
+
+
+@pytest.fixture
+def replicas(tmp_path, monkeypatch):
+    train = pd.DataFrame({"x1": rng.normal(size=300), "color": np.array(["red", "blue"])[rng.integers(0, 2, 300)]})
+    train["target"] = ((train["x1"] > 0) ^ (train["color"] == "red")).astype(int)
+    Trainer(str(tmp_path), RandomForestClassifier, {"n_estimators": 5, "random_state": 0}).train(train, target_column="target")
+    monkeypatch.setattr(predict_main, "model_store", ModelStore(ModelRegistry(str(tmp_path)), legacy_dir=str(tmp_path)))
+    monkeypatch.setattr(api_main, "PREDICT_SHARD_MIN_BYTES", 0)
+    monkeypatch.setattr(api_main, "PREDICT_SHARD_ROWS", 40)
+    monkeypatch.setattr(api_main, "PREDICT_SHARD_TIMEOUT", 1.0)
+
+    def install(routes):
+        transport = Replicas(routes)
+        monkeypatch.setattr(api_main, "PREDICT_URLS", [f"http://{host}" for host in routes])
+        monkeypatch.setattr(api_main, "http_client", httpx.AsyncClient(transport=transport))
+        return transport
+
+    return install
+
+
+def expected(**data):
+    response = TestClient(predict_main.app).post(
+        "/predict", files={"input_file": ("input.csv", io.BytesIO(CSV), "text/csv")}, data=data
+    )
+    return response.json()
+
+
+def post_predict(**kwargs):
+    return client.post("/predict", files={"input_file": ("input.csv", io.BytesIO(CSV), "text/csv")}, **kwargs)
+
+
+def test_split_csv_keeps_header_rows_and_quoted_newlines():
+    data = b'id,text\n1,"a\nb"\n2,c\n3,"d"\n4,e'
+    shards = split_csv(data, 2)
+
+    assert shards == [b'id,text\n1,"a\nb"\n2,c\n', b'id,text\n3,"d"\n4,e']
+    assert split_csv(data, 4) == [data]
+    frames = [pd.read_csv(io.BytesIO(shard)) for shard in split_csv(CSV, 40)]
+    assert [len(frame) for frame in frames] == [40] * 5 + [30]
+    pd.testing.assert_frame_equal(pd.concat(frames, ignore_index=True), FEATURES)
+
+
+class CountingReader(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_iter_csv_shards_reads_upload_in_blocks():
+    data = b'id,text\n1,"a\nb"\n2,"c""\n"\n3,d\n4,e\n5,"f\n\ng"\n'
+    # Limites de leitura em qualquer posição (dentro de aspas, do cabeçalho...) dão os mesmos blocos.
+    for block_size in range(1, len(data) + 1):
+        assert list(iter_csv_shards(io.BytesIO(data), 2, block_size)) == [
+            b'id,text\n1,"a\nb"\n2,"c""\n"\n', b'id,text\n3,d\n4,e\n', b'id,text\n5,"f\n\ng"\n'
+        ]
+
+    # O primeiro bloco sai antes de o arquivo ser lido inteiro.
+    reader = CountingReader(CSV)
+    shards = iter_csv_shards(reader, 40, block_size=256)
+    assert len(pd.read_csv(io.BytesIO(next(shards)))) == 40
+    assert reader.bytes_read < len(CSV) / 4
+    assert b"".join(shard.split(b"\n", 1)[1] for shard in shards) == CSV[len(split_csv(CSV, 40)[0]):]
+
+
+def test_sharded_predict_preserves_row_order(replicas):
+    transport = replicas({
+        "replica-a": httpx.ASGITransport(app=predict_main.app),
+        "replica-b": httpx.ASGITransport(app=predict_main.app),
+        "replica-c": httpx.ASGITransport(app=predict_main.app),
+    })
+
+    response = post_predict(data={"include_proba": "true"})
+
+    assert response.status_code == 200
+    assert response.json() == expected(include_proba="true")
+    assert transport.calls == {"replica-a": 2, "replica-b": 2, "replica-c": 2}
+
+    response = post_predict(headers={"Accept": "text/csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    merged = pd.read_csv(io.BytesIO(response.content))
+    assert merged["prediction"].tolist() == expected()["predictions"]
+
+
+def test_failed_and_slow_shards_are_retried_on_another_replica(replicas):
+    transport = replicas({
+        "replica-a": httpx.ASGITransport(app=predict_main.app),
+        "broken": httpx.MockTransport(lambda request: httpx.Response(500, json={"detail": "falha"})),
+        "down": httpx.MockTransport(lambda request: (_ for _ in ()).throw(httpx.ConnectError("recusada"))),
+        "slow": SlowTransport(),
+    })
+
+    response = post_predict()
+
+    assert response.status_code == 200
+    assert response.json() == expected()
+    # Cada bloco começa em uma réplica (rodízio) e termina na única que responde.
+    assert transport.calls["replica-a"] == 6
+
+
+def test_sharded_predict_forwards_client_errors_without_retry(replicas):
+    transport = replicas({
+        "replica-a": httpx.ASGITransport(app=predict_main.app),
+        "replica-b": httpx.ASGITransport(app=predict_main.app),
+    })
+
+    response = post_predict(data={"model": "inexistente"})
+
+    assert response.status_code == 404
+    # Nenhum bloco é reenviado, e os blocos ainda não lidos nem chegam a ser enviados.
+    assert sum(transport.calls.values()) < 6
@@ -0,0 +1,74 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset_manager.dataset_cache import DatasetCache
+from dataset_manager.dataset_manager import DatasetManager
+from dataset_manager.synthetic_datasets import BLOCK_ROWS, SyntheticDataset
+
+
+def test_chunks_are_deterministic_and_independent_of_chunk_size():
+    dataset = SyntheticDataset(rows=BLOCK_ROWS + 1000, categorical=3, cardinality=7, seed=3)
+
+    full = dataset.to_frame()
+    chunks = list(dataset.iter_chunks(30_000))
+
+    assert [len(chunk) for chunk in chunks] == [30_000, 30_000, BLOCK_ROWS + 1000 - 60_000]
+    pd.testing.assert_frame_equal(pd.concat(chunks), full)
+    pd.testing.assert_frame_equal(SyntheticDataset(rows=BLOCK_ROWS + 1000, categorical=3, cardinality=7, seed=3).to_frame(), full)
+    assert not SyntheticDataset(rows=100, categorical=3, cardinality=7, seed=4).to_frame().equals(full.iloc[:100])
+    assert list(full.columns) == dataset.columns
+    assert full.index.equals(pd.RangeIndex(len(full)))
+
+
+def test_shape_cardinality_and_missing_rate():
+    data = SyntheticDataset(rows=20_000, numeric=3, categorical=2, cardinality=5, missing_rate=0.1, n_classes=3).to_frame()
+
+    assert list(data.columns) == ["num_0", "num_1", "num_2", "cat_0", "cat_1", "target"]
+    assert data["cat_0"].nunique() == 5
+    assert data.drop(columns=["target"]).isna().mean().between(0.08, 0.12).all()
+    assert data["target"].notna().all()
+    assert sorted(data["target"].unique()) == [0, 1, 2]
+
+    regression = SyntheticDataset(task="regression", rows=100, missing_rate=0).to_frame()
+    assert regression["target"].dtype == np.float64
+    assert not regression.isna().any().any()
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        SyntheticDataset(task="clustering")
+    with pytest.raises(ValueError):
+        SyntheticDataset(missing_rate=1)
+    with pytest.raises(ValueError):
+        list(SyntheticDataset(rows=10).iter_chunks(0))
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_to_csv_streams_chunks(tmp_path, compression):
+    dataset = SyntheticDataset(rows=2_500, seed=1)
+    path = str(tmp_path / "data.csv")
+
+    dataset.to_csv(path, chunk_size=1_000, include_target=False, compression=compression)
+
+    expected = dataset.to_frame(include_target=False).reset_index(drop=True)
+    read = pd.read_csv(path, compression=compression)
+    pd.testing.assert_frame_equal(read, expected, check_exact=False)
+
+
+def test_dataset_manager_streams_and_caches_synthetic_dataset(tmp_path):
+    cache = DatasetCache(str(tmp_path))
+    params = {"rows": 5_000, "categorical": 2, "cardinality": 4, "seed": 2}
+    manager = DatasetManager(default_dataset="synthetic_regression", cache=cache, dataset_params=params)
+
+    expected = manager.load_default_dataset()
+    pd.testing.assert_frame_equal(pd.concat(manager.iter_default_dataset(chunk_size=1_500)), expected)
+
+    digest = manager.cache_default_dataset(chunk_size=1_500)
+    assert manager.cache_default_dataset(chunk_size=700) == digest
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+    pd.testing.assert_frame_equal(cache.load(digest), expected)
+
+    with pytest.raises(ValueError):
+        DatasetManager(default_dataset="iris", cache=cache).cache_default_dataset()
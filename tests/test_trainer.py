@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from training_pipeline.distributed import split_estimators
+from training_pipeline.trainer import Trainer
+
+TRAIN_DF = pd.DataFrame({
+    "x1": [1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0],
+    "color": ["red", "blue", "red", None, "red", "blue", "green", "blue", "red", "blue"],
+    "target": [0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
+})
+
+
+@pytest.fixture
+def trained_dir(tmp_path):
+    trainer = Trainer(
+        model_dir=str(tmp_path),
+        model_class=RandomForestClassifier,
+        model_params={"n_estimators": 5, "random_state": 0},
+    )
+    trainer.train(TRAIN_DF.copy(), target_column="target")
+    return tmp_path
+
+
+def load_trainer(model_dir, **kwargs):
+    trainer = Trainer(model_dir=str(model_dir), model_class=None, **kwargs)
+    trainer.load_model()
+    return trainer
+
+
+def test_train_persists_fill_values_and_categories(trained_dir):
+    trainer = load_trainer(trained_dir)
+    assert trainer.fill_values["x1"] == pytest.approx(TRAIN_DF["x1"].mean())
+    assert trainer.fill_values["color"] == "blue"
+    assert trainer.categories["color"] == ["blue", "green", "red"]
+    assert trainer.feature_columns == ["x1", "color"]
+
+
+def test_preprocess_predict_uses_training_statistics(trained_dir):
+    trainer = load_trainer(trained_dir)
+    single_row = pd.DataFrame({"color": [None], "x1": [np.nan]})
+
+    data = trainer._preprocess_predict(single_row)
+
+    assert data.columns.tolist() == ["x1", "color"]
+    assert data["x1"].iloc[0] == pytest.approx(TRAIN_DF["x1"].mean())
+    assert data["color"].iloc[0] == trainer.categories["color"].index("blue")
+
+
+def test_preprocess_predict_matches_label_encoders(trained_dir):
+    trainer = load_trainer(trained_dir)
+    data = pd.DataFrame({"x1": [1.0, 2.0, 3.0], "color": ["red", "green", "blue"]})
+
+    encoded = trainer._preprocess_predict(data.copy())
+
+    expected = trainer.label_encoders["color"].transform(data["color"])
+    assert encoded["color"].tolist() == expected.tolist()
+
+
+def test_unseen_category_uses_fallback_code(trained_dir):
+    trainer = load_trainer(trained_dir, unknown_category_code=99)
+    data = pd.DataFrame({"x1": [1.0, 2.0], "color": ["purple", "red"]})
+
+    encoded = trainer._preprocess_predict(data)
+
+    assert encoded["color"].tolist() == [99, trainer.categories["color"].index("red")]
+    assert len(trainer.predict(data)) == 2
+
+
+def test_unseen_category_strict_mode(trained_dir):
+    trainer = load_trainer(trained_dir, unknown_category_code=None)
+    data = pd.DataFrame({"x1": [1.0], "color": ["purple"]})
+
+    with pytest.raises(ValueError, match="purple"):
+        trainer._preprocess_predict(data)
+
+
+def test_load_model_with_mmap_shares_arrays(tmp_path):
+    trainer = Trainer(model_dir=str(tmp_path), model_class=LogisticRegression, model_params={})
+    trainer.train(TRAIN_DF.copy(), target_column="target")
+    sample = pd.DataFrame({"x1": [1.5, 8.5], "color": ["red", "blue"]})
+
+    heap = load_trainer(tmp_path)
+    mapped = load_trainer(tmp_path, mmap_mode="r")
+
+    assert isinstance(mapped.model.coef_, np.memmap)
+    assert not isinstance(heap.model.coef_, np.memmap)
+    assert mapped.predict(sample) == heap.predict(sample)
+
+
+def test_preprocess_train_builds_compact_matrix_without_touching_input(tmp_path):
+    data = TRAIN_DF.assign(unused=range(len(TRAIN_DF)))
+    original = data.copy()
+    trainer = Trainer(model_dir=str(tmp_path), model_class=RandomForestClassifier)
+
+    X, y = trainer._preprocess_train(data, columns_to_drop=["unused", "missing"], target_column="target")
+
+    pd.testing.assert_frame_equal(data, original)
+    assert X.columns.tolist() == ["x1", "color"]
+    assert (X.dtypes == np.float32).all()
+    assert not X.isna().any().any()
+    assert X["x1"].iloc[2] == pytest.approx(TRAIN_DF["x1"].mean())
+    assert X["color"].tolist() == [2, 0, 2, 0, 2, 0, 1, 0, 2, 0]
+    assert y.tolist() == TRAIN_DF["target"].tolist()
+
+    trainer = Trainer(model_dir=str(tmp_path), model_class=LogisticRegression)
+    X, _ = trainer._preprocess_train(TRAIN_DF, target_column="target")
+    assert (X.dtypes == np.float64).all()
+
+
+def test_train_reports_memory_per_stage(tmp_path):
+    trainer = Trainer(
+        model_dir=str(tmp_path),
+        model_class=RandomForestClassifier,
+        model_params={"n_estimators": 5, "random_state": 0},
+        profile_memory=True,
+    )
+
+    metrics, _ = trainer.train(TRAIN_DF.copy(), target_column="target")
+
+    assert set(metrics["memory_profile"]) == {"impute_encode", "split", "fit", "evaluate", "save"}
+    assert all(stage["peak_bytes"] >= 0 for stage in metrics["memory_profile"].values())
+
+
+def test_distributed_forest_splits_trees_across_workers(tmp_path):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"x1": rng.normal(size=400), "x2": rng.normal(size=400)})
+    data["target"] = (data["x1"] + data["x2"] > 0).astype(int)
+    params = {"n_estimators": 10, "random_state": 0}
+
+    # Processos locais fazem o papel dos workers remotos.
+    with ProcessPoolExecutor(max_workers=3, mp_context=multiprocessing.get_context("fork")) as executor:
+        runs = []
+        for run in ("a", "b"):
+            trainer = Trainer(model_dir=str(tmp_path / run), model_class=RandomForestClassifier, model_params=params)
+            metrics, _ = trainer.train(data.copy(), target_column="target", distributed_workers=3, executor=executor)
+            runs.append(trainer)
+
+    model = runs[0].model
+    assert split_estimators(10, 3) == [4, 3, 3]
+    assert len(model.estimators_) == model.n_estimators == 10
+    assert len({tree.random_state for tree in model.estimators_}) == 10
+    assert metrics["accuracy"] > 0.8
+    # A mesma random_state gera a mesma floresta, e os dados compartilhados com os workers são removidos.
+    assert np.array_equal(runs[0].model.predict_proba(data[["x1", "x2"]]), runs[1].model.predict_proba(data[["x1", "x2"]]))
+    assert sorted(os.listdir(tmp_path / "a")) == ["model.compiled.pkl", "model.pkl"]
+
+    with pytest.raises(ValueError, match="não suporta"):
+        Trainer(model_dir=str(tmp_path / "lr"), model_class=LogisticRegression).train(
+            data.copy(), target_column="target", distributed_workers=2
+        )
+
+
+def test_retrain_extends_forest_and_statistics(tmp_path):
+    rng = np.random.default_rng(1)
+
+    def rows(n, colors):
+        data = pd.DataFrame({"x1": rng.normal(size=n), "color": rng.choice(colors, n)})
+        data["target"] = (data["x1"] > 0).astype(int)
+        data.loc[rng.random(n) < 0.1, "x1"] = np.nan
+        return data
+
+    history, delta = rows(400, ["red", "blue"]), rows(100, ["red", "purple", "green"])
+    base = Trainer(model_dir=str(tmp_path / "v1"), model_class=RandomForestClassifier,
+                   model_params={"n_estimators": 20, "random_state": 0})
+    base.train(history.copy(), target_column="target")
+    first_tree = base.model.estimators_[0].tree_.threshold.copy()
+
+    trainer = Trainer(model_dir=str(tmp_path / "v2"), model_class=None)
+    metrics, _ = trainer.retrain(delta.copy(), base_dir=str(tmp_path / "v1"))
+
+    # 100 linhas novas sobre 500 no total: 20% a mais de árvores, treinadas só com as linhas novas.
+    assert metrics["n_estimators"] == 24 and metrics["total_rows"] == 500
+    assert np.array_equal(trainer.model.estimators_[0].tree_.threshold, first_tree)
+    # Os códigos antigos não mudam; as categorias novas entram no fim.
+    assert trainer.categories["color"] == ["blue", "red", "green", "purple"]
+    combined = pd.concat([history, delta])
+    assert trainer.fill_values["x1"] == pytest.approx(combined["x1"].mean())
+
+    reloaded = load_trainer(tmp_path / "v2")
+    assert reloaded.statistics.rows == 500
+    assert len(reloaded.predict(delta.drop(columns=["target"]))) == 100
+    # O artefato de partida não é alterado.
+    assert len(load_trainer(tmp_path / "v1").model.estimators_) == 20
+
+
+@pytest.mark.parametrize("model_class, model_params", [
+    (SGDClassifier, {"random_state": 0}),
+    (LogisticRegression, {"max_iter": 500}),
+])
+def test_retrain_updates_linear_models(tmp_path, model_class, model_params):
+    Trainer(model_dir=str(tmp_path / "v1"), model_class=model_class, model_params=model_params).train(
+        TRAIN_DF.copy(), target_column="target"
+    )
+    base_coef = load_trainer(tmp_path / "v1").model.coef_.copy()
+
+    trainer = Trainer(model_dir=str(tmp_path / "v2"), model_class=None)
+    trainer.retrain(pd.concat([TRAIN_DF] * 3, ignore_index=True), base_dir=str(tmp_path / "v1"))
+    assert trainer.model.coef_.shape == base_coef.shape
+    assert trainer.statistics.rows == 40
+
+    with pytest.raises(ValueError, match="classes novas"):
+        Trainer(model_dir=str(tmp_path / "v3"), model_class=None).retrain(
+            TRAIN_DF.assign(target=2), base_dir=str(tmp_path / "v1")
+        )
@@ -0,0 +1,348 @@
+import io
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import trainer_service.main as trainer_main
+from dataset_manager.dataset_cache import DatasetCache
+from trainer_service.jobs import CANCELLED, QUEUED, RUNNING, SUCCEEDED, JobManager, QueueFullError
+from training_pipeline.preprocessing import FeatureTransform
+from training_pipeline.registry import ModelRegistry
+from training_pipeline.trainer import Trainer
+
+client = TestClient(trainer_main.app)
+
+TRAIN_CSV = "x1,x2,target\n" + "".join(f"{i},{i % 3},{i % 2}\n" for i in range(40))
+
+
+@pytest.fixture
+def job_manager(tmp_path, monkeypatch):
+    manager = JobManager(max_workers=1, executor=ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(trainer_main, "job_manager", manager)
+    monkeypatch.setattr(trainer_main, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(trainer_main, "registry", ModelRegistry(str(tmp_path)))
+    monkeypatch.setattr(trainer_main, "dataset_cache", DatasetCache(str(tmp_path / "datasets")))
+    yield manager
+    manager.shutdown()
+
+
+def wait_for(job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] not in (QUEUED, RUNNING):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} não terminou a tempo.")
+
+
+def post_train(**data):
+    return client.post(
+        "/train",
+        files={"dataset_file": ("train.csv", io.BytesIO(TRAIN_CSV.encode()), "text/csv")},
+        data={"model_params": '{"n_estimators": 5}', "target_column": "target", **data},
+    )
+
+
+def test_train_returns_job_and_completes(job_manager, tmp_path):
+    response = post_train()
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = wait_for(job_id)
+    assert job["status"] == SUCCEEDED
+    assert "accuracy" in job["result"]["metrics"]
+    version = job["result"]["version"]
+    assert job["result"]["model_path"] == str(tmp_path / "default" / version / "model.pkl")
+    assert job["result"]["promoted"] is True
+    assert {"impute_encode", "fit", "save"} <= set(job["result"]["stage_seconds"])
+    assert job["run_seconds"] >= 0
+    assert any(j["job_id"] == job_id for j in client.get("/jobs").json()["jobs"])
+
+
+def test_train_unsupported_model(job_manager):
+    response = post_train(model_type="Unknown")
+    assert response.status_code == 400
+
+
+def test_get_unknown_job(job_manager):
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.delete("/jobs/unknown").status_code == 404
+
+
+def test_cancel_pending_job(job_manager):
+    release = threading.Event()
+    try:
+        blocker = job_manager.submit(release.wait)
+        pending = post_train().json()["job_id"]
+
+        response = client.delete(f"/jobs/{pending}")
+        assert response.status_code == 200
+        assert response.json()["status"] == CANCELLED
+        assert client.delete(f"/jobs/{blocker.id}").status_code == 409
+    finally:
+        release.set()
+
+
+def test_queue_full_returns_429(job_manager, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(job_manager, "max_queued_jobs", 1)
+    try:
+        job_manager.submit(release.wait)
+        job_manager.submit(release.wait)
+
+        assert post_train().status_code == 429
+    finally:
+        release.set()
+
+
+def test_job_manager_limits_jobs_per_owner():
+    manager = JobManager(max_workers=2, max_jobs_per_owner=1, executor=ThreadPoolExecutor(max_workers=2))
+    release = threading.Event()
+    started = []
+
+    def work(name):
+        started.append(name)
+        release.wait()
+
+    try:
+        for i in range(3):
+            manager.submit(work, f"big-{i}", owner="big")
+        manager.submit(work, "small-0", owner="small")
+
+        time.sleep(0.1)
+        # O time "big" ocupa um único worker; o outro fica livre para o time "small".
+        assert sorted(started) == ["big-0", "small-0"]
+    finally:
+        release.set()
+        manager.shutdown()
+
+
+def test_job_manager_reports_failures():
+    manager = JobManager(max_workers=1, executor=ThreadPoolExecutor(max_workers=1))
+
+    def fail():
+        raise ValueError("dados inválidos")
+
+    job = manager.submit(fail)
+    deadline = time.time() + 5
+    while job.status in (QUEUED, RUNNING) and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert job.to_dict()["status"] == "failed"
+    assert job.to_dict()["error"] == "dados inválidos"
+    manager.shutdown()
+
+
+def test_job_manager_rejects_when_full():
+    manager = JobManager(max_workers=1, max_queued_jobs=0, executor=ThreadPoolExecutor(max_workers=1))
+    with pytest.raises(QueueFullError):
+        manager.submit(print)
+    manager.shutdown()
+
+
+def test_job_manager_shutdown_cancels_jobs_waiting_in_executor():
+    # O executor tem menos threads que o manager, então o segundo job fica na fila do executor.
+    manager = JobManager(max_workers=2, executor=ThreadPoolExecutor(max_workers=1))
+    release = threading.Event()
+    try:
+        running = manager.submit(release.wait)
+        waiting = manager.submit(release.wait, owner="other")
+        manager.shutdown()
+
+        assert waiting.status == CANCELLED
+        assert "other" not in manager._running_by_owner
+    finally:
+        release.set()
+
+    running.future.result(timeout=5)
+    assert running.status == SUCCEEDED
+    assert manager._running_by_owner == {}
+
+
+def test_train_registers_versions_and_promotes(job_manager, tmp_path):
+    first = wait_for(post_train(model_name="churn").json()["job_id"])["result"]["version"]
+    second = wait_for(post_train(model_name="churn", promote="false").json()["job_id"])["result"]["version"]
+
+    models = client.get("/models").json()["models"]
+    assert models["churn"] == {"latest": first, "versions": sorted([first, second])}
+
+    response = client.post("/models/churn/promote", data={"version": second})
+    assert response.status_code == 200
+    assert client.get("/models").json()["models"]["churn"]["latest"] == second
+    assert client.post("/models/churn/promote", data={"version": "missing"}).status_code == 404
+
+
+def test_train_rejects_invalid_model_name(job_manager):
+    assert post_train(model_name="../escape").status_code == 400
+
+
+def test_train_reuses_cached_dataset_by_hash(job_manager):
+    first = post_train().json()
+    assert wait_for(first["job_id"])["status"] == SUCCEEDED
+    assert trainer_main.dataset_cache.stats()["misses"] == 1
+
+    response = client.post(
+        "/train",
+        data={"dataset_hash": first["dataset_hash"], "target_column": "target", "model_params": '{"n_estimators": 3}'},
+    )
+    assert response.status_code == 202
+    assert wait_for(response.json()["job_id"])["status"] == SUCCEEDED
+
+    assert post_train().json()["dataset_hash"] == first["dataset_hash"]
+    assert trainer_main.dataset_cache.stats()["hits"] == 2
+    assert client.post("/train", data={"dataset_hash": "0" * 64}).status_code == 404
+    assert client.post("/train", data={"dataset_hash": "../x"}).status_code == 400
+
+
+def test_tune_returns_leaderboard_and_registers_best_model(job_manager, tmp_path):
+    response = client.post(
+        "/tune",
+        files={"dataset_file": ("train.csv", io.BytesIO(TRAIN_CSV.encode()), "text/csv")},
+        data={
+            "param_grid": '{"n_estimators": [3, 5], "max_depth": [1, null]}',
+            "model_params": '{"random_state": 0}',
+            "target_column": "target",
+            "cv": "2",
+            "model_name": "tuned",
+        },
+    )
+    assert response.status_code == 202
+
+    job = wait_for(response.json()["job_id"], timeout=30)
+    assert job["status"] == SUCCEEDED, job
+    result = job["result"]
+    assert result["metric"] == "accuracy"
+    assert result["leaderboard"][0]["rank"] == 1
+    assert result["leaderboard"][0]["params"] == result["best_params"]
+    assert len(result["leaderboard"]) == 4
+    assert client.get("/models").json()["models"]["tuned"]["latest"] == result["version"]
+
+
+def test_tune_rejects_invalid_search_space(job_manager):
+    def post_tune(**data):
+        return client.post("/tune", data={"target_column": "target", **data})
+
+    assert post_tune(param_grid="not json").status_code == 400
+    assert post_tune(param_grid='{"C": {"distribution": "loguniform", "low": 1, "high": 2}}').status_code == 400
+    assert post_tune(param_grid='{"C": [1]}', search="bayes").status_code == 400
+    assert post_tune(param_grid='{"C": [1]}', cv="1").status_code == 400
+
+
+def test_train_streaming_matches_batch_statistics(job_manager):
+    csv = "x1,color,target\n" + "".join(
+        f"{i % 7 if i % 5 else ''},{['red', 'blue', ''][i % 3]},{i % 2}\n" for i in range(60)
+    )
+    response = client.post(
+        "/train",
+        files={"dataset_file": ("train.csv", io.BytesIO(csv.encode()), "text/csv")},
+        data={"model_type": "GaussianNB", "streaming": "true", "chunk_size": "7", "model_name": "stream"},
+    )
+    assert response.status_code == 202
+    job = wait_for(response.json()["job_id"])
+    assert job["status"] == SUCCEEDED, job
+    assert job["result"]["metrics"]["train_rows"] + job["result"]["metrics"]["holdout_rows"] == 60
+
+    trainer = Trainer(model_dir=job["result"]["model_path"].rsplit("/", 1)[0], model_class=None)
+    trainer.load_model()
+    batch = pd.read_csv(io.StringIO(csv))
+    expected = FeatureTransform.compute_fill_values(batch.drop(columns=["target"]))
+    assert trainer.fill_values["x1"] == pytest.approx(expected["x1"])
+    assert trainer.fill_values["color"] == expected["color"]
+    assert trainer.categories["color"] == sorted(batch["color"].dropna().unique())
+    assert trainer.feature_columns == ["x1", "color"]
+
+
+def test_train_streaming_requires_partial_fit(job_manager):
+    response = post_train(streaming="true")
+    assert response.status_code == 400
+    assert "incremental" in response.json()["detail"]
+
+
+def test_train_distributed_forest(job_manager):
+    job = wait_for(post_train(distributed_workers="2").json()["job_id"], timeout=60)
+    assert job["status"] == SUCCEEDED
+
+    response = post_train(model_type="LogisticRegression", model_params="{}", distributed_workers="2")
+    assert response.status_code == 400
+
+
+def test_train_distributed_default_applies_only_when_omitted(job_manager, monkeypatch):
+    monkeypatch.setattr(trainer_main, "TRAIN_DISTRIBUTED_WORKERS", 2)
+
+    # Sem o campo, o padrão do serviço só vale para florestas.
+    job = wait_for(post_train(model_type="LogisticRegression", model_params="{}").json()["job_id"])
+    assert job["status"] == SUCCEEDED
+
+    # Um valor explícito é validado mesmo que coincida com o padrão.
+    response = post_train(model_type="LogisticRegression", model_params="{}", distributed_workers="2")
+    assert response.status_code == 400
+    assert post_train(distributed_workers="0").status_code == 400
+
+
+def test_train_distributed_forest_in_spawned_job_worker(tmp_path, monkeypatch):
+    # O JobManager padrão roda o job em um processo "spawn", que abre o próprio pool de
+    # processos para as partes da floresta.
+    manager = JobManager(max_workers=1)
+    monkeypatch.setattr(trainer_main, "job_manager", manager)
+    monkeypatch.setattr(trainer_main, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(trainer_main, "registry", ModelRegistry(str(tmp_path)))
+    monkeypatch.setattr(trainer_main, "dataset_cache", DatasetCache(str(tmp_path / "datasets")))
+    try:
+        response = post_train(model_params='{"n_estimators": 6, "random_state": 0}', distributed_workers="2")
+        job = wait_for(response.json()["job_id"], timeout=120)
+    finally:
+        manager.shutdown()
+
+    assert job["status"] == SUCCEEDED, job.get("error")
+    trainer = Trainer(model_dir=os.path.dirname(job["result"]["model_path"]), model_class=None)
+    trainer.load_model()
+    assert len(trainer.model.estimators_) == 6
+
+
+def test_retrain_extends_promoted_version(job_manager):
+    first = wait_for(post_train(model_params='{"n_estimators": 4, "random_state": 0}').json()["job_id"])
+    base_version = first["result"]["version"]
+
+    response = client.post(
+        "/retrain",
+        files={"dataset_file": ("delta.csv", io.BytesIO(TRAIN_CSV.encode()), "text/csv")},
+        data={"n_estimators": "3"},
+    )
+    assert response.status_code == 202
+    job = wait_for(response.json()["job_id"])
+
+    assert job["status"] == SUCCEEDED
+    assert job["result"]["base_version"] == base_version
+    assert job["result"]["metrics"]["n_estimators"] == 7
+    assert client.get("/models").json()["models"]["default"]["latest"] == job["result"]["version"]
+
+    assert client.post("/retrain", data={"model_name": "inexistente", "dataset_hash": "x"}).status_code == 404
+
+
+def test_synthetic_dataset_trains_in_streaming_mode(job_manager):
+    data = {"rows": "3000", "categorical": "2", "cardinality": "5", "seed": "7", "chunk_size": "1000"}
+    response = client.post("/datasets/synthetic", data=data)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rows"] == 3000
+    assert body["columns"][-1] == "target"
+    assert client.post("/datasets/synthetic", data=data).json()["dataset_hash"] == body["dataset_hash"]
+
+    response = client.post(
+        "/train",
+        data={"model_type": "SGDClassifier", "streaming": "true", "chunk_size": "500",
+              "dataset_hash": body["dataset_hash"], "model_name": "synthetic"},
+    )
+    assert response.status_code == 202
+    job = wait_for(response.json()["job_id"])
+    assert job["status"] == SUCCEEDED, job
+    assert job["result"]["metrics"]["train_rows"] + job["result"]["metrics"]["holdout_rows"] == 3000
+
+    assert client.post("/datasets/synthetic", data={"dataset": "iris"}).status_code == 400
+    assert client.post("/datasets/synthetic", data={"missing_rate": "2"}).status_code == 400
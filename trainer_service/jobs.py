@@ -0,0 +1,391 @@
+import os
+import time
+import uuid
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+from dataset_manager.dataset_cache import DatasetCache
+from training_pipeline.registry import ModelRegistry
+from training_pipeline.trainer import Trainer
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+def run_training_job(
+    registry_root: str,
+    model_name: str,
+    model_class,
+    model_params: dict,
+    data: pd.DataFrame,
+    target_column: Optional[str],
+    columns_to_drop: Optional[List[str]],
+    promote: bool = True,
+    profile_memory: bool = False,
+    distributed_workers: int = 1
+) -> dict:
+    """
+    Executa um treinamento completo em um worker, grava o artefato em uma nova versão
+    do registro e, se `promote` for verdadeiro, promove essa versão a `LATEST`.
+    Com `profile_memory`, as métricas trazem o pico de memória de cada etapa; com
+    `distributed_workers` > 1, as árvores da floresta são divididas entre esse número de processos.
+    """
+    start = time.perf_counter()
+    registry = ModelRegistry(registry_root)
+    version = registry.new_version(model_name)
+    trainer = Trainer(
+        model_dir=registry.version_dir(model_name, version),
+        model_class=model_class,
+        model_params=model_params,
+        profile_memory=profile_memory
+    )
+    metrics, model_path = trainer.train(
+        data=data,
+        target_column=target_column,
+        columns_to_drop=columns_to_drop,
+        distributed_workers=distributed_workers
+    )
+    if promote:
+        registry.promote(model_name, version)
+    return {
+        "metrics": metrics,
+        "model_path": model_path,
+        "model_name": model_name,
+        "version": version,
+        "promoted": promote,
+        "train_seconds": time.perf_counter() - start,
+        "stage_seconds": trainer.profiler.timings(),
+    }
+
+
+def run_incremental_training_job(
+    registry_root: str,
+    model_name: str,
+    model_class,
+    model_params: dict,
+    dataset_cache_dir: str,
+    dataset_hash: str,
+    chunk_size: int,
+    target_column: Optional[str],
+    columns_to_drop: Optional[List[str]],
+    promote: bool = True
+) -> dict:
+    """
+    Treina com partial_fit lendo o dataset do cache colunar em blocos de `chunk_size` linhas,
+    de modo que a memória do worker dependa do tamanho do bloco e não do dataset.
+    """
+    start = time.perf_counter()
+    dataset_cache = DatasetCache(dataset_cache_dir)
+    registry = ModelRegistry(registry_root)
+    version = registry.new_version(model_name)
+    trainer = Trainer(
+        model_dir=registry.version_dir(model_name, version),
+        model_class=model_class,
+        model_params=model_params
+    )
+    metrics, model_path = trainer.train_incremental(
+        lambda: dataset_cache.iter_chunks(dataset_hash, chunk_size),
+        target_column=target_column,
+        columns_to_drop=columns_to_drop
+    )
+    if promote:
+        registry.promote(model_name, version)
+    return {
+        "metrics": metrics,
+        "model_path": model_path,
+        "model_name": model_name,
+        "version": version,
+        "promoted": promote,
+        "train_seconds": time.perf_counter() - start,
+        "stage_seconds": trainer.profiler.timings(),
+    }
+
+
+def run_tuning_job(
+    registry_root: str,
+    model_name: str,
+    model_class,
+    model_params: dict,
+    param_space: dict,
+    data: pd.DataFrame,
+    target_column: Optional[str],
+    columns_to_drop: Optional[List[str]],
+    search: str = "grid",
+    cv: int = 5,
+    factor: int = 3,
+    n_candidates="exhaust",
+    n_jobs: int = -1,
+    promote: bool = True
+) -> dict:
+    """
+    Executa uma busca de hiperparâmetros em um worker e grava o melhor modelo em uma
+    nova versão do registro, promovendo-a se `promote` for verdadeiro.
+    """
+    start = time.perf_counter()
+    registry = ModelRegistry(registry_root)
+    version = registry.new_version(model_name)
+    trainer = Trainer(
+        model_dir=registry.version_dir(model_name, version),
+        model_class=model_class,
+        model_params=model_params
+    )
+    result, model_path = trainer.tune(
+        data=data,
+        param_space=param_space,
+        target_column=target_column,
+        columns_to_drop=columns_to_drop,
+        search=search,
+        cv=cv,
+        factor=factor,
+        n_candidates=n_candidates,
+        n_jobs=n_jobs
+    )
+    if promote:
+        registry.promote(model_name, version)
+    return {
+        **result,
+        "model_path": model_path,
+        "model_name": model_name,
+        "version": version,
+        "promoted": promote,
+        "train_seconds": time.perf_counter() - start,
+        "stage_seconds": trainer.profiler.timings(),
+    }
+
+
+def run_retraining_job(
+    registry_root: str,
+    model_name: str,
+    base_version: Optional[str],
+    data: pd.DataFrame,
+    target_column: Optional[str],
+    columns_to_drop: Optional[List[str]],
+    n_estimators: Optional[int] = None,
+    promote: bool = True
+) -> dict:
+    """
+    Estende a versão `base_version` (ou a promovida) com as linhas novas de `data` e grava o
+    resultado em uma nova versão do registro, promovendo-a se `promote` for verdadeiro.
+    """
+    start = time.perf_counter()
+    registry = ModelRegistry(registry_root)
+    base_dir = registry.resolve(model_name, base_version)
+    version = registry.new_version(model_name)
+    trainer = Trainer(model_dir=registry.version_dir(model_name, version), model_class=None)
+    metrics, model_path = trainer.retrain(
+        data,
+        base_dir=base_dir,
+        target_column=target_column,
+        columns_to_drop=columns_to_drop,
+        n_estimators=n_estimators
+    )
+    if promote:
+        registry.promote(model_name, version)
+    return {
+        "metrics": metrics,
+        "model_path": model_path,
+        "model_name": model_name,
+        "version": version,
+        "base_version": os.path.basename(base_dir),
+        "promoted": promote,
+        "train_seconds": time.perf_counter() - start,
+        "stage_seconds": trainer.profiler.timings(),
+    }
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobNotCancellableError(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, owner: str, description: Optional[dict] = None):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.owner = owner
+        self.description = description or {}
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    def to_dict(self) -> dict:
+        now = time.time()
+        queue_end = self.started_at or self.finished_at or now
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "owner": self.owner,
+            **self.description,
+            "result": self.result,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_seconds": queue_end - self.submitted_at,
+            "run_seconds": (self.finished_at or now) - self.started_at if self.started_at else None,
+        }
+
+
+class JobManager:
+    """
+    Fila de jobs de treinamento executados por um pool de workers.
+
+    Os jobs ficam pendentes até haver um worker livre. Quando um worker libera, o próximo
+    job escolhido é o do dono (time/cliente) com menos jobs em execução, respeitando o limite
+    `max_jobs_per_owner`; assim um time com muitos jobs grandes não impede os demais de treinar.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_jobs_per_owner: Optional[int] = None,
+        max_queued_jobs: int = 100,
+        history_size: int = 1000,
+        executor: Optional[Executor] = None,
+        on_finished: Optional[Callable[["Job"], None]] = None
+    ):
+        self.max_workers = max_workers
+        self.max_jobs_per_owner = max_jobs_per_owner or max_workers
+        self.max_queued_jobs = max_queued_jobs
+        self.history_size = history_size
+        # Chamado com o job ao fim de cada execução (sucesso, falha ou cancelamento), por exemplo para métricas.
+        self.on_finished = on_finished
+        # "spawn" evita herdar locks de threads do servidor em um fork.
+        self.executor = executor or ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        # RLock: o callback de conclusão pode rodar na mesma thread que despachou o job.
+        self._lock = threading.RLock()
+        self._jobs = OrderedDict()
+        self._pending = []
+        self._running_by_owner = {}
+        self._closed = False
+
+    def submit(self, fn: Callable, *args, owner: str = "default", description: Optional[dict] = None, **kwargs) -> Job:
+        """
+        Enfileira `fn(*args, **kwargs)` e retorna o job imediatamente.
+        Lança QueueFullError se a fila de pendentes estiver cheia.
+        """
+        job = Job(fn, args, kwargs, owner=owner, description=description)
+        with self._lock:
+            if len(self._pending) >= self.max_queued_jobs:
+                raise QueueFullError(f"Fila de treinamento cheia ({self.max_queued_jobs} jobs pendentes).")
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._trim_history()
+            self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list:
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Job:
+        """
+        Cancela um job pendente. Jobs já em execução ou finalizados não podem ser cancelados:
+        o processo do worker não é interrompido no meio do treinamento.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job.status != QUEUED:
+                raise JobNotCancellableError(f"Job {job_id} não pode ser cancelado (status: {job.status}).")
+            self._pending.remove(job)
+            job.status = CANCELLED
+            job.finished_at = time.time()
+        return job
+
+    def _running_count(self) -> int:
+        return sum(self._running_by_owner.values())
+
+    def _next_job(self) -> Optional[Job]:
+        eligible = [
+            job for job in self._pending
+            if self._running_by_owner.get(job.owner, 0) < self.max_jobs_per_owner
+        ]
+        if not eligible:
+            return None
+        # min é estável: em caso de empate, o job mais antigo é escolhido.
+        return min(eligible, key=lambda job: self._running_by_owner.get(job.owner, 0))
+
+    def _dispatch(self):
+        while not self._closed and self._running_count() < self.max_workers:
+            job = self._next_job()
+            if job is None:
+                return
+            self._pending.remove(job)
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._running_by_owner[job.owner] = self._running_by_owner.get(job.owner, 0) + 1
+            job.future = self.executor.submit(job.fn, *job.args, **job.kwargs)
+            job.future.add_done_callback(lambda future, job=job: self._on_done(job, future))
+
+    def _on_done(self, job: Job, future):
+        if future.cancelled():
+            # Acontece no shutdown, quando o executor descarta os jobs ainda não iniciados.
+            status = CANCELLED
+            logger.info(f"Job {job.id} cancelado.")
+        else:
+            try:
+                job.result = future.result()
+                status = SUCCEEDED
+                logger.info(f"Job {job.id} finalizado com sucesso.")
+            except Exception as e:
+                job.error = str(e)
+                status = FAILED
+                logger.error(f"Job {job.id} falhou: {e}")
+        job.finished_at = time.time()
+        job.status = status
+        # Libera os dados de entrada, que podem ser grandes.
+        job.args, job.kwargs = (), {}
+        if self.on_finished is not None:
+            try:
+                self.on_finished(job)
+            except Exception as e:
+                logger.error(f"Erro no callback de conclusão do job {job.id}: {e}")
+
+        with self._lock:
+            self._running_by_owner[job.owner] -= 1
+            if not self._running_by_owner[job.owner]:
+                del self._running_by_owner[job.owner]
+            self._dispatch()
+
+    def _trim_history(self):
+        excess = len(self._jobs) - self.history_size
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATUSES][:excess]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            for job in self._pending:
+                job.status = CANCELLED
+                job.finished_at = time.time()
+            self._pending.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
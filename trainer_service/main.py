@@ -1,11 +1,30 @@
 import os
+import json
 from fastapi import FastAPI, HTTPException, UploadFile, Form
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
+from typing import List, Optional
+from dataset_manager.dataset_cache import DatasetCache
 from dataset_manager.dataset_manager import DatasetManager
-from training_pipeline.trainer import Trainer
+from dataset_manager.synthetic_datasets import SYNTHETIC_DATASETS
 from training_pipeline.utils import parse_model_params, parse_columns_to_drop
+from trainer_service.jobs import (
+    JobManager,
+    JobNotCancellableError,
+    QueueFullError,
+    run_incremental_training_job,
+    run_retraining_job,
+    run_training_job,
+    run_tuning_job
+)
+from training_pipeline.tuning import parse_param_space
+from observability import timing
+from observability.middleware import install as install_observability
+from training_pipeline.distributed import supports_distributed
+from training_pipeline.registry import DEFAULT_MODEL_NAME, ModelRegistry
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, PassiveAggressiveClassifier, SGDClassifier, SGDRegressor
+from sklearn.naive_bayes import GaussianNB
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +34,11 @@ MODEL_FACTORY = {
     "RandomForestClassifier": RandomForestClassifier,
     "RandomForestRegressor": RandomForestRegressor,
     "LogisticRegression": LogisticRegression,
+    # Modelos com partial_fit, que também podem ser treinados em modo incremental (streaming=true).
+    "SGDClassifier": SGDClassifier,
+    "SGDRegressor": SGDRegressor,
+    "GaussianNB": GaussianNB,
+    "PassiveAggressiveClassifier": PassiveAggressiveClassifier,
 }
 
 app = FastAPI(
@@ -39,6 +63,169 @@ app = FastAPI(
         "url": "https://opensource.org/licenses/MIT",
     }
 )
+install_observability(app, service="trainer")
+
+MODEL_DIR = os.environ.get("MODEL_DIR", "/shared-data/models")
+registry = ModelRegistry(MODEL_DIR)
+dataset_cache = DatasetCache(
+    os.environ.get("DATASET_CACHE_DIR", "/shared-data/datasets"),
+    max_bytes=int(os.environ.get("DATASET_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))
+)
+TRAINER_WORKERS = int(os.environ.get("TRAINER_WORKERS", "2"))
+# Processos usados por cada busca de hiperparâmetros (-1 = todos os núcleos).
+TUNE_N_JOBS = int(os.environ.get("TUNE_N_JOBS", "-1"))
+TRAIN_CHUNK_SIZE = int(os.environ.get("TRAIN_CHUNK_SIZE", "100000"))
+# Inclui no resultado dos jobs o pico de memória de cada etapa do treinamento (tracemalloc).
+TRAIN_PROFILE_MEMORY = os.environ.get("TRAIN_PROFILE_MEMORY", "false").lower() in ("1", "true", "yes")
+# Processos entre os quais as árvores de uma floresta são divididas por padrão (1 = sem divisão).
+TRAIN_DISTRIBUTED_WORKERS = int(os.environ.get("TRAIN_DISTRIBUTED_WORKERS", "1"))
+# Dataset usado quando o /train não recebe arquivo nem hash: "iris" ou um dos sintéticos, com
+# os parâmetros do gerador em JSON (ex.: {"rows": 1000000, "categorical": 4, "seed": 1}).
+DEFAULT_DATASET = os.environ.get("DEFAULT_DATASET", "iris")
+DEFAULT_DATASET_PARAMS = json.loads(os.environ.get("DEFAULT_DATASET_PARAMS", "{}"))
+
+
+
+def _record_job_metrics(job):
+    # Os jobs rodam em outros processos; os tempos das etapas voltam no resultado e são
+    # registrados aqui, no processo do serviço que expõe o /metrics.
+    if job.started_at is not None:
+        timing.record("job_queue", job.started_at - job.submitted_at)
+        timing.record("job_run", job.finished_at - job.started_at)
+    for stage, seconds in ((job.result or {}).get("stage_seconds") or {}).items():
+        timing.record(f"train_{stage}", seconds)
+
+
+job_manager = JobManager(
+    max_workers=TRAINER_WORKERS,
+    max_jobs_per_owner=int(os.environ.get("TRAINER_MAX_JOBS_PER_OWNER", str(TRAINER_WORKERS))),
+    max_queued_jobs=int(os.environ.get("TRAINER_MAX_QUEUED_JOBS", "100")),
+    on_finished=_record_job_metrics
+)
+
+
+@app.on_event("shutdown")
+def shutdown():
+    job_manager.shutdown()
+
+
+async def _load_dataset(dataset_file: Optional[UploadFile], dataset_hash: Optional[str]):
+    """
+    Carrega o dataset do upload, do cache (por hash) ou o dataset padrão, nessa ordem.
+    Retorna o DataFrame e o hash do upload (None para o dataset padrão).
+    """
+    dataset_manager = DatasetManager(default_dataset=DEFAULT_DATASET, cache=dataset_cache, dataset_params=DEFAULT_DATASET_PARAMS)
+
+    if dataset_file:
+        timing.record("upload", timing.elapsed())
+        try:
+            with timing.stage("load_dataset"):
+                dataset_hash, data = await run_in_threadpool(dataset_cache.load_csv, dataset_file.file)
+            logger.info(f"Dataset carregado com sucesso a partir do arquivo {dataset_file.filename} ({dataset_hash}).")
+        except Exception as e:
+            logger.error(f"Erro ao carregar o arquivo CSV: {e}")
+            raise HTTPException(status_code=400, detail=f"Erro ao carregar o arquivo CSV: {e}")
+    elif dataset_hash:
+        try:
+            with timing.stage("load_dataset"):
+                data = await run_in_threadpool(dataset_manager.load_cached_dataset, dataset_hash)
+            logger.info(f"Dataset {dataset_hash} carregado do cache.")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Dataset não encontrado no cache. Envie o arquivo novamente.")
+    else:
+        try:
+            data = dataset_manager.load_default_dataset()
+            logger.info("Dataset padrão carregado com sucesso.")
+        except Exception as e:
+            logger.error(f"Erro ao carregar o dataset padrão: {e}")
+            raise HTTPException(status_code=500, detail=f"Erro ao carregar o dataset padrão: {e}")
+    return data, dataset_hash
+
+
+def _resolve_target_column(columns: List[str], target_column: Optional[str]) -> str:
+    if target_column is None:
+        target_column = columns[-1]
+        logger.info(f"Coluna alvo não especificada. Usando a última coluna: {target_column}.")
+    elif target_column not in columns:
+        logger.error(f"A coluna alvo '{target_column}' não foi encontrada no dataset.")
+        raise HTTPException(status_code=400, detail=f"Coluna alvo '{target_column}' não encontrada no dataset.")
+    return target_column
+
+
+def _validate_model(model_type: str, model_name: str):
+    if model_type not in MODEL_FACTORY:
+        raise HTTPException(status_code=400, detail="Modelo não suportado.")
+    try:
+        registry.model_dir(model_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _submit_incremental_training(
+    dataset_file: Optional[UploadFile],
+    dataset_hash: Optional[str],
+    chunk_size: int,
+    model_type: str,
+    model_params: str,
+    target_column: Optional[str],
+    columns_to_drop: Optional[str],
+    owner: str,
+    model_name: str,
+    promote: bool
+) -> dict:
+    model_class = MODEL_FACTORY[model_type]
+    if not hasattr(model_class, "partial_fit"):
+        raise HTTPException(status_code=400, detail=f"O modelo {model_type} não suporta treinamento incremental.")
+    if chunk_size <= 0:
+        raise HTTPException(status_code=400, detail="chunk_size deve ser maior que zero.")
+
+    if dataset_file:
+        try:
+            # O CSV é convertido em blocos; o arquivo nunca é carregado inteiro em memória.
+            timing.record("upload", timing.elapsed())
+            with timing.stage("store_dataset"):
+                dataset_hash = await run_in_threadpool(dataset_cache.store_csv, dataset_file.file, chunk_size)
+            logger.info(f"Dataset {dataset_file.filename} gravado no cache colunar ({dataset_hash}).")
+        except Exception as e:
+            logger.error(f"Erro ao carregar o arquivo CSV: {e}")
+            raise HTTPException(status_code=400, detail=f"Erro ao carregar o arquivo CSV: {e}")
+    elif not dataset_hash:
+        raise HTTPException(status_code=400, detail="O treinamento incremental exige um arquivo CSV ou um dataset_hash.")
+
+    try:
+        meta = dataset_cache.read_meta(dataset_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset não encontrado no cache. Envie o arquivo novamente.")
+    target_column = _resolve_target_column([column["name"] for column in meta["columns"]], target_column)
+
+    try:
+        job = job_manager.submit(
+            run_incremental_training_job,
+            MODEL_DIR,
+            model_name,
+            model_class,
+            parse_model_params(model_params),
+            dataset_cache.cache_dir,
+            dataset_hash,
+            chunk_size,
+            target_column,
+            parse_columns_to_drop(columns_to_drop),
+            promote,
+            owner=owner,
+            description={"model_type": model_type, "model_name": model_name, "streaming": True,
+                         "request_id": timing.current_request_id()}
+        )
+    except QueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail=str(e))
+
+    logger.info(f"Job de treinamento incremental {job.id} enfileirado para {owner}.")
+    return {"job_id": job.id, "status": job.status, "dataset_hash": dataset_hash}
+
 
 @app.post(
     "/train",
@@ -46,8 +233,13 @@ app = FastAPI(
     description=(
         "Endpoint para treinar um modelo de Machine Learning. "
         "Aceita um arquivo CSV contendo os dados para treinamento e permite configurar "
-        "o tipo de modelo, parâmetros adicionais e colunas a serem descartadas."
+        "o tipo de modelo, parâmetros adicionais e colunas a serem descartadas. "
+        "Cada upload é guardado em um cache colunar pelo hash do conteúdo; o hash devolvido "
+        "(`dataset_hash`) pode ser enviado no lugar do arquivo para treinar de novo sem reenviá-lo. "
+        "O treinamento é enfileirado e executado por um pool de workers; a resposta traz o ID do job, "
+        "que pode ser acompanhado em `/jobs/{job_id}`."
     ),
+    status_code=202,
     tags=["Treinamento"]
 )
 async def train(
@@ -55,10 +247,17 @@ async def train(
     model_type: str = Form("RandomForestClassifier", description="Tipo do modelo de Machine Learning a ser treinado (e.g., RandomForestClassifier, LogisticRegression)."),
     model_params: str = Form("{}", description="Parâmetros do modelo em formato JSON. Exemplo: `{\"n_estimators\": 100}`."),
     target_column: str = Form(None, description="Nome da coluna alvo no dataset. Caso não seja especificado, será usada a última coluna."),
-    columns_to_drop: str = Form(None, description="Lista de colunas a serem descartadas no dataset, separadas por vírgula (opcional).")
+    columns_to_drop: str = Form(None, description="Lista de colunas a serem descartadas no dataset, separadas por vírgula (opcional)."),
+    owner: str = Form("default", description="Time ou cliente dono do job, usado para dividir os workers de forma justa."),
+    model_name: str = Form(DEFAULT_MODEL_NAME, description="Nome do modelo no registro. Cada treinamento gera uma nova versão."),
+    promote: bool = Form(True, description="Promover a nova versão a `LATEST` ao final do treinamento."),
+    dataset_hash: str = Form(None, description="Hash (SHA-256) de um dataset já enviado, usado no lugar do arquivo (opcional)."),
+    streaming: bool = Form(False, description="Treinar em blocos com partial_fit, sem carregar o dataset inteiro em memória."),
+    chunk_size: int = Form(TRAIN_CHUNK_SIZE, description="Linhas por bloco no treinamento incremental."),
+    distributed_workers: Optional[int] = Form(None, description="Processos entre os quais as árvores da floresta são divididas. Padrão: `TRAIN_DISTRIBUTED_WORKERS` para florestas, 1 para os demais modelos.")
 ):
     """
-    Treinar um modelo de Machine Learning.
+    Enfileirar o treinamento de um modelo de Machine Learning.
 
     **Parâmetros:**
     - **dataset_file** (*UploadFile*): Arquivo CSV contendo os dados para treinamento (opcional).
@@ -66,59 +265,416 @@ async def train(
     - **model_params** (*str*): Parâmetros adicionais para o modelo em formato JSON. Exemplo: `{"n_estimators": 100, "max_depth": 5}`.
     - **target_column** (*str*): Nome da coluna alvo no dataset. Caso não seja especificada, será usada a última coluna.
     - **columns_to_drop** (*str*): Lista de colunas a serem descartadas no dataset, separadas por vírgula (opcional).
+    - **owner** (*str*): Time ou cliente dono do job (opcional).
+    - **model_name** (*str*): Nome do modelo no registro (opcional; padrão: `default`).
+    - **promote** (*bool*): Promover a nova versão a `LATEST` ao final do treinamento (opcional).
+    - **dataset_hash** (*str*): Hash de um dataset já enviado, usado quando nenhum arquivo é enviado (opcional).
+    - **streaming** (*bool*): Treinamento incremental para datasets maiores que a memória. O CSV é convertido
+      em blocos para o cache colunar e o modelo (que precisa ter `partial_fit`, como `SGDClassifier`
+      ou `GaussianNB`) é treinado bloco a bloco, com métricas de holdout calculadas durante a passada.
+    - **chunk_size** (*int*): Linhas por bloco no modo `streaming`.
+    - **distributed_workers** (*int*): Para florestas (`RandomForestClassifier`, `RandomForestRegressor`),
+      divide `n_estimators` entre esse número de processos, cada um com sua semente; as árvores são
+      juntadas em um único modelo ao final. Sem o campo, vale `TRAIN_DISTRIBUTED_WORKERS` para florestas;
+      valores acima de 1 para outros modelos são recusados.
 
     **Retornos:**
-    - **200**: Sucesso. Retorna as métricas de avaliação do modelo e o caminho do modelo salvo.
+    - **202**: Job enfileirado. Retorna o ID e o status do job e o hash do dataset.
     - **400**: Erro no formato do arquivo ou nos dados fornecidos.
-    - **500**: Erro no treinamento ou ao carregar o dataset padrão.
+    - **404**: `dataset_hash` não encontrado no cache.
+    - **429**: Fila de treinamento cheia.
+    - **500**: Erro ao carregar o dataset padrão.
     """
-    if model_type not in MODEL_FACTORY:
-        raise HTTPException(status_code=400, detail="Modelo não suportado.")
+    _validate_model(model_type, model_name)
+    if streaming:
+        return await _submit_incremental_training(
+            dataset_file, dataset_hash, chunk_size, model_type, model_params, target_column,
+            columns_to_drop, owner, model_name, promote
+        )
 
-    dataset_manager = DatasetManager(default_dataset="iris")
-
-    if dataset_file:
-        try:
-            data = pd.read_csv(dataset_file.file)
-            logger.info(f"Dataset carregado com sucesso a partir do arquivo {dataset_file.filename}.")
-        except Exception as e:
-            logger.error(f"Erro ao carregar o arquivo CSV: {e}")
-            raise HTTPException(status_code=400, detail=f"Erro ao carregar o arquivo CSV: {e}")
-    else:
-        try:
-            data = dataset_manager.load_default_dataset()
-            logger.info("Dataset padrão carregado com sucesso.")
-        except Exception as e:
-            logger.error(f"Erro ao carregar o dataset padrão: {e}")
-            raise HTTPException(status_code=500, detail=f"Erro ao carregar o dataset padrão: {e}")
-
-    if target_column is None:
-        target_column = data.columns[-1]
-        logger.info(f"Coluna alvo não especificada. Usando a última coluna: {target_column}.")
-    elif target_column not in data.columns:
-        logger.error(f"A coluna alvo '{target_column}' não foi encontrada no dataset.")
-        raise HTTPException(status_code=400, detail=f"Coluna alvo '{target_column}' não encontrada no dataset.")
+    data, dataset_hash = await _load_dataset(dataset_file, dataset_hash)
+    target_column = _resolve_target_column(data.columns, target_column)
 
     columns_to_drop_list = parse_columns_to_drop(columns_to_drop)
     model_params_dict = parse_model_params(model_params)
     model_class = MODEL_FACTORY[model_type]
+    if distributed_workers is None:
+        # O padrão do serviço vale só para florestas; os demais modelos treinam em um processo.
+        distributed_workers = TRAIN_DISTRIBUTED_WORKERS if supports_distributed(model_class) else 1
+    elif distributed_workers < 1:
+        raise HTTPException(status_code=400, detail="distributed_workers deve ser pelo menos 1.")
+    elif distributed_workers > 1 and not supports_distributed(model_class):
+        raise HTTPException(status_code=400, detail=f"O modelo {model_type} não suporta treinamento distribuído.")
+
+    try:
+        job = job_manager.submit(
+            run_training_job,
+            MODEL_DIR,
+            model_name,
+            model_class,
+            model_params_dict,
+            data,
+            target_column,
+            columns_to_drop_list,
+            promote,
+            TRAIN_PROFILE_MEMORY,
+            distributed_workers,
+            owner=owner,
+            description={"model_type": model_type, "model_name": model_name, "request_id": timing.current_request_id()}
+        )
+    except QueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail=str(e))
+
+    logger.info(f"Job de treinamento {job.id} enfileirado para {owner}.")
+    return {"job_id": job.id, "status": job.status, "dataset_hash": dataset_hash}
+
+
+@app.post(
+    "/tune",
+    summary="Buscar Hiperparâmetros",
+    description=(
+        "Enfileirar uma busca de hiperparâmetros com validação cruzada em k folds e halving sucessivo: "
+        "todos os candidatos começam com uma fração dos dados e só os melhores seguem para as rodadas "
+        "seguintes. Os folds são avaliados em paralelo em todos os núcleos. O resultado do job traz o "
+        "leaderboard, e o melhor modelo é retreinado com todos os dados e salvo no registro."
+    ),
+    status_code=202,
+    tags=["Treinamento"]
+)
+async def tune(
+    param_grid: str = Form(..., description="Espaço de busca em JSON. Exemplo: `{\"n_estimators\": [50, 100], \"max_depth\": [5, null]}`."),
+    dataset_file: UploadFile = None,
+    model_type: str = Form("RandomForestClassifier", description="Tipo do modelo a ser ajustado."),
+    model_params: str = Form("{}", description="Parâmetros fixos do modelo em formato JSON, aplicados a todos os candidatos."),
+    search: str = Form("grid", description="Estratégia de busca: `grid` ou `random`."),
+    cv: int = Form(5, description="Quantidade de folds da validação cruzada."),
+    factor: int = Form(3, description="Fator de halving: a cada rodada só 1/factor dos candidatos continua."),
+    n_candidates: int = Form(None, description="Candidatos sorteados na busca aleatória (padrão: o máximo que os dados permitem)."),
+    target_column: str = Form(None, description="Nome da coluna alvo no dataset. Caso não seja especificado, será usada a última coluna."),
+    columns_to_drop: str = Form(None, description="Lista de colunas a serem descartadas no dataset (opcional)."),
+    owner: str = Form("default", description="Time ou cliente dono do job."),
+    model_name: str = Form(DEFAULT_MODEL_NAME, description="Nome do modelo no registro onde o melhor candidato é salvo."),
+    promote: bool = Form(True, description="Promover o melhor modelo a `LATEST` ao final da busca."),
+    dataset_hash: str = Form(None, description="Hash de um dataset já enviado, usado no lugar do arquivo (opcional).")
+):
+    """
+    Enfileirar uma busca de hiperparâmetros.
+
+    **Parâmetros:**
+    - **param_grid** (*str*): Espaço de busca em JSON. Na busca `random`, um parâmetro pode ser uma distribuição:
+      `{"C": {"distribution": "loguniform", "low": 0.001, "high": 10}}` (`uniform`, `loguniform` ou `randint`).
+    - **dataset_file** (*UploadFile*): Arquivo CSV contendo os dados (opcional).
+    - **model_type** (*str*): Tipo do modelo a ser ajustado.
+    - **model_params** (*str*): Parâmetros fixos do modelo em JSON (opcional).
+    - **search** (*str*): `grid` ou `random`.
+    - **cv** (*int*): Quantidade de folds.
+    - **factor** (*int*): Fator de halving.
+    - **n_candidates** (*int*): Candidatos da busca aleatória (opcional).
+    - **target_column**, **columns_to_drop**, **owner**, **model_name**, **promote**, **dataset_hash**: como em `/train`.
+
+    **Retornos:**
+    - **202**: Job enfileirado. O resultado em `/jobs/{job_id}` traz `leaderboard`, `best_params` e `best_score`.
+    - **400**: Espaço de busca, parâmetros ou dados inválidos.
+    - **404**: `dataset_hash` não encontrado no cache.
+    - **429**: Fila de treinamento cheia.
+    """
+    _validate_model(model_type, model_name)
+    if cv < 2:
+        raise HTTPException(status_code=400, detail="cv deve ser maior ou igual a 2.")
+    if factor < 2:
+        raise HTTPException(status_code=400, detail="factor deve ser maior ou igual a 2.")
+    try:
+        param_space = parse_param_space(param_grid, search)
+        model_params_dict = parse_model_params(model_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    data, dataset_hash = await _load_dataset(dataset_file, dataset_hash)
+    target_column = _resolve_target_column(data.columns, target_column)
+    columns_to_drop_list = parse_columns_to_drop(columns_to_drop)
 
-    trainer = Trainer(
-        model_dir="/shared-data/models",
-        model_class=model_class,
-        model_params=model_params_dict
-    )
     try:
-        metrics, model_path = trainer.train(
-            data=data,
-            target_column=target_column,
-            columns_to_drop=columns_to_drop_list
+        job = job_manager.submit(
+            run_tuning_job,
+            MODEL_DIR,
+            model_name,
+            MODEL_FACTORY[model_type],
+            model_params_dict,
+            param_space,
+            data,
+            target_column,
+            columns_to_drop_list,
+            search,
+            cv,
+            factor,
+            n_candidates or "exhaust",
+            TUNE_N_JOBS,
+            promote,
+            owner=owner,
+            description={"model_type": model_type, "model_name": model_name, "search": search,
+                         "request_id": timing.current_request_id()}
         )
-        logger.info(f"Modelo treinado com sucesso: {model_path}")
-        return {"metrics": metrics, "model_path": model_path}
-    except Exception as e:
-        logger.error(f"Erro no treinamento: {e}")
-        raise HTTPException(status_code=500, detail=f"Erro no treinamento: {e}")
+    except QueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail=str(e))
+
+    logger.info(f"Job de busca de hiperparâmetros {job.id} enfileirado para {owner}.")
+    return {"job_id": job.id, "status": job.status, "dataset_hash": dataset_hash}
+
+
+@app.post(
+    "/retrain",
+    summary="Retreinar Modelo com Dados Novos",
+    description=(
+        "Enfileirar o retreino incremental de um modelo já treinado: o artefato atual é carregado e "
+        "estendido só com as linhas novas, sem retreinar sobre o histórico. Florestas ganham árvores "
+        "novas (warm_start), modelos com partial_fit recebem uma atualização e os demais modelos lineares "
+        "partem dos coeficientes atuais. A nova versão é gravada no registro."
+    ),
+    status_code=202,
+    tags=["Treinamento"]
+)
+async def retrain(
+    dataset_file: UploadFile = None,
+    dataset_hash: str = Form(None, description="Hash (SHA-256) de um dataset já enviado, usado no lugar do arquivo (opcional)."),
+    target_column: str = Form(None, description="Nome da coluna alvo. Caso não seja especificado, é a coluna que não é feature do modelo."),
+    columns_to_drop: str = Form(None, description="Lista de colunas a serem descartadas no dataset, separadas por vírgula (opcional)."),
+    n_estimators: int = Form(None, description="Árvores novas das florestas (padrão: proporcional às linhas novas)."),
+    owner: str = Form("default", description="Time ou cliente dono do job."),
+    model_name: str = Form(DEFAULT_MODEL_NAME, description="Nome do modelo no registro."),
+    version: str = Form(None, description="Versão a ser estendida (padrão: a versão promovida)."),
+    promote: bool = Form(True, description="Promover a nova versão a `LATEST` ao final do retreino.")
+):
+    """
+    Enfileirar o retreino incremental de um modelo.
+
+    **Parâmetros:**
+    - **dataset_file** (*UploadFile*): Arquivo CSV só com as linhas novas.
+    - **dataset_hash** (*str*): Hash de um dataset já enviado, usado quando nenhum arquivo é enviado.
+    - **target_column** (*str*): Nome da coluna alvo (opcional).
+    - **columns_to_drop** (*str*): Lista de colunas a serem descartadas no dataset (opcional).
+    - **n_estimators** (*int*): Árvores acrescentadas às florestas (opcional).
+    - **owner**, **model_name**, **promote**: como em `/train`.
+    - **version** (*str*): Versão de partida (opcional; padrão: a promovida).
+
+    **Retornos:**
+    - **202**: Job enfileirado. O resultado em `/jobs/{job_id}` traz as métricas e a `base_version`.
+    - **400**: Dados ou parâmetros inválidos.
+    - **404**: Modelo, versão ou `dataset_hash` não encontrados.
+    - **429**: Fila de treinamento cheia.
+    """
+    try:
+        registry.resolve(model_name, version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if dataset_file is None and not dataset_hash:
+        raise HTTPException(status_code=400, detail="O retreino exige um arquivo CSV ou um dataset_hash com as linhas novas.")
+    if n_estimators is not None and n_estimators <= 0:
+        raise HTTPException(status_code=400, detail="n_estimators deve ser maior que zero.")
+
+    data, dataset_hash = await _load_dataset(dataset_file, dataset_hash)
+
+    try:
+        job = job_manager.submit(
+            run_retraining_job,
+            MODEL_DIR,
+            model_name,
+            version,
+            data,
+            target_column,
+            parse_columns_to_drop(columns_to_drop),
+            n_estimators,
+            promote,
+            owner=owner,
+            description={"model_name": model_name, "retrain": True, "request_id": timing.current_request_id()}
+        )
+    except QueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail=str(e))
+
+    logger.info(f"Job de retreino {job.id} enfileirado para {owner}.")
+    return {"job_id": job.id, "status": job.status, "dataset_hash": dataset_hash}
+
+
+@app.get(
+    "/jobs",
+    summary="Listar Jobs de Treinamento",
+    description="Listar os jobs de treinamento conhecidos pelo serviço, com status e tempos.",
+    tags=["Treinamento"]
+)
+def list_jobs():
+    """
+    Listar os jobs de treinamento.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna a lista de jobs.
+    """
+    return {"jobs": [job.to_dict() for job in job_manager.list()]}
+
+
+@app.get(
+    "/jobs/{job_id}",
+    summary="Status do Job de Treinamento",
+    description="Consultar o status, as métricas e os tempos de fila e execução de um job de treinamento.",
+    tags=["Treinamento"]
+)
+def get_job(job_id: str):
+    """
+    Consultar um job de treinamento.
+
+    **Parâmetros:**
+    - **job_id** (*str*): ID retornado por `/train`.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna status, métricas (`result`), erro e tempos do job.
+    - **404**: Job não encontrado.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return job.to_dict()
+
+
+@app.delete(
+    "/jobs/{job_id}",
+    summary="Cancelar Job de Treinamento",
+    description="Cancelar um job de treinamento que ainda está na fila.",
+    tags=["Treinamento"]
+)
+def cancel_job(job_id: str):
+    """
+    Cancelar um job de treinamento pendente.
+
+    **Parâmetros:**
+    - **job_id** (*str*): ID retornado por `/train`.
+
+    **Retornos:**
+    - **200**: Sucesso. O job foi cancelado.
+    - **404**: Job não encontrado.
+    - **409**: O job já está em execução ou finalizado.
+    """
+    try:
+        job = job_manager.cancel(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    except JobNotCancellableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info(f"Job de treinamento {job_id} cancelado.")
+    return job.to_dict()
+
+
+@app.get(
+    "/models",
+    summary="Listar Modelos",
+    description="Listar os modelos do registro, suas versões e a versão promovida de cada um.",
+    tags=["Modelos"]
+)
+def list_models():
+    """
+    Listar os modelos registrados.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna, por nome de modelo, as versões disponíveis e a versão `latest`.
+    """
+    return {"models": registry.list_models()}
+
+
+@app.post(
+    "/models/{model_name}/promote",
+    summary="Promover Versão de Modelo",
+    description="Apontar `LATEST` de um modelo para uma versão já treinada. A troca é atômica para o Predict Service.",
+    tags=["Modelos"]
+)
+def promote_model(model_name: str, version: str = Form(..., description="Versão a ser promovida.")):
+    """
+    Promover uma versão de modelo.
+
+    **Parâmetros:**
+    - **model_name** (*str*): Nome do modelo no registro.
+    - **version** (*str*): Versão a ser promovida.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna o modelo e a versão promovida.
+    - **400**: Nome ou versão inválidos.
+    - **404**: Versão não encontrada.
+    """
+    try:
+        registry.promote(model_name, version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    logger.info(f"Versão {version} do modelo {model_name} promovida.")
+    return {"model_name": model_name, "latest": version}
+
+
+@app.get(
+    "/datasets/cache",
+    summary="Status do Cache de Datasets",
+    description="Retornar o uso do cache colunar de datasets e seus contadores de acertos e despejos.",
+    tags=["Status"]
+)
+def dataset_cache_status():
+    """
+    Consultar o estado do cache de datasets.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna o diretório, o orçamento e o uso em bytes e os contadores do cache.
+    """
+    return dataset_cache.stats()
+
+
+@app.post(
+    "/datasets/synthetic",
+    summary="Gerar Dataset Sintético",
+    description=(
+        "Gerar um dataset sintético determinístico direto no cache colunar, em blocos, sem montá-lo em memória. "
+        "O hash devolvido é usado como `dataset_hash` no `/train` (inclusive com `streaming=true`) e no `/tune`; "
+        "a mesma configuração devolve sempre o mesmo hash e é gerada uma única vez."
+    ),
+    tags=["Datasets"]
+)
+async def create_synthetic_dataset(
+    dataset: str = Form("synthetic_classification", description="Gerador: `synthetic_classification` ou `synthetic_regression`."),
+    rows: int = Form(100_000, description="Número de linhas."),
+    numeric: int = Form(8, description="Número de colunas numéricas (`num_i`)."),
+    categorical: int = Form(2, description="Número de colunas categóricas (`cat_i`)."),
+    cardinality: int = Form(50, description="Categorias distintas em cada coluna categórica."),
+    missing_rate: float = Form(0.01, description="Fração de valores ausentes nas features."),
+    n_classes: int = Form(2, description="Número de classes (apenas classificação)."),
+    seed: int = Form(0, description="Semente do gerador."),
+    chunk_size: int = Form(TRAIN_CHUNK_SIZE, description="Linhas geradas e gravadas por bloco.")
+):
+    """
+    Gerar um dataset sintético no cache de datasets.
+
+    **Parâmetros:**
+    - **dataset** (*str*): `synthetic_classification` ou `synthetic_regression`.
+    - **rows**, **numeric**, **categorical**, **cardinality**, **missing_rate**, **n_classes**, **seed**:
+      configuração do gerador. O alvo fica na coluna `target`.
+    - **chunk_size** (*int*): Linhas por bloco na geração.
+
+    **Retornos:**
+    - **200**: Sucesso. Retorna o hash do dataset, o número de linhas e as colunas.
+    - **400**: Gerador desconhecido ou configuração inválida.
+    """
+    if dataset not in SYNTHETIC_DATASETS:
+        raise HTTPException(status_code=400, detail=f"Dataset '{dataset}' não suportado. Use {list(SYNTHETIC_DATASETS)}.")
+    params = {
+        "rows": rows, "numeric": numeric, "categorical": categorical, "cardinality": cardinality,
+        "missing_rate": missing_rate, "n_classes": n_classes, "seed": seed,
+    }
+    try:
+        dataset_manager = DatasetManager(default_dataset=dataset, cache=dataset_cache, dataset_params=params)
+        dataset_hash = await run_in_threadpool(dataset_manager.cache_default_dataset, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    meta = dataset_cache.read_meta(dataset_hash)
+    logger.info(f"Dataset sintético {dataset} gravado no cache ({dataset_hash}, {meta['rows']} linhas).")
+    return {"dataset_hash": dataset_hash, "rows": meta["rows"], "columns": [column["name"] for column in meta["columns"]]}
 
 
 @app.get(
@@ -0,0 +1,257 @@
+"""
+Motor de inferência compilado, sem dependência do scikit-learn.
+
+Depois do treino, florestas aleatórias e a regressão logística são exportadas para arrays
+planos (nós, limiares e valores de todas as árvores empilhados; matriz de coeficientes) e
+avaliadas aqui só com numpy. A avaliação repete as mesmas operações, na mesma ordem e com
+os mesmos tipos do scikit-learn 1.3, de modo que as predições e probabilidades são idênticas
+bit a bit às do modelo original. Importar este módulo não importa o scikit-learn.
+"""
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from observability import timing
+from training_pipeline.preprocessing import FeatureTransform
+
+COMPILED_ARTIFACT_FILE = "model.compiled.pkl"
+
+
+class CompiledForest:
+    """
+    Todas as árvores de uma floresta em arrays empilhados.
+
+    Os índices de filhos são globais (deslocados pelo início de cada árvore), então cada passo
+    da descida avança todos os pares (linha, árvore) ainda fora de uma folha de uma vez, com
+    indexação vetorizada; os pares que chegam a uma folha saem do conjunto ativo.
+    """
+
+    def __init__(self, model):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        self.roots = offsets[:-1].astype(np.intp)
+        self.n_features_in_ = model.n_features_in_
+
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, -1, tree.children_left + offset).astype(np.intp))
+            rights.append(np.where(is_leaf, -1, tree.children_right + offset).astype(np.intp))
+            values.append(self._leaf_values(tree))
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.children_left = np.concatenate(lefts)
+        self.children_right = np.concatenate(rights)
+        self.is_leaf = self.children_left == -1
+        self.value = np.concatenate(values)
+
+    def _leaf_values(self, tree) -> np.ndarray:
+        return tree.value[:, 0, 0].astype(np.float64)
+
+    def _validate(self, X) -> np.ndarray:
+        # As árvores do scikit-learn avaliam em float32 e rejeitam valores não finitos.
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Esperadas {self.n_features_in_} features, recebido array com formato {X.shape}.")
+        if not np.isfinite(X).all():
+            raise ValueError("As features contêm NaN ou infinito.")
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Índice global da folha alcançada por cada linha em cada árvore (linhas x árvores).
+        """
+        X = self._validate(X)
+        n_samples, n_trees = X.shape[0], len(self.roots)
+        # Pares (linha, árvore) achatados; a linha vira o deslocamento no X achatado.
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_offsets = np.repeat(np.arange(n_samples, dtype=np.intp) * X.shape[1], n_trees)
+        nodes = np.tile(self.roots, n_samples)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            # float32 <= float64 promove para float64, como a comparação do Cython.
+            go_left = flat_X[row_offsets[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.children_left[current], self.children_right[current])
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+        return nodes.reshape(n_samples, n_trees)
+
+    def _accumulate(self, leaves: np.ndarray, shape: tuple) -> np.ndarray:
+        # Soma árvore a árvore, na ordem de estimators_, e divide no fim, como o scikit-learn.
+        total = np.zeros(shape, dtype=np.float64)
+        for t in range(leaves.shape[1]):
+            total += self.value[leaves[:, t]]
+        total /= leaves.shape[1]
+        return total
+
+
+class CompiledForestRegressor(CompiledForest):
+    def predict(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        return self._accumulate(leaves, (leaves.shape[0],))
+
+
+class CompiledForestClassifier(CompiledForest):
+    def __init__(self, model):
+        self.classes_ = np.asarray(model.classes_)
+        super().__init__(model)
+
+    def _leaf_values(self, tree) -> np.ndarray:
+        # Normaliza cada nó como DecisionTreeClassifier.predict_proba normaliza cada linha.
+        proba = tree.value[:, 0, :len(self.classes_)].astype(np.float64)
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        proba /= normalizer
+        return proba
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        return self._accumulate(leaves, (leaves.shape[0], len(self.classes_)))
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+class CompiledLogisticRegression:
+    """
+    Regressão logística como matriz de coeficientes e interceptos.
+    """
+
+    def __init__(self, model):
+        self.coef_ = np.array(model.coef_)
+        self.intercept_ = np.array(model.intercept_)
+        self.classes_ = np.asarray(model.classes_)
+        self.n_features_in_ = model.n_features_in_
+        # Mesma regra de LogisticRegression.predict_proba para escolher OvR ou softmax.
+        self.ovr = model.multi_class in ("ovr", "warn") or (
+            model.multi_class == "auto"
+            and (self.classes_.size <= 2 or model.solver in ("liblinear", "newton-cholesky"))
+        )
+
+    def decision_function(self, X) -> np.ndarray:
+        X = np.asarray(X)
+        if X.dtype == object:
+            X = X.astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Esperadas {self.n_features_in_} features, recebido array com formato {X.shape}.")
+        scores = X @ self.coef_.T + self.intercept_
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict(self, X) -> np.ndarray:
+        scores = self.decision_function(X)
+        indices = (scores > 0).astype(int) if scores.ndim == 1 else scores.argmax(axis=1)
+        return self.classes_[indices]
+
+    def predict_proba(self, X) -> np.ndarray:
+        decision = self.decision_function(X)
+        if self.ovr:
+            # scipy já acompanha o numpy na imagem e não carrega o scikit-learn.
+            from scipy.special import expit
+
+            expit(decision, out=decision)
+            if decision.ndim == 1:
+                return np.vstack([1 - decision, decision]).T
+            decision /= decision.sum(axis=1).reshape((decision.shape[0], -1))
+            return decision
+
+        decision = np.c_[-decision, decision] if decision.ndim == 1 else decision
+        decision -= np.max(decision, axis=1).reshape((-1, 1))
+        np.exp(decision, decision)
+        decision /= np.sum(decision, axis=1).reshape((-1, 1))
+        return decision
+
+
+# Nome da classe do estimador -> forma compilada. A busca é pelo nome para que este módulo
+# não precise importar o scikit-learn.
+_COMPILERS = {
+    "RandomForestClassifier": CompiledForestClassifier,
+    "RandomForestRegressor": CompiledForestRegressor,
+    "LogisticRegression": CompiledLogisticRegression,
+}
+
+
+def compile_model(model):
+    """
+    Retorna a forma compilada do modelo, ou None se ele não for suportado
+    (outros estimadores, ou florestas com várias saídas).
+    """
+    compiler = _COMPILERS.get(type(model).__name__)
+    if compiler is None or getattr(model, "n_outputs_", 1) != 1:
+        return None
+    return compiler(model)
+
+
+class CompiledPredictor:
+    """
+    Carrega o artefato compilado e oferece a mesma interface de predição do Trainer
+    (transform, predict_features, predict_proba_features, predict, predict_iter),
+    sem importar o scikit-learn.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        unknown_category_code: Optional[int] = -1,
+        mmap_mode: Optional[str] = None
+    ):
+        self.model_dir = model_dir
+        self.model_file = os.path.join(model_dir, COMPILED_ARTIFACT_FILE)
+        self.unknown_category_code = unknown_category_code
+        self.mmap_mode = mmap_mode
+        self.model = None
+        self.feature_transform = None
+
+    def load_model(self):
+        if not os.path.exists(self.model_file):
+            raise FileNotFoundError(f"Modelo compilado não encontrado em {self.model_file}.")
+        with timing.stage("load_model"):
+            artifacts = joblib.load(self.model_file, mmap_mode=self.mmap_mode)
+        self.model = artifacts["model"]
+        self.feature_transform = FeatureTransform(
+            fill_values=artifacts["fill_values"],
+            categories=artifacts["categories"],
+            feature_columns=artifacts["feature_columns"],
+            unknown_category_code=self.unknown_category_code
+        )
+
+    @property
+    def feature_columns(self) -> Optional[List[str]]:
+        return self.feature_transform.feature_columns if self.feature_transform is not None else None
+
+    def transform(self, data: pd.DataFrame, columns_to_drop: Optional[List[str]] = None) -> pd.DataFrame:
+        if self.model is None:
+            self.load_model()
+        with timing.stage("preprocess_predict"):
+            return self.feature_transform.transform(data, columns_to_drop=columns_to_drop)
+
+    def predict_features(self, features: pd.DataFrame) -> np.ndarray:
+        with timing.stage("model_predict"):
+            return self.model.predict(features)
+
+    def predict_proba_features(self, features: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        if not hasattr(self.model, "predict_proba"):
+            raise ValueError(f"O modelo {type(self.model).__name__} não fornece probabilidades.")
+        with timing.stage("model_predict_proba"):
+            probabilities = np.ascontiguousarray(self.model.predict_proba(features), dtype=np.float32)
+        return probabilities, self.model.classes_
+
+    def predict(self, data: pd.DataFrame, columns_to_drop: Optional[List[str]] = None):
+        predictions = self.predict_features(self.transform(data, columns_to_drop=columns_to_drop))
+        with timing.stage("tolist"):
+            return predictions.tolist()
+
+    def predict_iter(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        columns_to_drop: Optional[List[str]] = None
+    ) -> Iterator[np.ndarray]:
+        if self.model is None:
+            raise RuntimeError("Modelo não carregado. Chame load_model antes de predict_iter.")
+        for chunk in chunks:
+            yield self.predict_features(self.transform(chunk, columns_to_drop=columns_to_drop))
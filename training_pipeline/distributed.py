@@ -0,0 +1,109 @@
+import os
+import tempfile
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import is_classifier
+from sklearn.ensemble._forest import BaseForest
+
+# Nome do arquivo com a matriz de features e o alvo compartilhados com os workers.
+SHARED_DATA_FILE = "train_data.joblib"
+
+
+def supports_distributed(model_class) -> bool:
+    return isinstance(model_class, type) and issubclass(model_class, BaseForest)
+
+
+def split_estimators(n_estimators: int, n_workers: int) -> List[int]:
+    """
+    Divide `n_estimators` árvores entre até `n_workers` workers, sem workers vazios.
+    """
+    n_workers = max(1, min(n_workers, n_estimators))
+    base, extra = divmod(n_estimators, n_workers)
+    return [base + (1 if i < extra else 0) for i in range(n_workers)]
+
+
+def shard_seeds(random_state: Optional[int], n_shards: int) -> List[int]:
+    """
+    Sementes independentes para cada parte da floresta, derivadas de `random_state`: o mesmo
+    `random_state` gera a mesma floresta, qualquer que seja o executor.
+    """
+    children = np.random.SeedSequence(random_state).spawn(n_shards)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def fit_forest_shard(model_class, model_params: dict, data_path: str, columns: List[str], n_estimators: int, seed: int):
+    """
+    Treina uma parte da floresta em um worker. A matriz de features é lida do arquivo
+    compartilhado com memory mapping, sem cópia por worker.
+    """
+    X, y = joblib.load(data_path, mmap_mode="r")
+    model = model_class(**{**model_params, "n_estimators": n_estimators, "random_state": seed})
+    model.fit(pd.DataFrame(X, columns=columns, copy=False), y)
+    return model
+
+
+def merge_forests(forests: list, model_params: dict):
+    """
+    Junta as árvores das partes em uma única floresta, na ordem das partes.
+    """
+    merged = forests[0]
+    for forest in forests[1:]:
+        if is_classifier(merged) and not np.array_equal(forest.classes_, merged.classes_):
+            raise ValueError("As partes da floresta foram treinadas com classes diferentes.")
+        merged.estimators_ += forest.estimators_
+    merged.set_params(n_estimators=len(merged.estimators_), random_state=model_params.get("random_state"))
+    return merged
+
+
+def fit_forest_distributed(
+    model_class,
+    model_params: dict,
+    X: pd.DataFrame,
+    y,
+    n_workers: int,
+    executor: Optional[Executor] = None,
+    work_dir: Optional[str] = None
+):
+    """
+    Treina uma floresta dividindo `n_estimators` entre `n_workers` workers.
+
+    A matriz já pré-processada é gravada uma vez em `work_dir` e cada worker a lê com memory
+    mapping; cada um treina sua parte das árvores com uma semente própria, e as partes são
+    juntadas em uma única floresta. Sem `executor`, um ProcessPoolExecutor local faz o papel
+    dos workers; qualquer Executor cujos workers enxerguem `work_dir` (um volume compartilhado,
+    por exemplo) pode ser usado no lugar.
+    """
+    if not supports_distributed(model_class):
+        raise ValueError(f"O modelo {model_class.__name__} não suporta treinamento distribuído.")
+    if model_params.get("oob_score"):
+        raise ValueError("oob_score não é suportado no treinamento distribuído.")
+
+    n_estimators = model_params.get("n_estimators", model_class().n_estimators)
+    sizes = split_estimators(n_estimators, n_workers)
+    seeds = shard_seeds(model_params.get("random_state"), len(sizes))
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as shared_dir:
+        data_path = os.path.join(shared_dir, SHARED_DATA_FILE)
+        joblib.dump((np.asarray(X), np.asarray(y)), data_path)
+        columns = list(X.columns)
+
+        own_executor = executor is None
+        if own_executor:
+            # "spawn" evita herdar locks de threads do processo que coordena o treinamento.
+            executor = ProcessPoolExecutor(max_workers=len(sizes), mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = [
+                executor.submit(fit_forest_shard, model_class, model_params, data_path, columns, size, seed)
+                for size, seed in zip(sizes, seeds)
+            ]
+            forests = [future.result() for future in futures]
+        finally:
+            if own_executor:
+                executor.shutdown(cancel_futures=True)
+
+    return merge_forests(forests, model_params)
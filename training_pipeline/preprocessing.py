@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Optional
+
+
+def drop_columns(data: pd.DataFrame, columns_to_drop: Optional[List[str]]) -> pd.DataFrame:
+    """
+    Remove as colunas existentes em uma única chamada, com uma só cópia do DataFrame.
+    """
+    if columns_to_drop:
+        present = [col for col in columns_to_drop if col in data.columns]
+        if present:
+            data = data.drop(columns=present)
+    return data
+
+
+class FeatureTransform:
+    """
+    Transformação de features pré-compilada a partir das estatísticas do treinamento.
+
+    Guarda os valores de imputação (média das colunas numéricas e moda das categóricas)
+    e o vocabulário de cada coluna categórica, de modo que a predição não dependa das
+    estatísticas do lote recebido. Não depende do scikit-learn.
+    """
+
+    def __init__(
+        self,
+        fill_values: Optional[Dict[str, object]] = None,
+        categories: Optional[Dict[str, list]] = None,
+        feature_columns: Optional[List[str]] = None,
+        unknown_category_code: Optional[int] = -1
+    ):
+        self.fill_values = fill_values
+        self.categories = categories or {}
+        self.feature_columns = feature_columns
+        self.unknown_category_code = unknown_category_code
+
+    @staticmethod
+    def compute_fill_values(data: pd.DataFrame, columns: Optional[List[str]] = None) -> Dict[str, object]:
+        """
+        Calcula a média das colunas numéricas e a moda das colunas categóricas
+        (de `columns`, ou de todas). As colunas são lidas uma a uma, sem copiar o DataFrame.
+        """
+        fill_values = {}
+        for col in data.columns if columns is None else columns:
+            values = data[col]
+            if values.dtype == object:
+                mode = values.mode()
+                if not mode.empty:
+                    fill_values[col] = mode[0]
+            elif pd.api.types.is_numeric_dtype(values):
+                fill_values[col] = values.mean()
+        return fill_values
+
+    def _encode(self, values: pd.Series, col: str) -> np.ndarray:
+        codes = pd.Categorical(values, categories=self.categories[col]).codes
+        unseen = codes == -1
+        if unseen.any():
+            if self.unknown_category_code is None:
+                unknown = sorted(set(values[unseen].astype(str)))
+                raise ValueError(f"Categorias não vistas no treinamento na coluna '{col}': {unknown}")
+            if self.unknown_category_code != -1:
+                codes = np.where(unseen, self.unknown_category_code, codes)
+        return codes
+
+    def transform(
+        self,
+        data: pd.DataFrame,
+        columns_to_drop: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Aplica imputação e codificação categórica usando apenas as estatísticas do treinamento.
+        Categorias não vistas recebem `unknown_category_code` (ou geram erro, se for None).
+        """
+        data = drop_columns(data, columns_to_drop)
+
+        if self.fill_values is None:
+            # Artefatos antigos não guardam as estatísticas de treino: usa as do próprio lote.
+            fill_values = self.compute_fill_values(data)
+        else:
+            fill_values = {col: value for col, value in self.fill_values.items() if col in data.columns}
+        # Só as colunas com valores ausentes passam pelo fillna: com um dict grande o pandas
+        # reescreve coluna a coluna mesmo as que não têm nada a preencher.
+        fill_values = {col: value for col, value in fill_values.items() if data[col].hasnans}
+        if fill_values:
+            data = data.fillna(fill_values)
+
+        encoded = {
+            col: self._encode(data[col], col)
+            for col in data.select_dtypes(include=["object"]).columns
+            if col in self.categories
+        }
+        missing_encoders = set(data.select_dtypes(include=["object"]).columns) - set(encoded)
+        if missing_encoders:
+            col = sorted(missing_encoders)[0]
+            raise ValueError(
+                f"A coluna categórica '{col}' não foi vista no treinamento (encoder ausente)."
+            )
+        if encoded:
+            data = data.assign(**encoded)
+
+        if self.feature_columns is not None:
+            missing = [col for col in self.feature_columns if col not in data.columns]
+            if missing:
+                raise ValueError(f"Colunas ausentes no dataset de predição: {missing}")
+            data = data[self.feature_columns]
+
+        return data
+
+
+class StreamingStatistics:
+    """
+    Acumula, bloco a bloco, as estatísticas que o treinamento em memória calcula sobre o
+    dataset inteiro: média das colunas numéricas, moda e vocabulário das categóricas.
+    A memória usada depende da cardinalidade das colunas categóricas, não do número de linhas.
+
+    Como guarda somas e contagens, e não só os valores finais, é gravada junto com o modelo e
+    permite combinar as estatísticas do histórico com as de dados novos (merge) no retreino.
+    """
+
+    def __init__(self):
+        self.columns = None
+        self.rows = 0
+        self._sums = {}
+        self._counts = {}
+        self._value_counts = {}
+
+    def update(self, chunk: pd.DataFrame, columns: Optional[List[str]] = None):
+        """
+        Acumula as estatísticas de `columns` (ou de todas as colunas) do bloco, sem copiá-lo.
+        """
+        columns = chunk.columns.tolist() if columns is None else list(columns)
+        if self.columns is None:
+            self.columns = columns
+        self.rows += len(chunk)
+        for col in columns:
+            values = chunk[col]
+            if values.dtype == object:
+                counts = self._value_counts.setdefault(col, {})
+                for value, count in values.value_counts().items():
+                    counts[value] = counts.get(value, 0) + int(count)
+            elif pd.api.types.is_numeric_dtype(values):
+                self._sums[col] = self._sums.get(col, 0.0) + float(values.sum())
+                self._counts[col] = self._counts.get(col, 0) + int(values.count())
+
+    def fill_values(self) -> Dict[str, object]:
+        """
+        Equivalente a FeatureTransform.compute_fill_values sobre todos os blocos vistos.
+        """
+        fill_values = {
+            col: self._sums[col] / self._counts[col] if self._counts[col] else np.nan
+            for col in self._sums
+        }
+        for col, counts in self._value_counts.items():
+            if counts:
+                # Em caso de empate, pandas.Series.mode devolve o menor valor.
+                fill_values[col] = min(counts, key=lambda value: (-counts[value], value))
+        return fill_values
+
+    def categories(self) -> Dict[str, list]:
+        """
+        Vocabulário ordenado de cada coluna categórica, na mesma ordem do LabelEncoder.
+        """
+        return {col: sorted(counts) for col, counts in self._value_counts.items()}
+
+    def merge(self, other: "StreamingStatistics") -> "StreamingStatistics":
+        """
+        Estatísticas combinadas das linhas vistas por `self` e por `other`: as médias ficam
+        ponderadas pela quantidade de valores de cada lado e as modas, pelas contagens somadas.
+        """
+        merged = StreamingStatistics()
+        merged.columns = self.columns if self.columns is not None else other.columns
+        merged.rows = self.rows + other.rows
+        for col in set(self._sums) | set(other._sums):
+            merged._sums[col] = self._sums.get(col, 0.0) + other._sums.get(col, 0.0)
+            merged._counts[col] = self._counts.get(col, 0) + other._counts.get(col, 0)
+        for col in set(self._value_counts) | set(other._value_counts):
+            counts = dict(self._value_counts.get(col, {}))
+            for value, count in other._value_counts.get(col, {}).items():
+                counts[value] = counts.get(value, 0) + count
+            merged._value_counts[col] = counts
+        return merged
+
+    def extend_categories(self, categories: Dict[str, list]) -> Dict[str, list]:
+        """
+        Acrescenta ao fim de cada vocabulário existente as categorias novas, em ordem. Os
+        códigos já usados pelo modelo não mudam; as categorias novas recebem os seguintes.
+        """
+        extended = {}
+        for col, counts in self._value_counts.items():
+            known = list(categories.get(col, []))
+            seen = set(known)
+            extended[col] = known + sorted(value for value in counts if value not in seen)
+        return extended
@@ -0,0 +1,55 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StageMemoryProfiler:
+    """
+    Mede a duração de cada etapa do treinamento e, se habilitado, o pico de memória alocada
+    com tracemalloc.
+
+    O pico é relativo à memória já alocada no início da etapa, de modo que cada valor mostra
+    quanto a etapa precisou a mais. Os arrays do numpy e do pandas são registrados pelo
+    tracemalloc; estruturas internas de extensões em C que não usam o alocador do Python
+    (por exemplo, as árvores do scikit-learn) não aparecem. A medição de tempo é sempre feita;
+    a de memória só quando `enabled`, pois o tracemalloc deixa as alocações mais lentas.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages: Dict[str, dict] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.stages[name] = {"seconds": time.perf_counter() - start}
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.stages[name] = {
+                "peak_bytes": max(peak - baseline, 0),
+                "retained_bytes": current - baseline,
+                "seconds": time.perf_counter() - start,
+            }
+            if started_tracing:
+                tracemalloc.stop()
+
+    def report(self) -> Dict[str, dict]:
+        return dict(self.stages)
+
+    def timings(self) -> Dict[str, float]:
+        return {name: stage["seconds"] for name, stage in self.stages.items()}
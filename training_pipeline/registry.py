@@ -0,0 +1,103 @@
+import os
+import re
+import uuid
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+DEFAULT_MODEL_NAME = "default"
+LATEST_FILE = "LATEST"
+ARTIFACT_FILE = "model.pkl"
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+class ModelRegistry:
+    """
+    Registro de modelos versionados no diretório de modelos.
+
+    Cada artefato fica em `<root>/<nome>/<versão>/model.pkl` e nunca é sobrescrito.
+    O arquivo `<root>/<nome>/LATEST` aponta para a versão promovida; ele é trocado
+    com os.replace, então a promoção é atômica para os leitores.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def _validate(value: str, kind: str) -> str:
+        if not value or not _NAME_PATTERN.match(value):
+            raise ValueError(f"{kind} inválido: '{value}'. Use letras, números, '_', '-' ou '.'.")
+        return value
+
+    def model_dir(self, name: str) -> str:
+        return os.path.join(self.root, self._validate(name, "Nome de modelo"))
+
+    def version_dir(self, name: str, version: str) -> str:
+        return os.path.join(self.model_dir(name), self._validate(version, "Versão"))
+
+    def new_version(self, name: str) -> str:
+        """
+        Cria o diretório de uma nova versão e retorna o identificador (ordenável por data).
+        """
+        version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        os.makedirs(self.version_dir(name, version), exist_ok=True)
+        return version
+
+    def versions(self, name: str) -> List[str]:
+        model_dir = self.model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        return sorted(
+            entry for entry in os.listdir(model_dir)
+            if os.path.exists(os.path.join(model_dir, entry, ARTIFACT_FILE))
+        )
+
+    def latest_version(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.model_dir(name), LATEST_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def promote(self, name: str, version: str):
+        """
+        Aponta `LATEST` para a versão informada, de forma atômica.
+        """
+        if not os.path.exists(os.path.join(self.version_dir(name, version), ARTIFACT_FILE)):
+            raise FileNotFoundError(f"Versão '{version}' do modelo '{name}' não encontrada.")
+        model_dir = self.model_dir(name)
+        fd, tmp_path = tempfile.mkstemp(dir=model_dir, prefix=".latest-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(version)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, os.path.join(model_dir, LATEST_FILE))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def resolve(self, name: str, version: Optional[str] = None) -> str:
+        """
+        Retorna o diretório do artefato da versão pedida (ou da promovida, se omitida).
+        Lança FileNotFoundError se o modelo ou a versão não existirem.
+        """
+        version = version or self.latest_version(name)
+        if version is None:
+            raise FileNotFoundError(f"Modelo '{name}' não encontrado.")
+        version_dir = self.version_dir(name, version)
+        if not os.path.exists(os.path.join(version_dir, ARTIFACT_FILE)):
+            raise FileNotFoundError(f"Versão '{version}' do modelo '{name}' não encontrada.")
+        return version_dir
+
+    def list_models(self) -> Dict[str, dict]:
+        if not os.path.isdir(self.root):
+            return {}
+        models = {}
+        for name in sorted(os.listdir(self.root)):
+            if _NAME_PATTERN.match(name) and os.path.isdir(os.path.join(self.root, name)):
+                versions = self.versions(name)
+                if versions:
+                    models[name] = {"latest": self.latest_version(name), "versions": versions}
+        return models
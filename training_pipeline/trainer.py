@@ -1,132 +1,583 @@
 import os
+import tempfile
 import joblib
+import numpy as np
 import pandas as pd
 
-from typing import Optional, List
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Iterator, Optional, List, Tuple
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, r2_score
 from sklearn.preprocessing import LabelEncoder
-from sklearn.base import ClassifierMixin
+from sklearn.base import ClassifierMixin, is_classifier
+from sklearn.ensemble._forest import BaseForest
+from sklearn.ensemble._gb import BaseGradientBoosting
+from sklearn.tree import BaseDecisionTree
+
+from observability import timing
+from training_pipeline.compiled import COMPILED_ARTIFACT_FILE, compile_model
+from training_pipeline.distributed import fit_forest_distributed
+from training_pipeline.preprocessing import FeatureTransform, StreamingStatistics, drop_columns
+from training_pipeline.profiling import StageMemoryProfiler
+from training_pipeline.tuning import build_search, leaderboard
 
 class Trainer:
     def __init__(
         self,
         model_dir: str,
         model_class,
-        model_params: dict = None
+        model_params: dict = None,
+        unknown_category_code: Optional[int] = -1,
+        mmap_mode: Optional[str] = None,
+        profile_memory: bool = False
     ):
         self.model_dir = model_dir
         os.makedirs(self.model_dir, exist_ok=True)
 
         self.model_file = os.path.join(self.model_dir, "model.pkl")
+        self.compiled_model_file = os.path.join(self.model_dir, COMPILED_ARTIFACT_FILE)
         self.model_class = model_class
         self.model_params = model_params or {}
         self.model = None
 
         self.label_encoders = {}
+        self.fill_values = None
+        self.categories = {}
+        self.feature_columns = None
+        # Somas e contagens do treino (StreamingStatistics), usadas para estender as estatísticas no retreino.
+        self.statistics = None
+        self.unknown_category_code = unknown_category_code
+        self.feature_transform = None
+        # Com mmap_mode="r" os arrays numpy do artefato são mapeados do arquivo em vez de
+        # copiados para o heap, e processos que carregam o mesmo artefato compartilham as
+        # páginas pelo page cache.
+        self.mmap_mode = mmap_mode
+        # Com profile_memory=True, train() inclui o pico de memória de cada etapa nas métricas.
+        self.profiler = StageMemoryProfiler(enabled=profile_memory)
 
     def _drop_columns(self, data: pd.DataFrame, columns_to_drop: Optional[List[str]]) -> pd.DataFrame:
-        if columns_to_drop:
-            for col in columns_to_drop:
-                if col in data.columns:
-                    data = data.drop(columns=[col])
-        return data
+        return drop_columns(data, columns_to_drop)
+
+    def _supports_float32(self) -> bool:
+        # Árvores e florestas convertem X para float32 no fit; entregar a matriz já em
+        # float32 evita que o scikit-learn faça mais uma cópia, sem mudar o resultado.
+        return isinstance(self.model_class, type) and issubclass(
+            self.model_class, (BaseDecisionTree, BaseForest, BaseGradientBoosting)
+        )
+
+    def _encode_train_column(self, col: str, values: pd.Series) -> np.ndarray:
+        # Os códigos do Categorical usam o menor inteiro que comporta o vocabulário
+        # (int8 até 127 categorias), na mesma ordem do LabelEncoder.
+        categorical = pd.Categorical(values)
+        le = LabelEncoder()
+        le.classes_ = np.asarray(categorical.categories, dtype=object)
+        self.label_encoders[col] = le
+        self.categories[col] = categorical.categories.tolist()
+        return categorical.codes
 
     def _preprocess_train(
         self,
         data: pd.DataFrame,
-        columns_to_drop: Optional[List[str]] = None
-    ) -> pd.DataFrame:
-        data = self._drop_columns(data, columns_to_drop)
-        data = data.fillna(data.mean(numeric_only=True))
+        columns_to_drop: Optional[List[str]] = None,
+        target_column: Optional[str] = None
+    ) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Monta a matriz de features e o alvo a partir do DataFrame de treino.
 
-        for col in data.select_dtypes(include=["object"]).columns:
-            data[col] = data[col].fillna(data[col].mode()[0])
+        As features são copiadas uma única vez, coluna a coluna, para um bloco 2D com o tipo
+        que o estimador usa no fit (float32 quando ele aceita); a imputação é feita no próprio
+        bloco e as colunas categóricas entram direto como códigos. O DataFrame de entrada não
+        é alterado. Sem `target_column`, a última coluna é o alvo.
+        """
+        # As colunas descartadas só ficam de fora da seleção: nenhuma cópia do DataFrame é feita.
+        dropped = set(columns_to_drop or [])
+        columns = [col for col in data.columns if col not in dropped]
+        if not (target_column and target_column in columns):
+            target_column = columns[-1]
 
-        for col in data.select_dtypes(include=["object"]).columns:
-            le = LabelEncoder()
-            data[col] = le.fit_transform(data[col])
-            self.label_encoders[col] = le
+        with self.profiler.stage("impute_encode"):
+            self.statistics = StreamingStatistics()
+            self.statistics.update(data, columns)
+            self.fill_values = self.statistics.fill_values()
+            self.label_encoders = {}
+            self.categories = {}
+            self.feature_columns = [col for col in columns if col != target_column]
+
+            float_dtype = np.float32 if self._supports_float32() else np.float64
+            # Ordem "F": cada coluna é contígua e o DataFrame resultante usa o bloco sem copiá-lo.
+            matrix = np.empty((len(data), len(self.feature_columns)), dtype=float_dtype, order="F")
+            for j, col in enumerate(self.feature_columns):
+                values = data[col]
+                fill_value = self.fill_values.get(col)
+                if values.dtype == object:
+                    if fill_value is not None and values.hasnans:
+                        values = values.fillna(fill_value)
+                    matrix[:, j] = self._encode_train_column(col, values)
+                else:
+                    matrix[:, j] = values.to_numpy(dtype=float_dtype, na_value=np.nan)
+                    if fill_value is not None and values.hasnans:
+                        column = matrix[:, j]
+                        column[np.isnan(column)] = fill_value
+            X = pd.DataFrame(matrix, columns=self.feature_columns, index=data.index, copy=False)
 
-        return data
+            y = data[target_column]
+            if y.hasnans and target_column in self.fill_values:
+                y = y.fillna(self.fill_values[target_column])
+            if y.dtype == object:
+                y = pd.Series(self._encode_train_column(target_column, y), index=data.index, name=target_column)
+
+        return X, y
 
     def _preprocess_predict(
         self,
         data: pd.DataFrame,
         columns_to_drop: Optional[List[str]] = None
     ) -> pd.DataFrame:
-        data = self._drop_columns(data, columns_to_drop)
-        data = data.fillna(data.mean(numeric_only=True))
+        if self.feature_transform is None:
+            self.feature_transform = self._build_feature_transform()
+        return self.feature_transform.transform(data, columns_to_drop=columns_to_drop)
 
-        for col in data.select_dtypes(include=["object"]).columns:
-            data[col] = data[col].fillna(data[col].mode()[0])
-            if col in self.label_encoders:
-                data[col] = self.label_encoders[col].transform(data[col])
-            else:
-                raise ValueError(
-                    f"A coluna categórica '{col}' não foi vista no treinamento (encoder ausente)."
-                )
-
-        return data
+    def _build_feature_transform(self) -> FeatureTransform:
+        categories = self.categories or {
+            col: le.classes_.tolist() for col, le in self.label_encoders.items()
+        }
+        return FeatureTransform(
+            fill_values=self.fill_values,
+            categories=categories,
+            feature_columns=self.feature_columns,
+            unknown_category_code=self.unknown_category_code
+        )
 
     def train(
         self,
         data: pd.DataFrame,
         target_column: Optional[str] = None,
-        columns_to_drop: Optional[List[str]] = None
+        columns_to_drop: Optional[List[str]] = None,
+        distributed_workers: int = 1,
+        executor: Optional[Executor] = None
     ):
-        data = self._preprocess_train(data, columns_to_drop=columns_to_drop)
+        """
+        Treina o modelo com 80% das linhas, avalia com o restante e grava o artefato.
 
-        if target_column and target_column in data.columns:
-            y = data[target_column]
-            X = data.drop(columns=[target_column])
-        else:
-            X = data.iloc[:, :-1]
-            y = data.iloc[:, -1]
+        Com `distributed_workers` > 1 (só florestas), as árvores são divididas entre esse número
+        de workers (training_pipeline.distributed); `executor` substitui o pool local de processos.
+        """
+        X, y = self._preprocess_train(data, columns_to_drop=columns_to_drop, target_column=target_column)
 
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        with self.profiler.stage("split"):
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=42
+            )
+            del X, y
+
+        with self.profiler.stage("fit"):
+            if distributed_workers > 1:
+                model = fit_forest_distributed(
+                    self.model_class, self.model_params, X_train, y_train, distributed_workers,
+                    executor=executor, work_dir=self.model_dir
+                )
+            else:
+                model = self.model_class(**self.model_params)
+                model.fit(X_train, y_train)
+            del X_train, y_train
 
+        with self.profiler.stage("evaluate"):
+            y_pred = model.predict(X_test)
+
+            if issubclass(self.model_class, ClassifierMixin):
+                metric_value = accuracy_score(y_test, y_pred)
+                metric_name = "accuracy"
+            else:
+                metric_value = r2_score(y_test, y_pred)
+                metric_name = "r2_score"
+
+        with self.profiler.stage("save"):
+            self._save_model(model)
+
+        metrics = {metric_name: metric_value}
+        if self.profiler.enabled:
+            metrics["memory_profile"] = self.profiler.report()
+        return metrics, self.model_file
+
+    def train_incremental(
+        self,
+        chunks: Callable[[], Iterable[pd.DataFrame]],
+        target_column: Optional[str] = None,
+        columns_to_drop: Optional[List[str]] = None,
+        holdout_fraction: float = 0.2,
+        random_state: int = 42
+    ):
+        """
+        Treina um estimador com `partial_fit` percorrendo o dataset em blocos, sem carregá-lo
+        inteiro em memória. `chunks` é chamado uma vez por passada e deve gerar blocos com os
+        mesmos tipos de coluna (como os do DatasetCache).
+
+        A primeira passada calcula as estatísticas de imputação e os vocabulários. A segunda
+        codifica cada bloco, separa uma fração aleatória das linhas como holdout, treina com o
+        restante e avalia o holdout do bloco logo em seguida. O holdout nunca é usado no
+        treino, e a métrica é acumulada enquanto os blocos passam.
+        """
         model = self.model_class(**self.model_params)
-        model.fit(X_train, y_train)
+        if not hasattr(model, "partial_fit"):
+            raise ValueError(f"O modelo {self.model_class.__name__} não suporta treinamento incremental (partial_fit).")
 
-        y_pred = model.predict(X_test)
+        with self.profiler.stage("statistics"):
+            statistics = StreamingStatistics()
+            target_values = set()
+            target_missing = False
+            for chunk in chunks():
+                chunk = self._drop_columns(chunk, columns_to_drop)
+                if statistics.columns is None:
+                    target_column = target_column if target_column in chunk.columns else chunk.columns[-1]
+                statistics.update(chunk)
+                target_values.update(chunk[target_column].dropna().unique().tolist())
+                target_missing = target_missing or bool(chunk[target_column].isna().any())
+        if statistics.rows == 0:
+            raise ValueError("O dataset de treinamento está vazio.")
 
-        if issubclass(self.model_class, ClassifierMixin):
-            metric_value = accuracy_score(y_test, y_pred)
+        self.statistics = statistics
+        self.fill_values = statistics.fill_values()
+        self.categories = statistics.categories()
+        self.label_encoders = {}
+        for col, categories in self.categories.items():
+            le = LabelEncoder()
+            le.classes_ = np.array(categories, dtype=object)
+            self.label_encoders[col] = le
+        self.feature_columns = [col for col in statistics.columns if col != target_column]
+
+        classifier = is_classifier(model)
+        classes = None
+        if classifier:
+            if target_column in self.categories:
+                classes = np.arange(len(self.categories[target_column]))
+            else:
+                # Como no treinamento em memória, alvos ausentes recebem o valor de imputação.
+                if target_missing:
+                    target_values.add(self.fill_values[target_column])
+                classes = np.array(sorted(target_values))
+
+        transform = FeatureTransform(fill_values=self.fill_values, categories=self.categories)
+        rng = np.random.default_rng(random_state)
+        train_rows = holdout_rows = 0
+        correct = 0
+        sum_y = sum_y2 = sse = 0.0
+        with self.profiler.stage("partial_fit"):
+            for chunk in chunks():
+                data = transform.transform(chunk, columns_to_drop=columns_to_drop)
+                y = data[target_column].to_numpy()
+                X = data[self.feature_columns]
+                holdout = rng.random(len(data)) < holdout_fraction
+
+                if (~holdout).any():
+                    if classifier:
+                        model.partial_fit(X[~holdout], y[~holdout], classes=classes)
+                    else:
+                        model.partial_fit(X[~holdout], y[~holdout])
+                    train_rows += int((~holdout).sum())
+
+                if holdout.any() and train_rows:
+                    y_true = y[holdout]
+                    y_pred = model.predict(X[holdout])
+                    holdout_rows += len(y_true)
+                    if classifier:
+                        correct += int((y_pred == y_true).sum())
+                    else:
+                        sum_y += float(y_true.sum())
+                        sum_y2 += float((y_true ** 2).sum())
+                        sse += float(((y_true - y_pred) ** 2).sum())
+
+        if train_rows == 0:
+            raise ValueError("Nenhuma linha sobrou para treino após separar o holdout.")
+
+        if classifier:
             metric_name = "accuracy"
+            metric_value = correct / holdout_rows if holdout_rows else None
         else:
-            metric_value = r2_score(y_test, y_pred)
             metric_name = "r2_score"
+            total = sum_y2 - sum_y ** 2 / holdout_rows if holdout_rows else 0.0
+            metric_value = 1 - sse / total if total else None
 
-        artifacts = {
-            "model": model,
-            "label_encoders": self.label_encoders
+        with self.profiler.stage("save"):
+            self._save_model(model)
+        metrics = {metric_name: metric_value, "train_rows": train_rows, "holdout_rows": holdout_rows}
+        return metrics, self.model_file
+
+    def tune(
+        self,
+        data: pd.DataFrame,
+        param_space: dict,
+        target_column: Optional[str] = None,
+        columns_to_drop: Optional[List[str]] = None,
+        search: str = "grid",
+        cv: int = 5,
+        factor: int = 3,
+        n_candidates="exhaust",
+        n_jobs: int = -1,
+        top_k: int = 10
+    ):
+        """
+        Busca de hiperparâmetros com halving sucessivo e validação cruzada em k folds.
+
+        O dataset é pré-processado uma única vez; os workers do joblib recebem os arrays
+        grandes por memory mapping em vez de cópias. O melhor candidato é retreinado com
+        todos os dados e salvo como o modelo deste diretório.
+        Retorna o leaderboard, os melhores parâmetros e o score médio nos folds.
+        """
+        X, y = self._preprocess_train(data, columns_to_drop=columns_to_drop, target_column=target_column)
+
+        search_cv = build_search(
+            self.model_class,
+            param_space,
+            search=search,
+            cv=cv,
+            factor=factor,
+            n_candidates=n_candidates,
+            n_jobs=n_jobs,
+            base_params=self.model_params
+        )
+        with self.profiler.stage("search"):
+            search_cv.fit(X, y)
+
+        self.model_params = {**self.model_params, **search_cv.best_params_}
+        with self.profiler.stage("save"):
+            self._save_model(search_cv.best_estimator_)
+
+        ranking = leaderboard(search_cv, top_k=top_k)
+        result = {
+            "metric": search_cv.scoring,
+            "best_score": float(search_cv.best_score_),
+            "best_params": ranking[0]["params"],
+            "leaderboard": ranking,
+            "n_candidates": len(search_cv.cv_results_["params"]),
+            "n_iterations": int(search_cv.n_iterations_),
         }
-        joblib.dump(artifacts, self.model_file)
+        return result, self.model_file
 
-        return {metric_name: metric_value}, self.model_file
+    def retrain(
+        self,
+        data: pd.DataFrame,
+        base_dir: Optional[str] = None,
+        target_column: Optional[str] = None,
+        columns_to_drop: Optional[List[str]] = None,
+        n_estimators: Optional[int] = None
+    ):
+        """
+        Estende o modelo de `base_dir` (ou deste diretório) com as linhas novas de `data`, sem
+        retreinar sobre o histórico, e grava o resultado neste diretório.
 
-    def predict(
+        Florestas ganham árvores novas (warm_start) treinadas só com as linhas novas; sem
+        `n_estimators`, a quantidade é proporcional à fração que as linhas novas representam no
+        total. Modelos com `partial_fit` recebem uma atualização, e os demais que aceitam
+        `warm_start` (como LogisticRegression) partem dos coeficientes atuais. As médias e modas
+        de imputação passam a ser as do histórico somado às linhas novas, e as categorias novas
+        entram no fim dos vocabulários, sem mudar os códigos já usados pelo modelo. Como em
+        train, 20% das linhas novas ficam de fora para a avaliação.
+        """
+        base = self if base_dir is None else Trainer(base_dir, model_class=None)
+        base.load_model()
+        if base.statistics is None:
+            raise ValueError("O modelo não tem as estatísticas de treino necessárias ao retreino. Treine-o novamente com /train.")
+        model = base.model
+
+        dropped = set(columns_to_drop or [])
+        if target_column is None:
+            candidates = [col for col in data.columns if col not in dropped and col not in base.feature_columns]
+            if len(candidates) != 1:
+                raise ValueError(f"Informe a coluna alvo: não foi possível deduzi-la entre {candidates}.")
+            target_column = candidates[0]
+        missing = [col for col in base.feature_columns + [target_column] if col not in data.columns]
+        if missing:
+            raise ValueError(f"Colunas ausentes no dataset de retreino: {missing}")
+
+        with self.profiler.stage("impute_encode"):
+            columns = base.feature_columns + [target_column]
+            delta = StreamingStatistics()
+            delta.update(data, columns)
+            self.statistics = base.statistics.merge(delta)
+            self.fill_values = self.statistics.fill_values()
+            self.categories = self.statistics.extend_categories(base.categories)
+            self.label_encoders = {}
+            for col, categories in self.categories.items():
+                le = LabelEncoder()
+                le.classes_ = np.array(categories, dtype=object)
+                self.label_encoders[col] = le
+            self.feature_columns = base.feature_columns
+
+            transform = FeatureTransform(fill_values=self.fill_values, categories=self.categories)
+            encoded = transform.transform(data[columns])
+            X, y = encoded[self.feature_columns], encoded[target_column]
+
+        classifier = is_classifier(model)
+        if classifier:
+            new_classes = sorted(set(np.unique(y).tolist()) - set(model.classes_.tolist()))
+            if new_classes:
+                raise ValueError(f"O retreino não aceita classes novas no alvo: {new_classes}. Treine o modelo novamente.")
+
+        with self.profiler.stage("split"):
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            del X, y
+
+        with self.profiler.stage("fit"):
+            if isinstance(model, BaseForest):
+                if classifier and len(np.unique(y_train)) != len(model.classes_):
+                    # As árvores novas precisam enxergar as mesmas classes das antigas.
+                    raise ValueError("As linhas novas precisam conter todas as classes do modelo para estender a floresta.")
+                if n_estimators is None:
+                    n_estimators = max(1, round(len(model.estimators_) * delta.rows / self.statistics.rows))
+                model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_estimators)
+                model.fit(X_train, y_train)
+                model.set_params(warm_start=False)
+            elif hasattr(model, "partial_fit"):
+                model.partial_fit(X_train, y_train)
+            elif "warm_start" in model.get_params():
+                model.set_params(warm_start=True)
+                model.fit(X_train, y_train)
+                model.set_params(warm_start=False)
+            else:
+                raise ValueError(f"O modelo {type(model).__name__} não suporta retreino incremental.")
+            del X_train, y_train
+
+        with self.profiler.stage("evaluate"):
+            y_pred = model.predict(X_test)
+            if classifier:
+                metric_name, metric_value = "accuracy", accuracy_score(y_test, y_pred)
+            else:
+                metric_name, metric_value = "r2_score", r2_score(y_test, y_pred)
+
+        self.model_class = type(model)
+        self.model_params = model.get_params()
+        with self.profiler.stage("save"):
+            self._save_model(model)
+
+        metrics = {metric_name: metric_value, "new_rows": delta.rows, "total_rows": self.statistics.rows}
+        if isinstance(model, BaseForest):
+            metrics["n_estimators"] = len(model.estimators_)
+        return metrics, self.model_file
+
+    def _save_model(self, model):
+        self.model = model
+        self._export_compiled(model)
+        self._save_artifacts({
+            "model": model,
+            "label_encoders": self.label_encoders,
+            "fill_values": self.fill_values,
+            "categories": self.categories,
+            "feature_columns": self.feature_columns,
+            "statistics": self.statistics
+        })
+
+    def _export_compiled(self, model):
+        """
+        Exporta a forma compilada do modelo (training_pipeline.compiled), usada pelo Predict Service
+        sem o scikit-learn. É gravada antes do model.pkl, cuja troca sinaliza o novo modelo; se o
+        modelo não puder ser compilado, um artefato compilado de um modelo anterior é removido.
+        """
+        compiled = compile_model(model)
+        if compiled is None:
+            if os.path.exists(self.compiled_model_file):
+                os.remove(self.compiled_model_file)
+            return
+        # Só tipos do numpy e do Python: carregar este artefato não importa o scikit-learn.
+        self._save_artifacts({
+            "model": compiled,
+            "fill_values": self.fill_values,
+            "categories": self.categories,
+            "feature_columns": self.feature_columns
+        }, path=self.compiled_model_file)
+
+    def _save_artifacts(self, artifacts: dict, path: Optional[str] = None):
+        # Grava em um arquivo temporário no mesmo diretório e troca com os.replace,
+        # que é atômico: leitores nunca enxergam um pickle parcialmente escrito.
+        fd, tmp_path = tempfile.mkstemp(dir=self.model_dir, prefix=".model-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                # Sem compressão o joblib grava cada array numpy em bruto e alinhado no
+                # arquivo, o que permite carregá-lo depois com mmap_mode.
+                joblib.dump(artifacts, f, compress=0)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path or self.model_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def transform(
         self,
         data: pd.DataFrame,
         columns_to_drop: Optional[List[str]] = None
-    ):
+    ) -> pd.DataFrame:
+        """
+        Aplica o pré-processamento de predição, carregando o modelo se necessário.
+        """
         if not os.path.exists(self.model_file):
             raise FileNotFoundError("Modelo não encontrado. Treine o modelo antes de realizar previsões.")
 
         if self.model is None:
-            artifacts = joblib.load(self.model_file)
-            self.model = artifacts["model"]
-            self.label_encoders = artifacts["label_encoders"]
+            self._load_artifacts()
+
+        with timing.stage("preprocess_predict"):
+            return self._preprocess_predict(data, columns_to_drop=columns_to_drop)
+
+    def predict_features(self, features: pd.DataFrame) -> np.ndarray:
+        """
+        Avalia o modelo sobre features já pré-processadas por transform.
+        """
+        with timing.stage("model_predict"):
+            return self.model.predict(features)
+
+    def predict_proba_features(self, features: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Probabilidades por classe como matriz float32 contígua (linhas x classes), junto com as classes.
+        """
+        if not hasattr(self.model, "predict_proba"):
+            raise ValueError(f"O modelo {type(self.model).__name__} não fornece probabilidades.")
+        with timing.stage("model_predict_proba"):
+            probabilities = np.ascontiguousarray(self.model.predict_proba(features), dtype=np.float32)
+        return probabilities, np.asarray(self.model.classes_)
+
+    def predict(
+        self,
+        data: pd.DataFrame,
+        columns_to_drop: Optional[List[str]] = None
+    ):
+        predictions = self.predict_features(self.transform(data, columns_to_drop=columns_to_drop))
+        with timing.stage("tolist"):
+            return predictions.tolist()
+
+    def predict_iter(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        columns_to_drop: Optional[List[str]] = None
+    ) -> Iterator[np.ndarray]:
+        """
+        Gera as predições bloco a bloco, sem materializar o dataset inteiro.
+        O modelo precisa ter sido carregado com load_model.
+        """
+        if self.model is None:
+            raise RuntimeError("Modelo não carregado. Chame load_model antes de predict_iter.")
 
-        data = self._preprocess_predict(data, columns_to_drop=columns_to_drop)
-        return self.model.predict(data).tolist()
+        for chunk in chunks:
+            with timing.stage("preprocess_predict"):
+                chunk = self._preprocess_predict(chunk, columns_to_drop=columns_to_drop)
+            with timing.stage("model_predict"):
+                predictions = self.model.predict(chunk)
+            yield predictions
 
     def load_model(self):
         if not os.path.exists(self.model_file):
             raise FileNotFoundError(f"Modelo não encontrado em {self.model_file}. Treine primeiro.")
-        artifacts = joblib.load(self.model_file)
+        self._load_artifacts()
+
+    def _load_artifacts(self):
+        with timing.stage("load_model"):
+            self._set_artifacts(joblib.load(self.model_file, mmap_mode=self.mmap_mode))
+
+    def _set_artifacts(self, artifacts: dict):
         self.model = artifacts["model"]
-        self.label_encoders = artifacts["label_encoders"]
\ No newline at end of file
+        self.label_encoders = artifacts["label_encoders"]
+        # Artefatos antigos não têm estatísticas de treino; nesse caso o lote é usado.
+        self.fill_values = artifacts.get("fill_values")
+        self.categories = artifacts.get("categories") or {}
+        self.feature_columns = artifacts.get("feature_columns")
+        self.statistics = artifacts.get("statistics")
+        self.feature_transform = self._build_feature_transform()
@@ -0,0 +1,121 @@
+import json
+from typing import List, Union
+
+import numpy as np
+from scipy import stats
+from sklearn.base import ClassifierMixin
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV, HalvingRandomSearchCV
+
+SEARCH_STRATEGIES = ("grid", "random")
+
+# Distribuições aceitas no espaço de busca aleatória: {"C": {"distribution": "loguniform", "low": 0.01, "high": 10}}.
+_DISTRIBUTIONS = {
+    "uniform": lambda low, high: stats.uniform(low, high - low),
+    "loguniform": lambda low, high: stats.loguniform(low, high),
+    "randint": lambda low, high: stats.randint(low, high + 1),
+}
+
+
+def parse_param_space(param_space_str: str, search: str = "grid") -> dict:
+    """
+    Converte o JSON do espaço de busca em um dict aceito pelo scikit-learn.
+
+    Na busca em grade cada parâmetro recebe uma lista de valores (um valor isolado vira uma
+    lista de um elemento). Na busca aleatória, além de listas, um parâmetro pode ser uma
+    distribuição `uniform`, `loguniform` ou `randint` com `low` e `high`.
+    """
+    if search not in SEARCH_STRATEGIES:
+        raise ValueError(f"Estratégia de busca '{search}' não suportada. Use {list(SEARCH_STRATEGIES)}.")
+    try:
+        space = json.loads(param_space_str)
+    except (json.JSONDecodeError, TypeError) as e:
+        raise ValueError(f"Erro ao parsear param_grid: {e}")
+    if not isinstance(space, dict) or not space:
+        raise ValueError("param_grid deve ser um objeto JSON com ao menos um parâmetro.")
+
+    parsed = {}
+    for name, values in space.items():
+        if isinstance(values, dict):
+            if search != "random":
+                raise ValueError(f"Distribuições só são aceitas na busca aleatória (parâmetro '{name}').")
+            kind = values.get("distribution")
+            if kind not in _DISTRIBUTIONS or "low" not in values or "high" not in values:
+                raise ValueError(
+                    f"Distribuição inválida para '{name}'. Use {{\"distribution\": {list(_DISTRIBUTIONS)}, \"low\": ..., \"high\": ...}}."
+                )
+            parsed[name] = _DISTRIBUTIONS[kind](values["low"], values["high"])
+        elif isinstance(values, list):
+            if not values:
+                raise ValueError(f"O parâmetro '{name}' não tem valores.")
+            parsed[name] = values
+        else:
+            parsed[name] = [values]
+    return parsed
+
+
+def build_search(
+    model_class,
+    param_space: dict,
+    search: str = "grid",
+    cv: int = 5,
+    factor: int = 3,
+    n_candidates: Union[int, str] = "exhaust",
+    n_jobs: int = -1,
+    random_state: int = 0,
+    base_params: dict = None
+):
+    """
+    Monta a busca por halving sucessivo: todos os candidatos começam com poucas amostras
+    e, a cada rodada, só a melhor fração 1/`factor` segue com `factor` vezes mais dados.
+    Os folds de cada rodada são avaliados em paralelo em `n_jobs` processos.
+    """
+    scoring = "accuracy" if issubclass(model_class, ClassifierMixin) else "r2"
+    common = dict(
+        factor=factor,
+        cv=cv,
+        scoring=scoring,
+        refit=True,
+        n_jobs=n_jobs,
+        random_state=random_state,
+        error_score=np.nan,
+    )
+    estimator = model_class(**(base_params or {}))
+    if search == "random":
+        return HalvingRandomSearchCV(estimator, param_space, n_candidates=n_candidates, **common)
+    return HalvingGridSearchCV(estimator, param_space, **common)
+
+
+def leaderboard(search, top_k: int = 10) -> List[dict]:
+    """
+    Resume cv_results_ de uma busca por halving: cada candidato aparece uma vez, com as
+    métricas da última rodada que alcançou, ordenado pela rodada e depois pelo score.
+    """
+    results = search.cv_results_
+    best_by_candidate = {}
+    for i, params in enumerate(results["params"]):
+        key = json.dumps(params, sort_keys=True, default=str)
+        current = best_by_candidate.get(key)
+        if current is None or results["iter"][i] >= results["iter"][current]:
+            best_by_candidate[key] = i
+
+    def score(i):
+        value = results["mean_test_score"][i]
+        return -np.inf if np.isnan(value) else value
+
+    ordered = sorted(best_by_candidate.values(), key=lambda i: (results["iter"][i], score(i)), reverse=True)
+    return [
+        {
+            "rank": position,
+            "params": {name: _to_builtin(value) for name, value in results["params"][i].items()},
+            "mean_score": None if np.isnan(results["mean_test_score"][i]) else float(results["mean_test_score"][i]),
+            "std_score": None if np.isnan(results["std_test_score"][i]) else float(results["std_test_score"][i]),
+            "iteration": int(results["iter"][i]),
+            "n_resources": int(results["n_resources"][i]),
+        }
+        for position, i in enumerate(ordered[:top_k], start=1)
+    ]
+
+
+def _to_builtin(value):
+    return value.item() if isinstance(value, np.generic) else value